@@ -0,0 +1,345 @@
+"""KnowledgeFanout - Concurrent search across several knowledge sources.
+
+Every source (a wiki repository, a local document folder, a memory store)
+is searched on its own thread with its own deadline. Results are collected
+in deadline order, so a turn waits for the slowest source that answers in
+time, never for the sum of all sources, and never past the largest
+deadline. A source that misses its deadline or fails is left out and
+reported; the others still answer.
+
+Raw scores of different sources are not comparable (BM25 depends on the
+corpus, TF-IDF is a cosine), so each source's scores are divided by its
+best score before merging; a source weight can then favour one over the
+others.
+"""
+
+import contextvars
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field, replace
+from typing import Optional, Sequence
+
+from strands import tool
+
+from agent import telemetry
+from agent.knowledge.executor import run_blocking
+from agent.knowledge.index import BM25Index
+from agent.knowledge.packing import pack_results
+from agent.tools import SupportAgentTools, passage_location
+
+
+@dataclass(frozen=True)
+class SourceHit:
+    """A search result from one knowledge source.
+
+    Attributes:
+        source: Name of the source
+        location: Where the text comes from (e.g. "billing/invoice.md > Reissue")
+        text: Matching text
+        score: Source-specific score; normalized to (0, 1] x weight once merged
+    """
+
+    source: str
+    location: str
+    text: str
+    score: float
+
+
+@dataclass(frozen=True)
+class FanoutResult:
+    """Merged hits of one fan-out search.
+
+    Attributes:
+        hits: Hits of all sources that answered, best first
+        timed_out: Sources that missed their deadline (or were still stuck on an earlier search)
+        failed: Error message per source that raised
+    """
+
+    hits: list[SourceHit]
+    timed_out: tuple[str, ...] = ()
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        """Whether some source is missing from the results."""
+        return bool(self.timed_out or self.failed)
+
+
+class KnowledgeSearchSource(ABC):
+    """A searchable knowledge source.
+
+    Implementations block; KnowledgeFanout runs them on worker threads.
+    """
+
+    def __init__(self, name: str, deadline: Optional[float] = None, weight: float = 1.0) -> None:
+        """Initialize the source.
+
+        Args:
+            name: Unique source name shown with its results
+            deadline: Seconds the source may take per search (None uses the fan-out default)
+            weight: Multiplier for this source's normalized scores
+        """
+        self.name = name
+        self.deadline = deadline
+        self.weight = weight
+
+    @abstractmethod
+    def search(self, query: str, top_k: int) -> list[SourceHit]:
+        """Return up to top_k hits, best first."""
+
+
+class WikiSearchSource(KnowledgeSearchSource):
+    """Passages of a wiki repository or local folder, via SupportAgentTools."""
+
+    def __init__(
+        self,
+        tools: SupportAgentTools,
+        name: str = "wiki",
+        deadline: Optional[float] = None,
+        weight: float = 1.0,
+    ) -> None:
+        """Initialize the source.
+
+        Args:
+            tools: Tools (and index) over the source's WikiKnowledgeSource
+            name: Unique source name
+            deadline: Seconds the source may take per search
+            weight: Multiplier for normalized scores
+        """
+        super().__init__(name, deadline, weight)
+        self.tools = tools
+
+    def search(self, query: str, top_k: int) -> list[SourceHit]:
+        """Search the latest synced snapshot of the source."""
+        self.tools.wiki_source.ensure_fresh()
+        return [
+            SourceHit(self.name, passage_location(passage), passage.text, score)
+            for passage, score in self.tools.search_scored(query, top_k)
+        ]
+
+
+class MemorySearchSource(KnowledgeSearchSource):
+    """In-process notes ranked with BM25.
+
+    Stand-in for a memory store such as AgentCore Memory long-term
+    records, with the same search interface.
+    """
+
+    def __init__(self, name: str = "memory", deadline: Optional[float] = None, weight: float = 1.0) -> None:
+        """Initialize an empty store.
+
+        Args:
+            name: Unique source name
+            deadline: Seconds the source may take per search
+            weight: Multiplier for normalized scores
+        """
+        super().__init__(name, deadline, weight)
+        self._index = BM25Index()
+        self._notes: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def remember(self, key: str, text: str) -> None:
+        """Store or replace a note."""
+        with self._lock:
+            self._notes[key] = text
+            self._index.add(key, text)
+
+    def forget(self, key: str) -> None:
+        """Remove a note if present."""
+        with self._lock:
+            self._notes.pop(key, None)
+            self._index.remove(key)
+
+    def search(self, query: str, top_k: int) -> list[SourceHit]:
+        """Rank stored notes against the query."""
+        with self._lock:
+            return [
+                SourceHit(self.name, hit.doc_id, self._notes[hit.doc_id], hit.score)
+                for hit in self._index.search(query, top_k)
+            ]
+
+
+def merge_hits(ranked: Sequence[tuple[KnowledgeSearchSource, list[SourceHit]]], top_k: int) -> list[SourceHit]:
+    """Merge per-source hit lists by normalized score.
+
+    Args:
+        ranked: (source, hits) pairs in source order
+        top_k: Maximum number of merged hits
+
+    Returns:
+        Hits with normalized, weighted scores, best first; ties keep source order
+    """
+    merged = []
+    for order, (source, hits) in enumerate(ranked):
+        best = max((hit.score for hit in hits), default=0.0)
+        if best <= 0:
+            continue
+        for rank, hit in enumerate(hits):
+            merged.append((hit.score / best * source.weight, order, rank, hit))
+    merged.sort(key=lambda item: (-item[0], item[1], item[2]))
+    return [replace(hit, score=score) for score, _, _, hit in merged[:top_k]]
+
+
+class KnowledgeFanout:
+    """Searches several knowledge sources concurrently under deadlines.
+
+    One fan-out is shared by all sessions, so each source may serve up to
+    max_concurrency searches at once (further calls wait for a slot, which
+    counts against their deadline), and a search already running for the
+    same query is shared instead of repeated. A search that misses its
+    deadline keeps running in the background (threads can't be
+    interrupted); while such an overdue search runs, the source is
+    reported as timed out instead of being queried again, so a stuck
+    source never piles up work.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[KnowledgeSearchSource],
+        deadline: float = 5.0,
+        max_results: int = 10,
+        token_budget: int = 3000,
+        max_concurrency: int = 4,
+    ) -> None:
+        """Initialize the fan-out.
+
+        Args:
+            sources: Sources to search, in display order; names must be unique
+            deadline: Default seconds each source may take
+            max_results: Maximum number of merged hits
+            token_budget: Estimated token budget for a formatted result
+            max_concurrency: Searches each source runs at the same time
+
+        Raises:
+            ValueError: If two sources share a name
+        """
+        names = [source.name for source in sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Knowledge source names must be unique: {', '.join(names)}")
+        self.sources = list(sources)
+        self.deadline = deadline
+        self.max_results = max_results
+        self.token_budget = token_budget
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.sources) * max_concurrency), thread_name_prefix="knowledge-fanout"
+        )
+        self._slots = {name: threading.BoundedSemaphore(max_concurrency) for name in names}
+        # Running searches per source: (query, top_k) -> (future, submit time)
+        self._running: dict[str, dict[tuple[str, int], tuple[Future, float]]] = {name: {} for name in names}
+        self._lock = threading.Lock()
+
+    def _deadline(self, source: KnowledgeSearchSource) -> float:
+        return source.deadline if source.deadline is not None else self.deadline
+
+    def _search_source(self, source: KnowledgeSearchSource, query: str, top_k: int) -> list[SourceHit]:
+        """Worker: search a source once one of its slots is free."""
+        with self._slots[source.name]:
+            return source.search(query, top_k)
+
+    def _submit(self, source: KnowledgeSearchSource, query: str, top_k: int, now: float) -> Optional[Future]:
+        """Start (or join) a search; None if the source is stuck. Caller holds the lock."""
+        running = self._running[source.name]
+        for key, (future, submitted) in list(running.items()):
+            if future.done():
+                del running[key]
+            elif now - submitted >= self._deadline(source):
+                return None  # Overdue from an earlier call
+        shared = running.get((query, top_k))
+        if shared is not None:
+            return shared[0]
+        # Copy the context so source spans nest under this one
+        future = self._executor.submit(contextvars.copy_context().run, self._search_source, source, query, top_k)
+        running[(query, top_k)] = (future, now)
+        return future
+
+    def search(self, query: str, top_k: Optional[int] = None) -> FanoutResult:
+        """Search all sources concurrently and merge what arrives in time.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of hits per source and merged (defaults to max_results)
+
+        Returns:
+            Merged hits plus the sources that timed out or failed
+        """
+        top_k = top_k or self.max_results
+        with telemetry.span("knowledge.fanout", sources=len(self.sources)) as span:
+            start = time.monotonic()
+            pending: list[tuple[KnowledgeSearchSource, Future]] = []
+            timed_out: list[str] = []
+            with self._lock:
+                for source in self.sources:
+                    future = self._submit(source, query, top_k, start)
+                    if future is None:
+                        timed_out.append(source.name)
+                    else:
+                        pending.append((source, future))
+
+            answered: dict[str, list[SourceHit]] = {}
+            failed: dict[str, str] = {}
+            # Waiting in deadline order never waits past a source's own deadline
+            for source, future in sorted(pending, key=lambda item: self._deadline(item[0])):
+                remaining = start + self._deadline(source) - time.monotonic()
+                try:
+                    answered[source.name] = future.result(timeout=max(0.0, remaining))
+                except FutureTimeout:
+                    timed_out.append(source.name)
+                except Exception as error:
+                    failed[source.name] = f"{type(error).__name__}: {error}"
+
+            span.add("sources_timed_out", len(timed_out))
+            span.add("sources_failed", len(failed))
+            ranked = [(source, answered[source.name]) for source in self.sources if source.name in answered]
+            return FanoutResult(
+                merge_hits(ranked, top_k),
+                timed_out=tuple(name for name in (s.name for s in self.sources) if name in timed_out),
+                failed=failed,
+            )
+
+    def search_text(self, query: str) -> str:
+        """Search all sources and format the merged hits for the model.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Best hits packed into the token budget, with a note on missing sources
+        """
+        result = self.search(query)
+        labelled = len(self.sources) > 1
+        text = "\n\n".join(pack_results(
+            [
+                f"## From {hit.source + ': ' if labelled else ''}{hit.location}\n\n{hit.text}"
+                for hit in result.hits
+            ],
+            self.token_budget,
+        ))
+        if not text:
+            text = f"No relevant content found for query: {query}"
+        notes = []
+        if result.timed_out:
+            notes.append(f"no answer in time from {', '.join(result.timed_out)}")
+        if result.failed:
+            notes.append(f"search failed in {', '.join(result.failed)}")
+        if notes:
+            text += f"\n\n(Partial results: {'; '.join(notes)})"
+        return text
+
+    @tool(name="search_knowledge")
+    async def search_knowledge_async(self, query: str) -> str:
+        """Search all knowledge sources (wikis, document folders, memory) at once.
+
+        Args:
+            query: Search query to find relevant information
+
+        Returns:
+            Best matching content across sources
+        """
+        return await run_blocking(self.search_text, query)
+
+    def close(self) -> None:
+        """Stop the worker threads once running searches finish."""
+        self._executor.shutdown(wait=False)
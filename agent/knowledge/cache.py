@@ -0,0 +1,242 @@
+"""In-process caches for knowledge data."""
+
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Callable, Generic, Hashable, Iterable, Optional, TypeVar
+
+from agent import telemetry
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU cache bounded by total entry size.
+
+    Entry sizes come from the sizeof callable (bytes by default), so the
+    budget can be expressed in memory rather than entry count.
+    """
+
+    def __init__(self, max_size: int, sizeof: Callable[[V], int] = sys.getsizeof) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_size: Maximum total size of all entries
+            sizeof: Function returning the size of a value
+        """
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> Optional[V]:
+        """Return a cached value and mark it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        """Store a value, evicting least recently used entries over budget.
+
+        Values larger than the whole budget are not cached.
+        """
+        size = self.sizeof(value)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def keys(self) -> list[K]:
+        """Return the cached keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def pop(self, key: K) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key: K) -> None:
+        """Remove an entry; caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+class FileCache:
+    """Cache of file contents keyed by path and stat signature.
+
+    An entry is only served while the file's (mtime_ns, size) match the
+    values recorded when it was read, so edits made by git checkouts are
+    picked up even without explicit invalidation. Forms derived from a
+    file can be cached next to its text under another kind.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget for cached text
+        """
+        self._cache: LRUCache[tuple[str, str], tuple[tuple[int, int], str]] = LRUCache(
+            max_bytes, sizeof=lambda entry: sys.getsizeof(entry[1])
+        )
+        self._kinds: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def size(self) -> int:
+        return self._cache.size
+
+    def load(
+        self,
+        path: Path,
+        read: Callable[[Path], str],
+        kind: str = "text",
+    ) -> str:
+        """Return cached content for a file, reading it on miss or change.
+
+        Args:
+            path: Absolute file path
+            read: Function producing the value from the path
+            kind: Cache namespace, so derived forms of a file don't collide
+
+        Returns:
+            File content (or derived form)
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (str(path), kind)
+
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            telemetry.current().add("file_cache_hits")
+            return entry[1]
+
+        self.misses += 1
+        telemetry.current().add("file_cache_misses")
+        value = read(path)
+        self._kinds.add(kind)
+        self._cache.put(key, (signature, value))
+        return value
+
+    def invalidate(self, path: Path) -> None:
+        """Drop all cached forms of a file."""
+        for kind in list(self._kinds):
+            self._cache.pop((str(path), kind))
+
+    def invalidate_under(self, directory: Path) -> None:
+        """Drop all cached files below a directory (e.g. a deleted checkout)."""
+        prefix = os.path.join(str(directory), "")
+        for key in self._cache.keys():
+            if key[0].startswith(prefix):
+                self._cache.pop(key)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._cache.clear()
+
+
+class QueryCache:
+    """Cache of formatted search results keyed by knowledge revision and query terms.
+
+    Queries are keyed by their sorted, de-duplicated index terms, so case,
+    full-width/half-width variants (NFKC), whitespace and word order map to
+    the same entry - exactly the differences BM25 ranking ignores anyway.
+    Rankers that weight repeated query terms (tfidf, hybrid) need
+    term_counts, which keys on how often each term occurs instead.
+    Entries from an older revision are dropped as soon as a newer one is
+    seen.
+    """
+
+    def __init__(self, max_entries: int = 1024, term_counts: bool = False) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached queries
+            term_counts: Key on term counts, so "mfa mfa setup" and "mfa setup" differ
+        """
+        self.term_counts = term_counts
+        self._cache: LRUCache[tuple, str] = LRUCache(max_entries, sizeof=lambda _: 1)
+        self._revision: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def key(self, terms: Iterable[str]) -> tuple:
+        """Build the cache key for a tokenized query."""
+        if self.term_counts:
+            return tuple(sorted(Counter(terms).items()))
+        return tuple(sorted(set(terms)))
+
+    def get(self, revision: Optional[str], terms: Iterable[str]) -> Optional[str]:
+        """Return the cached formatted result for a query at a revision, or None.
+
+        Nothing is cached for sources without a revision.
+        """
+        if revision is None:
+            return None
+        with self._lock:
+            if revision != self._revision:
+                self._cache.clear()
+                self._revision = revision
+        return self._cache.get(self.key(terms))
+
+    def put(self, revision: Optional[str], terms: Iterable[str], result: str) -> None:
+        """Store the formatted result for a query at a revision."""
+        if revision is None:
+            return
+        with self._lock:
+            if revision != self._revision:
+                self._cache.clear()
+                self._revision = revision
+        self._cache.put(self.key(terms), result)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._cache.clear()
@@ -0,0 +1,130 @@
+"""Knowledge catalog - compact per-file summaries for browsing the knowledge base."""
+
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Optional
+
+from agent.knowledge.chunker import markdown_headings
+from agent.knowledge.tokenizer import normalize
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Summary of one text document.
+
+    Attributes:
+        path: File path relative to the knowledge directory
+        title: First level-1 heading, or the file name without suffix
+        headings: Level-2 headings in document order
+        size: Size in bytes (UTF-8)
+    """
+
+    path: str
+    title: str
+    headings: tuple[str, ...]
+    size: int
+
+
+def describe_document(path: str, text: str) -> CatalogEntry:
+    """Build the catalog entry for a document.
+
+    Args:
+        path: File path relative to the knowledge directory
+        text: Document text
+
+    Returns:
+        Entry with title, top-level section headings and size
+    """
+    headings = markdown_headings(text)
+    title = next((title for level, title in headings if level == 1), PurePosixPath(path).stem)
+    sections = tuple(title for level, title in headings if level == 2)
+    return CatalogEntry(path, title, sections, len(text.encode("utf-8")))
+
+
+class KnowledgeCatalog:
+    """Catalog of the documents and other files in the knowledge directory.
+
+    Documents get a CatalogEntry; other files (images and other assets)
+    are only counted, since their names tell the model nothing it can
+    search. The catalog does no I/O - SupportAgentTools fills it while
+    indexing, so each file is read once per commit for both. The
+    normalized text the contains filter matches against is computed once
+    per entry, when it is added. Callers serialize access.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty catalog."""
+        self._documents: dict[str, CatalogEntry] = {}
+        self._normalized: dict[str, str] = {}  # Path, title and headings per document
+        self._assets: set[str] = set()
+        # False until every file of the current revision has been added
+        self.complete = False
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_document(self, entry: CatalogEntry) -> None:
+        """Add or replace a document entry."""
+        self._assets.discard(entry.path)
+        self._documents[entry.path] = entry
+        self._normalized[entry.path] = normalize(" ".join((entry.path, entry.title, *entry.headings)))
+
+    def add_asset(self, path: str) -> None:
+        """Record a non-document file."""
+        self._documents.pop(path, None)
+        self._normalized.pop(path, None)
+        self._assets.add(path)
+
+    def remove(self, path: str) -> None:
+        """Forget a file of either kind."""
+        self._documents.pop(path, None)
+        self._normalized.pop(path, None)
+        self._assets.discard(path)
+
+    def clear(self) -> None:
+        """Forget all files and mark the catalog incomplete."""
+        self._documents.clear()
+        self._normalized.clear()
+        self._assets.clear()
+        self.complete = False
+
+    def documents(self, path_prefix: str = "", contains: Optional[str] = None) -> list[CatalogEntry]:
+        """Return matching document entries sorted by path.
+
+        Args:
+            path_prefix: Only paths starting with this prefix
+            contains: Only entries whose path, title or headings contain this
+                text (NFKC-normalized, case-insensitive)
+
+        Returns:
+            Matching entries
+        """
+        needle = normalize(contains) if contains else None
+        entries = []
+        for path in sorted(self._documents):
+            if not path.startswith(path_prefix):
+                continue
+            if needle and needle not in self._normalized[path]:
+                continue
+            entries.append(self._documents[path])
+        return entries
+
+    def assets(self) -> list[str]:
+        """Return the paths of all non-document files, sorted."""
+        return sorted(self._assets)
+
+    def asset_counts(self, path_prefix: str = "") -> dict[str, int]:
+        """Count non-document files under a prefix by suffix.
+
+        Args:
+            path_prefix: Only paths starting with this prefix
+
+        Returns:
+            Number of files per lowercase suffix ("" for none), most common first
+        """
+        counts: dict[str, int] = {}
+        for path in self._assets:
+            if path.startswith(path_prefix):
+                suffix = PurePosixPath(path).suffix.lower()
+                counts[suffix] = counts.get(suffix, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
@@ -0,0 +1,148 @@
+"""Markdown chunker - splits documents into heading-addressable passages."""
+
+import re
+from dataclasses import dataclass
+
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_SLUG_STRIP_PATTERN = re.compile(r"[^\w\- ]")
+_EMPHASIS_PATTERN = re.compile(r"[*`]+")
+
+
+@dataclass(frozen=True)
+class Passage:
+    """A section of a knowledge file.
+
+    Attributes:
+        id: Stable identifier, "<path>#<heading-slug>" (just "<path>" for text
+            before the first heading). Oversized sections are split into
+            parts suffixed ":2", ":3", ...
+        path: File path relative to the knowledge directory
+        heading: Heading trail, e.g. "RAG機能 > 処理フロー"
+        text: Section text including its heading line
+    """
+
+    id: str
+    path: str
+    heading: str
+    text: str
+
+
+def slugify(heading: str) -> str:
+    """Convert a heading to a GitHub-style anchor.
+
+    Args:
+        heading: Heading text
+
+    Returns:
+        Lowercase anchor with punctuation removed and spaces as hyphens
+    """
+    return _SLUG_STRIP_PATTERN.sub("", heading.strip().lower()).replace(" ", "-")
+
+
+def markdown_headings(text: str) -> list[tuple[int, str]]:
+    """List the ATX headings of a markdown document.
+
+    Headings inside fenced code blocks are ignored; emphasis markers are
+    stripped as in passage heading trails.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        (level, title) pairs in document order
+    """
+    headings: list[tuple[int, str]] = []
+    in_fence = False
+    for line in text.splitlines():
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        if match:
+            headings.append((len(match.group(1)), _EMPHASIS_PATTERN.sub("", match.group(2)).strip()))
+    return headings
+
+
+def _split_long(text: str, max_chars: int) -> list[str]:
+    """Split text at paragraph boundaries into parts of at most max_chars.
+
+    A single paragraph longer than max_chars is hard-wrapped.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    parts: list[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        while len(paragraph) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(candidate) > max_chars:
+            parts.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_markdown(path: str, text: str, max_chars: int = 1500) -> list[Passage]:
+    """Split a markdown document into passages at ATX headings.
+
+    Each heading starts a new passage that runs until the next heading of
+    any level. Headings inside fenced code blocks are ignored. Sections
+    without body text are skipped, but their headings stay in the trail of
+    nested sections.
+
+    Args:
+        path: File path used to build passage ids
+        text: Markdown text
+        max_chars: Maximum passage length before splitting at paragraphs
+
+    Returns:
+        Passages in document order
+    """
+    sections: list[tuple[str, str, list[str]]] = []  # (slug, heading trail, lines)
+    trail: list[tuple[int, str]] = []
+    current: tuple[str, str, list[str]] = ("", "", [])
+    in_fence = False
+
+    for line in text.splitlines():
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        if match:
+            sections.append(current)
+            level, title = len(match.group(1)), _EMPHASIS_PATTERN.sub("", match.group(2)).strip()
+            while trail and trail[-1][0] >= level:
+                trail.pop()
+            trail.append((level, title))
+            current = (slugify(title), " > ".join(t for _, t in trail), [line])
+        else:
+            current[2].append(line)
+    sections.append(current)
+
+    passages: list[Passage] = []
+    seen_slugs: dict[str, int] = {}
+    for slug, heading, lines in sections:
+        base_id = path
+        if heading:
+            # Duplicate headings get GitHub-style "-1", "-2" suffixes
+            count = seen_slugs.get(slug, 0)
+            seen_slugs[slug] = count + 1
+            base_id = f"{path}#{slug}-{count}" if count else f"{path}#{slug}"
+
+        body = lines[1:] if heading else lines
+        if not "\n".join(body).strip():
+            continue
+
+        for number, part in enumerate(_split_long("\n".join(lines).strip(), max_chars), start=1):
+            passage_id = base_id if number == 1 else f"{base_id}:{number}"
+            passages.append(Passage(passage_id, path, heading, part))
+
+    return passages
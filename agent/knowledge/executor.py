@@ -0,0 +1,53 @@
+"""Bounded executor for blocking knowledge I/O called from async code."""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor for git and file operations.
+
+    The pool size comes from AGENT_IO_WORKERS (default 4), so a slow pull
+    or a burst of file loads can't exhaust the event loop's default pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("AGENT_IO_WORKERS", "4")),
+                thread_name_prefix="knowledge-io",
+            )
+        return _executor
+
+
+async def run_blocking(
+    func: Callable[..., T], *args, executor: Optional[Executor] = None, **kwargs
+) -> T:
+    """Run a blocking callable off the event loop thread.
+
+    The callable runs in a copy of the caller's context, so spans it opens
+    nest under the caller's active span (run_in_executor doesn't carry
+    contextvars over by itself).
+
+    Args:
+        func: Blocking callable
+        *args: Positional arguments for func
+        executor: Executor to use (defaults to get_io_executor())
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor or get_io_executor(), call)
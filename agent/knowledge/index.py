@@ -0,0 +1,264 @@
+"""BM25Index - In-memory inverted index with BM25 ranking."""
+
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Mapping, Sequence
+
+from agent.knowledge.tokenizer import tokenize
+
+
+def bm25_idf(doc_count: int, document_frequency: int) -> float:
+    """Inverse document frequency as used by BM25 (always positive).
+
+    Args:
+        doc_count: Number of documents in the collection
+        document_frequency: Number of documents containing the term
+
+    Returns:
+        IDF weight
+    """
+    return math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """A ranked search result."""
+
+    doc_id: str
+    score: float
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[SearchHit]], k: int = 60) -> list[SearchHit]:
+    """Merge rankings from scorers with incomparable scales.
+
+    Each document scores sum(1 / (k + rank)) over the rankings it appears
+    in, so agreement between scorers matters more than either raw score.
+
+    Args:
+        rankings: Hit lists, each sorted best first
+        k: Rank damping constant (60 is the customary value)
+
+    Returns:
+        Fused hits sorted by descending score; ties keep first-seen order
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            scores[hit.doc_id] = scores.get(hit.doc_id, 0.0) + 1 / (k + rank)
+    return [SearchHit(doc_id, score) for doc_id, score in sorted(scores.items(), key=lambda item: -item[1])]
+
+
+class BM25Index:
+    """Inverted index over text documents ranked with Okapi BM25.
+
+    Documents are tokenized once when added. Each term (a word or a Japanese
+    character n-gram, see agent.knowledge.tokenizer) keeps a postings list
+    mapping internal document numbers to term frequencies, so a query only
+    touches the postings of its own terms instead of scanning the corpus.
+    Pure processing class - callers are responsible for loading the text.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        tokenizer: Callable[[str], list[str]] = tokenize,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation parameter
+            b: Document length normalization parameter
+            tokenizer: Function splitting documents and queries into terms
+        """
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._doc_numbers)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._doc_numbers
+
+    @property
+    def doc_ids(self) -> list[str]:
+        """Identifiers of all indexed documents."""
+        return list(self._doc_numbers)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Add a document, replacing any existing document with the same id.
+
+        Args:
+            doc_id: Document identifier (e.g. file path)
+            text: Document text
+        """
+        self.add_tokens(doc_id, self.tokenizer(text))
+
+    def add_tokens(self, doc_id: str, tokens: Iterable[str]) -> None:
+        """Add a pre-tokenized document, replacing any existing one.
+
+        Args:
+            doc_id: Document identifier
+            tokens: Document tokens
+        """
+        self.add_frequencies(doc_id, Counter(tokens))
+
+    def add_frequencies(self, doc_id: str, frequencies: Mapping[str, int]) -> None:
+        """Add a document given as term frequencies, replacing any existing one.
+
+        Args:
+            doc_id: Document identifier
+            frequencies: Mapping of term to occurrence count
+        """
+        if doc_id in self._doc_numbers:
+            self.remove(doc_id)
+
+        length = sum(frequencies.values())
+        number = len(self._doc_ids)
+
+        self._doc_numbers[doc_id] = number
+        self._doc_ids.append(doc_id)
+        self._doc_lengths.append(length)
+        self._doc_terms.append(tuple(frequencies))
+        self._total_length += length
+
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[number] = frequency
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document from the index if present.
+
+        Args:
+            doc_id: Document identifier
+        """
+        number = self._doc_numbers.pop(doc_id, None)
+        if number is None:
+            return
+
+        for term in self._doc_terms[number]:
+            postings = self._postings[term]
+            del postings[number]
+            if not postings:
+                del self._postings[term]
+
+        self._total_length -= self._doc_lengths[number]
+        self._doc_ids[number] = None
+        self._doc_lengths[number] = 0
+        self._doc_terms[number] = ()
+
+    @property
+    def posting_count(self) -> int:
+        """Number of (term, document) entries, which dominates the index's memory."""
+        return sum(len(terms) for terms in self._doc_terms)
+
+    @property
+    def total_length(self) -> int:
+        """Sum of all document lengths in tokens."""
+        return self._total_length
+
+    def documents(self) -> Iterator[tuple[str, int]]:
+        """Iterate over (doc_id, length) of live documents in insertion order."""
+        for doc_id, length in zip(self._doc_ids, self._doc_lengths):
+            if doc_id is not None:
+                yield doc_id, length
+
+    def postings(self) -> Iterator[tuple[str, dict[str, int]]]:
+        """Iterate over terms with their {doc_id: frequency} postings."""
+        for term, postings in self._postings.items():
+            yield term, {self._doc_ids[number]: frequency for number, frequency in postings.items()}
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        self._postings: dict[str, dict[int, int]] = {}
+        self._doc_numbers: dict[str, int] = {}
+        self._doc_ids: list[str | None] = []
+        self._doc_lengths: list[int] = []
+        self._doc_terms: list[tuple[str, ...]] = []
+        self._total_length = 0
+
+    def search(self, query: str, top_k: int = 10) -> list[SearchHit]:
+        """Rank documents against a query.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of hits to return
+
+        Returns:
+            Hits sorted by descending BM25 score
+        """
+        return self.search_tokens(self.tokenizer(query), top_k)
+
+    def search_tokens(self, query_tokens: Iterable[str], top_k: int = 10) -> list[SearchHit]:
+        """Rank documents against pre-tokenized query terms.
+
+        Args:
+            query_tokens: Query tokens
+            top_k: Maximum number of hits to return
+
+        Returns:
+            Hits sorted by descending BM25 score
+        """
+        doc_count = len(self._doc_numbers)
+        if doc_count == 0 or top_k <= 0:
+            return []
+
+        scores: dict[int, float] = {}
+        for term in set(query_tokens):
+            for number, weight in self._term_weights(term):
+                scores[number] = scores.get(number, 0.0) + weight
+        return self._top_hits(scores, top_k)
+
+    def search_batch(self, queries: Iterable[Iterable[str]], top_k: int = 10) -> list[list[SearchHit]]:
+        """Rank documents against many pre-tokenized queries.
+
+        Each term's BM25 contributions are computed once per batch and
+        reused by every query containing it, so a batch of related queries
+        costs little more than its distinct terms.
+
+        Args:
+            queries: Token lists, one per query
+            top_k: Maximum number of hits per query
+
+        Returns:
+            Hits per query, in query order, each sorted by descending BM25 score
+        """
+        queries = list(queries)
+        if not self._doc_numbers or top_k <= 0:
+            return [[] for _ in queries]
+
+        term_weights: dict[str, list[tuple[int, float]]] = {}
+        results = []
+        for query_tokens in queries:
+            scores: dict[int, float] = {}
+            for term in set(query_tokens):
+                weights = term_weights.get(term)
+                if weights is None:
+                    weights = term_weights[term] = self._term_weights(term)
+                for number, weight in weights:
+                    scores[number] = scores.get(number, 0.0) + weight
+            results.append(self._top_hits(scores, top_k))
+        return results
+
+    def _term_weights(self, term: str) -> list[tuple[int, float]]:
+        """BM25 contribution of a term to each document containing it."""
+        postings = self._postings.get(term)
+        if not postings:
+            return []
+        doc_count = len(self._doc_numbers)
+        average_length = self._total_length / doc_count or 1.0
+        k1, b = self.k1, self.b
+        idf = bm25_idf(doc_count, len(postings))
+        weights = []
+        for number, frequency in postings.items():
+            norm = k1 * (1 - b + b * self._doc_lengths[number] / average_length)
+            weights.append((number, idf * frequency * (k1 + 1) / (frequency + norm)))
+        return weights
+
+    def _top_hits(self, scores: dict[int, float], top_k: int) -> list[SearchHit]:
+        """Select the best-scoring documents; ties keep insertion order."""
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [SearchHit(self._doc_ids[number], score) for number, score in best]
@@ -0,0 +1,102 @@
+"""Result packing - fit ranked search results into a token budget."""
+
+import re
+from typing import Sequence
+
+from agent.knowledge.tokenizer import tokenize
+
+_CJK_PATTERN = re.compile(r"[　-ヿ㐀-䶿一-鿿豈-﫿＀-￯]")
+
+
+def _char_cost(char: str) -> float:
+    """Approximate token cost of a single character."""
+    # Japanese characters are roughly one token each; other text ~4 chars per token
+    return 1.0 if _CJK_PATTERN.match(char) else 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text without a tokenizer.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate token count
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text so that its estimated size fits max_tokens.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        The text itself if it fits, otherwise a prefix ending in "..."
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - 1  # Room for the ellipsis
+    cost = 0.0
+    for position, char in enumerate(text):
+        cost += _char_cost(char)
+        if cost > budget:
+            return text[:position].rstrip() + "..."
+    return text
+
+
+def _similarity(a: set[str], b: set[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_results(
+    results: Sequence[str],
+    token_budget: int,
+    duplicate_threshold: float = 0.8,
+) -> list[str]:
+    """Select ranked results that fit a token budget.
+
+    Results are taken in the given (score) order. A result whose token set
+    overlaps an already selected one by at least duplicate_threshold
+    (Jaccard) is dropped as a near-duplicate. Results that don't fit the
+    remaining budget are skipped so smaller, lower-ranked ones can still
+    be included. If even the best result exceeds the budget, it is
+    truncated rather than returning nothing.
+
+    Args:
+        results: Formatted results, best first
+        token_budget: Maximum estimated tokens for all selected results
+        duplicate_threshold: Similarity at or above which results are duplicates
+
+    Returns:
+        Selected results in score order
+    """
+    selected: list[str] = []
+    selected_tokens: list[set[str]] = []
+    remaining = token_budget
+
+    for result in results:
+        tokens = set(tokenize(result))
+        if any(_similarity(tokens, other) >= duplicate_threshold for other in selected_tokens):
+            continue
+
+        cost = estimate_tokens(result)
+        if cost > remaining:
+            if selected:
+                continue
+            result = truncate_to_tokens(result, remaining)
+            cost = estimate_tokens(result)
+
+        selected.append(result)
+        selected_tokens.append(tokens)
+        remaining -= cost
+        if remaining <= 0:
+            break
+
+    return selected
@@ -0,0 +1,366 @@
+"""Index snapshots - compact on-disk form of the passage index.
+
+A snapshot stores the BM25 term dictionary, array-backed postings, document
+lengths and passage texts for one knowledge commit. It is opened with mmap,
+so a new process can answer queries without reading or tokenizing the
+corpus; only the pages touched by a query are loaded from disk.
+
+Layout (native byte order, recorded in the header; sections 8-byte aligned):
+
+    header          magic, format version, byte order, revision (length and
+                    up to 64 ASCII bytes), BM25 params,
+                    counts and (offset, length) of each section below
+    term_offsets    u64[n_terms + 1] - offsets into term_blob
+    term_blob       UTF-8 terms, sorted by their encoded bytes
+    posting_offsets u64[n_terms + 1] - ranges into posting_docs/posting_freqs
+    posting_docs    u32[n_postings] - document numbers
+    posting_freqs   u32[n_postings] - term frequencies
+    doc_lengths     u32[n_docs]
+    string_offsets  u64[4 * n_docs + 1] - offsets into string_blob
+    string_blob     UTF-8 passage id, path, heading and text per document
+    catalog         UTF-8 JSON file catalog (document titles, headings and
+                    sizes; other file paths), or empty if not stored
+
+The catalog lets a new process outline and list the knowledge base
+without reading the corpus either.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, Optional
+
+from agent.knowledge.catalog import CatalogEntry
+from agent.knowledge.chunker import Passage
+from agent.knowledge.index import BM25Index, bm25_idf
+
+MAGIC = b"PAMKIDX\x00"
+FORMAT_VERSION = 3
+
+_SECTIONS = (
+    "term_offsets",
+    "term_blob",
+    "posting_offsets",
+    "posting_docs",
+    "posting_freqs",
+    "doc_lengths",
+    "string_offsets",
+    "string_blob",
+    "catalog",
+)
+_MAX_REVISION = 64  # SHA-256 object ids; SHA-1 ids and folder fingerprints are shorter
+_HEADER = struct.Struct(f"=8sI1sB{_MAX_REVISION}sddIIQ" + "QQ" * len(_SECTIONS))
+_PASSAGE_FIELDS = 4  # id, path, heading, text
+_BYTE_ORDER = b"L" if sys.byteorder == "little" else b"B"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or incompatible."""
+
+
+def _pad(length: int) -> int:
+    """Return the number of padding bytes to reach 8-byte alignment."""
+    return -length % 8
+
+
+def write_snapshot(
+    path: Path,
+    index: BM25Index,
+    passages: Mapping[str, Passage],
+    revision: Optional[str],
+    catalog: Optional[tuple[Iterable[CatalogEntry], Iterable[str]]] = None,
+) -> None:
+    """Write an index and its passages to a snapshot file.
+
+    The file is written next to the target and moved into place, so readers
+    never see a partial snapshot.
+
+    Args:
+        path: Destination file
+        index: Index whose documents are passage ids
+        passages: Passages by id, for every document in the index
+        revision: Commit SHA the index was built from
+        catalog: Complete file catalog of the revision, as (document entries,
+            other file paths); omitted if None
+
+    Raises:
+        ValueError: If the revision is longer than 64 ASCII characters
+    """
+    encoded_revision = (revision or "").encode("ascii")
+    if len(encoded_revision) > _MAX_REVISION:
+        raise ValueError(f"Revision {revision!r} is longer than {_MAX_REVISION} characters")
+
+    documents = list(index.documents())
+    numbers = {doc_id: number for number, (doc_id, _) in enumerate(documents)}
+
+    terms = sorted(index.postings(), key=lambda item: item[0].encode("utf-8"))
+    term_offsets, posting_offsets = array("Q", [0]), array("Q", [0])
+    posting_docs, posting_freqs = array("I"), array("I")
+    term_blob = bytearray()
+    for term, postings in terms:
+        term_blob += term.encode("utf-8")
+        term_offsets.append(len(term_blob))
+        for number, frequency in sorted((numbers[doc_id], tf) for doc_id, tf in postings.items()):
+            posting_docs.append(number)
+            posting_freqs.append(frequency)
+        posting_offsets.append(len(posting_docs))
+
+    string_offsets = array("Q", [0])
+    string_blob = bytearray()
+    for doc_id, _ in documents:
+        passage = passages[doc_id]
+        for field in (passage.id, passage.path, passage.heading, passage.text):
+            string_blob += field.encode("utf-8")
+            string_offsets.append(len(string_blob))
+
+    sections = {
+        "term_offsets": term_offsets.tobytes(),
+        "term_blob": bytes(term_blob),
+        "posting_offsets": posting_offsets.tobytes(),
+        "posting_docs": posting_docs.tobytes(),
+        "posting_freqs": posting_freqs.tobytes(),
+        "doc_lengths": array("I", (length for _, length in documents)).tobytes(),
+        "string_offsets": string_offsets.tobytes(),
+        "string_blob": bytes(string_blob),
+        "catalog": b"" if catalog is None else _encode_catalog(*catalog),
+    }
+
+    layout = []
+    offset = _HEADER.size + _pad(_HEADER.size)
+    for name in _SECTIONS:
+        layout.extend((offset, len(sections[name])))
+        offset += len(sections[name]) + _pad(len(sections[name]))
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        _BYTE_ORDER,
+        len(encoded_revision),
+        encoded_revision,
+        index.k1,
+        index.b,
+        len(terms),
+        len(documents),
+        index.total_length,
+        *layout,
+    )
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(temp_path, "wb") as f:
+        f.write(header + b"\0" * _pad(len(header)))
+        for name in _SECTIONS:
+            data = sections[name]
+            f.write(data + b"\0" * _pad(len(data)))
+    os.replace(temp_path, path)
+
+
+def _encode_catalog(documents: Iterable[CatalogEntry], assets: Iterable[str]) -> bytes:
+    """Serialize a file catalog for the catalog section."""
+    return json.dumps(
+        {
+            "documents": [[entry.path, entry.title, list(entry.headings), entry.size] for entry in documents],
+            "assets": sorted(assets),
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class SnapshotIndex:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Supports the same BM25 ranking as BM25Index without materializing the
+    postings. Use to_index() to obtain a mutable index for incremental
+    updates.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Open a snapshot.
+
+        Args:
+            path: Snapshot file
+
+        Raises:
+            SnapshotError: If the file is missing, corrupt or of another format version
+        """
+        self.path = Path(path)
+        try:
+            self._file = open(self.path, "rb")
+        except OSError as e:
+            raise SnapshotError(f"Cannot open index snapshot {self.path}: {e}") from e
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._load_header()
+        except (ValueError, struct.error, SnapshotError) as e:
+            self._file.close()
+            raise SnapshotError(f"Invalid index snapshot {self.path}: {e}") from e
+
+    def _load_header(self) -> None:
+        """Parse the header and create views over each section."""
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError("file too short")
+        fields = _HEADER.unpack_from(self._mmap, 0)
+        magic, version, byte_order, revision_length, revision, k1, b, n_terms, n_docs, total_length = fields[:10]
+        if magic != MAGIC:
+            raise SnapshotError("bad magic number")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"format version {version}, expected {FORMAT_VERSION}")
+        if byte_order != _BYTE_ORDER:
+            raise SnapshotError("written on a platform with different byte order")
+
+        self.revision: Optional[str] = revision[:revision_length].decode("ascii") or None
+        self.k1, self.b = k1, b
+        self._n_terms, self._n_docs, self._total_length = n_terms, n_docs, total_length
+
+        buffer = memoryview(self._mmap)
+        layout = fields[10:]
+        self._views: dict[str, memoryview] = {}
+        for i, name in enumerate(_SECTIONS):
+            offset, length = layout[2 * i], layout[2 * i + 1]
+            if offset + length > len(self._mmap):
+                buffer.release()
+                raise SnapshotError(f"section {name} out of bounds")
+            self._views[name] = buffer[offset:offset + length]
+        buffer.release()
+
+        self._term_offsets = self._views["term_offsets"].cast("Q")
+        self._term_blob = self._views["term_blob"]
+        self._posting_offsets = self._views["posting_offsets"].cast("Q")
+        self._posting_docs = self._views["posting_docs"].cast("I")
+        self._posting_freqs = self._views["posting_freqs"].cast("I")
+        self._doc_lengths = self._views["doc_lengths"].cast("I")
+        self._string_offsets = self._views["string_offsets"].cast("Q")
+        self._string_blob = self._views["string_blob"]
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def __enter__(self) -> "SnapshotIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        if self._mmap.closed:
+            return
+        for view in (
+            self._term_offsets,
+            self._posting_offsets,
+            self._posting_docs,
+            self._posting_freqs,
+            self._doc_lengths,
+            self._string_offsets,
+            *self._views.values(),
+        ):
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _term(self, number: int) -> bytes:
+        """Return the encoded term with the given dictionary position."""
+        return bytes(self._term_blob[self._term_offsets[number]:self._term_offsets[number + 1]])
+
+    def _find_term(self, term: str) -> Optional[int]:
+        """Binary-search the sorted term dictionary."""
+        target = term.encode("utf-8")
+        low, high = 0, self._n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._n_terms and self._term(low) == target:
+            return low
+        return None
+
+    def _string(self, number: int, field: int) -> str:
+        """Decode one stored passage field."""
+        position = number * _PASSAGE_FIELDS + field
+        start, end = self._string_offsets[position], self._string_offsets[position + 1]
+        return str(self._string_blob[start:end], "utf-8")
+
+    def passage(self, number: int) -> Passage:
+        """Return the passage stored for a document number."""
+        return Passage(*(self._string(number, field) for field in range(_PASSAGE_FIELDS)))
+
+    def catalog(self) -> Optional[tuple[list[CatalogEntry], list[str]]]:
+        """Return the stored file catalog.
+
+        Returns:
+            (document entries, other file paths), or None if the snapshot has no catalog
+        """
+        data = self._views["catalog"]
+        if not len(data):
+            return None
+        catalog = json.loads(str(data, "utf-8"))
+        documents = [
+            CatalogEntry(path, title, tuple(headings), size)
+            for path, title, headings, size in catalog["documents"]
+        ]
+        return documents, catalog["assets"]
+
+    def passages(self) -> Iterator[Passage]:
+        """Iterate over all stored passages in document order."""
+        for number in range(self._n_docs):
+            yield self.passage(number)
+
+    def search_passages(self, query_tokens: Iterable[str], top_k: int = 10) -> list[tuple[Passage, float]]:
+        """Rank stored passages against query terms with BM25.
+
+        Args:
+            query_tokens: Query tokens (same tokenizer as the snapshot was built with)
+            top_k: Maximum number of passages to return
+
+        Returns:
+            (passage, score) pairs sorted by descending score
+        """
+        if self._n_docs == 0 or top_k <= 0:
+            return []
+
+        average_length = self._total_length / self._n_docs or 1.0
+        k1, b = self.k1, self.b
+        scores: dict[int, float] = {}
+
+        for term in set(query_tokens):
+            position = self._find_term(term)
+            if position is None:
+                continue
+            start, end = self._posting_offsets[position], self._posting_offsets[position + 1]
+            idf = bm25_idf(self._n_docs, end - start)
+            for i in range(start, end):
+                number, frequency = self._posting_docs[i], self._posting_freqs[i]
+                norm = k1 * (1 - b + b * self._doc_lengths[number] / average_length)
+                scores[number] = scores.get(number, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.passage(number), score) for number, score in best]
+
+    def to_index(self, index: Optional[BM25Index] = None) -> BM25Index:
+        """Materialize the snapshot into a mutable BM25Index.
+
+        Args:
+            index: Empty index to fill (defaults to a new BM25Index with the snapshot's parameters)
+
+        Returns:
+            Index whose document ids are passage ids
+        """
+        if index is None:
+            index = BM25Index(k1=self.k1, b=self.b)
+        frequencies: list[dict[str, int]] = [{} for _ in range(self._n_docs)]
+        for position in range(self._n_terms):
+            term = self._term(position).decode("utf-8")
+            for i in range(self._posting_offsets[position], self._posting_offsets[position + 1]):
+                frequencies[self._posting_docs[i]][term] = self._posting_freqs[i]
+        for number, doc_frequencies in enumerate(frequencies):
+            index.add_frequencies(self._string(number, 0), doc_frequencies)
+        return index
@@ -0,0 +1,76 @@
+"""Tokenizer for mixed Japanese and English knowledge text."""
+
+import re
+import unicodedata
+from typing import Sequence
+
+# Text is NFKC-normalized and lowercased before matching, so full-width
+# Latin letters and half-width katakana fold into the ranges below.
+_TOKEN_PATTERN = re.compile(
+    r"(?P<word>[0-9a-zÀ-ɏ]+)"
+    r"|(?P<kanji>[㐀-䶿一-鿿豈-﫿々〆ヶ]+)"
+    r"|(?P<katakana>[ァ-ヺー-ヿ]+)"
+    r"|(?P<hiragana>[ぁ-ゖゝゞ]+)"
+)
+
+DEFAULT_NGRAM_SIZES: tuple[int, ...] = (2,)
+
+
+def normalize(text: str) -> str:
+    """Normalize text for matching.
+
+    Applies NFKC (folds full-width/half-width variants) and lowercases.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def ngrams(run: str, sizes: Sequence[int]) -> list[str]:
+    """Generate character n-grams for a run of CJK characters.
+
+    Args:
+        run: Contiguous characters of a single script
+        sizes: N-gram sizes to emit
+
+    Returns:
+        N-grams in order of size, then position. A run shorter than the
+        smallest size is returned as a single token.
+    """
+    if len(run) < min(sizes):
+        return [run]
+    return [run[i:i + n] for n in sizes for i in range(len(run) - n + 1)]
+
+
+def tokenize(text: str, ngram_sizes: Sequence[int] = DEFAULT_NGRAM_SIZES) -> list[str]:
+    """Split mixed Japanese and English text into index terms.
+
+    Latin letters and digits become word tokens. Japanese text has no
+    spaces, so it is split into runs of kanji, katakana and hiragana, and
+    each run is expanded into character n-grams. Splitting at script
+    boundaries keeps particles such as "の" from gluing words together;
+    single hiragana characters are dropped as they are almost always
+    particles.
+
+    Args:
+        text: Text to tokenize
+        ngram_sizes: Character n-gram sizes used for Japanese runs
+
+    Returns:
+        List of tokens in document order
+    """
+    tokens: list[str] = []
+    for match in _TOKEN_PATTERN.finditer(normalize(text)):
+        kind = match.lastgroup
+        run = match.group()
+        if kind == "word":
+            tokens.append(run)
+        elif kind == "hiragana" and len(run) == 1:
+            continue
+        else:
+            tokens.extend(ngrams(run, ngram_sizes))
+    return tokens
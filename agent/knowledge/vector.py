@@ -0,0 +1,245 @@
+"""HashedTfidfIndex - Vectorized TF-IDF ranking over hashed features.
+
+Requires NumPy. Import errors surface when an index is created, so the
+rest of the knowledge package works without it.
+"""
+
+import math
+import zlib
+from typing import Callable, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from agent.knowledge.index import SearchHit
+from agent.knowledge.tokenizer import tokenize
+
+DEFAULT_FEATURES = 2 ** 18
+
+# Score matrix entries (queries x documents) per search_batch block
+BATCH_CELLS = 2 ** 22
+
+
+def _hash(feature: str) -> int:
+    """Stable (process-independent) hash of a feature string."""
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+class HashedTfidfIndex:
+    """Passage vectors as a sparse TF-IDF matrix with hashed features.
+
+    Tokens (see agent.knowledge.tokenizer) are hashed into a fixed number
+    of feature columns, so no vocabulary is kept. Latin words also
+    contribute character n-grams, so inflections and compounds such as
+    "invoices" / "invoice" or "multi-factor" / "factor" still overlap.
+    Japanese text already arrives as character bigrams.
+
+    Vectors are stored L2-normalized in feature-major (CSC) order in three
+    contiguous arrays. A query gathers the columns of its own features and
+    accumulates cosine scores for all passages with one bincount; the top
+    k come from argpartition. Documents can be added and removed at any
+    time; the matrix is rebuilt lazily on the next search.
+    Pure processing class - callers are responsible for loading the text.
+    """
+
+    def __init__(
+        self,
+        n_features: int = DEFAULT_FEATURES,
+        tokenizer: Callable[[str], list[str]] = tokenize,
+        subword_size: Optional[int] = 3,
+        subword_weight: float = 0.5,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            n_features: Number of hashed feature columns
+            tokenizer: Function splitting documents and queries into terms
+            subword_size: Character n-gram size for Latin words (None to disable)
+            subword_weight: Total weight of a word's n-grams relative to the word itself
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("HashedTfidfIndex requires numpy (pip install numpy)")
+        self.n_features = n_features
+        self.tokenizer = tokenizer
+        self.subword_size = subword_size
+        self.subword_weight = subword_weight
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._documents
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the document vectors and the assembled matrix."""
+        vectors = sum(columns.nbytes + weights.nbytes for columns, weights in self._documents.values())
+        matrix = self._idf.nbytes + self._column_offsets.nbytes + self._column_rows.nbytes
+        return vectors + matrix + self._column_values.nbytes
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        self._documents: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._dirty = True
+        self._doc_ids: list[str] = []
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._column_offsets = np.zeros(1, dtype=np.int64)
+        self._column_rows = np.zeros(0, dtype=np.int32)
+        self._column_values = np.zeros(0, dtype=np.float32)
+
+    def features(self, tokens: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Hash tokens into a sparse term-frequency vector.
+
+        Args:
+            tokens: Terms from the tokenizer
+
+        Returns:
+            (feature columns, weights) with unique, sorted columns
+        """
+        columns: list[int] = []
+        weights: list[float] = []
+        size = self.subword_size
+        for token in tokens:
+            columns.append(_hash(token))
+            weights.append(1.0)
+            if size and token.isascii() and len(token) > size:
+                marked = f"<{token}>"
+                grams = [marked[i:i + size] for i in range(len(marked) - size + 1)]
+                share = self.subword_weight / len(grams)
+                for gram in grams:
+                    columns.append(_hash("#" + gram))  # Own namespace, apart from whole words
+                    weights.append(share)
+        if not columns:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        unique, inverse = np.unique(np.array(columns, dtype=np.int64) % self.n_features, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.array(weights), minlength=len(unique))
+        return unique, totals.astype(np.float32)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Add or replace a document.
+
+        Args:
+            doc_id: Unique document identifier
+            text: Document text
+        """
+        self.add_tokens(doc_id, self.tokenizer(text))
+
+    def add_tokens(self, doc_id: str, tokens: Sequence[str]) -> None:
+        """Add or replace a document from pre-tokenized terms."""
+        self._documents[doc_id] = self.features(tokens)
+        self._dirty = True
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document if present."""
+        if self._documents.pop(doc_id, None) is not None:
+            self._dirty = True
+
+    def _build(self) -> None:
+        """Assemble the normalized TF-IDF matrix in feature-major order."""
+        self._doc_ids = list(self._documents)
+        vectors = list(self._documents.values())
+        lengths = np.array([len(columns) for columns, _ in vectors], dtype=np.int64)
+        columns = np.concatenate([c for c, _ in vectors]) if vectors else np.zeros(0, dtype=np.int64)
+        values = np.concatenate([v for _, v in vectors]) if vectors else np.zeros(0, dtype=np.float32)
+        rows = np.repeat(np.arange(len(vectors), dtype=np.int32), lengths)
+
+        # Smoothed IDF: ln((1 + n) / (1 + df)) + 1
+        document_frequency = np.bincount(columns, minlength=self.n_features)
+        self._idf = (np.log((1 + len(vectors)) / (1 + document_frequency)) + 1).astype(np.float32)
+        values = values * self._idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(vectors)))
+        values = values / np.where(norms > 0, norms, 1.0)[rows]
+
+        order = np.argsort(columns, kind="stable")
+        self._column_rows = rows[order]
+        self._column_values = values[order].astype(np.float32)
+        self._column_offsets = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=self._column_offsets[1:])
+        self._dirty = False
+
+    def search(self, query: str, top_k: int = 10) -> list[SearchHit]:
+        """Rank documents by cosine similarity to a query.
+
+        Args:
+            query: Search query
+            top_k: Maximum number of hits to return
+
+        Returns:
+            Hits sorted by descending score; documents sharing no feature are omitted
+        """
+        return self.search_tokens(self.tokenizer(query), top_k)
+
+    def search_tokens(self, tokens: Iterable[str], top_k: int = 10) -> list[SearchHit]:
+        """Rank documents against pre-tokenized query terms."""
+        return self.search_batch([tokens], top_k)[0]
+
+    def search_batch(self, queries: Iterable[Iterable[str]], top_k: int = 10) -> list[list[SearchHit]]:
+        """Rank documents against many pre-tokenized queries.
+
+        Queries are scored in blocks: the gathered columns of every query in
+        a block go through a single bincount into a (queries x documents)
+        score matrix, so per-query overhead is paid once per block. Blocks
+        are sized to keep the matrix under BATCH_CELLS entries.
+
+        Args:
+            queries: Token lists, one per query
+            top_k: Maximum number of hits per query
+
+        Returns:
+            Hits per query, in query order, each sorted by descending score
+        """
+        queries = list(queries)
+        if self._dirty:
+            self._build()
+        n_docs = len(self._doc_ids)
+        if not n_docs or top_k <= 0:
+            return [[] for _ in queries]
+
+        results: list[list[SearchHit]] = []
+        block_size = max(1, BATCH_CELLS // n_docs)
+        for start in range(0, len(queries), block_size):
+            block = queries[start:start + block_size]
+            cells, weights = [], []
+            for slot, tokens in enumerate(block):
+                rows, values = self._gather(tokens)
+                cells.append(rows + slot * n_docs)
+                weights.append(values)
+            scores = np.bincount(
+                np.concatenate(cells),
+                weights=np.concatenate(weights),
+                minlength=len(block) * n_docs,
+            ).reshape(len(block), n_docs)
+            results.extend(self._top_hits(row, top_k) for row in scores)
+        return results
+
+    def _gather(self, tokens: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Return (document rows, weighted values) touched by a query."""
+        columns, weights = self.features(tokens)
+        if not len(columns):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        query = weights * self._idf[columns]
+        query /= math.sqrt(float(np.dot(query, query))) or 1.0
+
+        # Concatenate the query's columns into one gather index
+        starts = self._column_offsets[columns]
+        lengths = self._column_offsets[columns + 1] - starts
+        total = int(lengths.sum())
+        positions = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        rows = self._column_rows[positions].astype(np.int64)
+        return rows, self._column_values[positions] * np.repeat(query, lengths)
+
+    def _top_hits(self, scores: np.ndarray, top_k: int) -> list[SearchHit]:
+        """Select the best-scoring documents of one query."""
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            best = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            # Keep everything tied with the k-th score so ties resolve by insertion order
+            candidates = candidates[scores[candidates] >= scores[candidates[best]].min()]
+        ranked = sorted(candidates.tolist(), key=lambda number: (-scores[number], number))[:top_k]
+        return [SearchHit(self._doc_ids[number], float(scores[number])) for number in ranked]
@@ -1,10 +1,63 @@
 """WikiKnowledgeSource - File I/O operations for repository knowledge files."""
 
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 
 import git
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from agent import telemetry
+from agent.knowledge.cache import FileCache
+from agent.knowledge.executor import run_blocking
+
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def _is_sha(name: str) -> bool:
+    """Whether a name is a full SHA-1 or SHA-256 commit id."""
+    return len(name) in (40, 64) and set(name) <= _HEX_DIGITS
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """Files under the knowledge directory that changed between two commits.
+    
+    Paths are relative to the knowledge directory, like list_files().
+    """
+    
+    before: Optional[str]
+    after: Optional[str]
+    added: tuple[Path, ...] = ()
+    modified: tuple[Path, ...] = ()
+    deleted: tuple[Path, ...] = ()
+    renamed: tuple[tuple[Path, Path], ...] = ()
+    
+    @property
+    def is_empty(self) -> bool:
+        """True if no knowledge file changed."""
+        return not (self.added or self.modified or self.deleted or self.renamed)
+    
+    def removed_paths(self) -> list[Path]:
+        """Paths whose previous content must be dropped (deleted or renamed away)."""
+        return [*self.deleted, *(old for old, _ in self.renamed)]
+    
+    def updated_paths(self) -> list[Path]:
+        """Paths whose current content must be (re)loaded."""
+        return [*self.added, *self.modified, *(new for _, new in self.renamed)]
+
 
 class WikiKnowledgeSource:
     """Provides file I/O operations for knowledge files in a repository.
@@ -12,33 +65,469 @@ class WikiKnowledgeSource:
     Manages files stored in a specified directory within a repository.
     Handles cloning/updating repository and provides file access operations.
     No search logic - only data access.
+    
+    Synchronization follows stale-while-revalidate: once a local snapshot
+    exists, ensure_fresh() never waits on the network. When the snapshot is
+    older than the freshness window, a single background refresh is started
+    and callers keep reading the last good snapshot until it completes.
+    
+    Async variants (a-prefixed) run the same operations on a bounded
+    executor so callers on an event loop are never blocked by git or disk.
+    
+    Refreshes are single-flight: within a process concurrent sync() calls
+    share one clone_or_update(), and across processes using the same
+    local_path a file lock lets exactly one of them fetch. local_path is a
+    symlink to an immutable per-commit checkout; a refresh prepares the
+    new checkout next to it and flips the symlink, so readers see either
+    the previous tree or the new one, never a half-updated mix. On disk:
+    
+        .<name>.store/      clone without working tree; fetches happen here
+        .<name>.snapshots/  one sparse worktree of the store per commit
+        .<name>.lock        refresh lock shared by all processes
+        <name>              symlink to the current snapshot
+    
+    Several sources can share one store (store_path), e.g. for different
+    refs or knowledge directories of the same repository: objects are then
+    fetched once and each source checks out its own sparse snapshots. A
+    second lock next to the store serializes their fetches and checkouts.
     """
     
-    def __init__(self, repo_url: str, knowledge_dir: str, local_path: Path) -> None:
+    # Snapshots kept after a switch: the current one and its predecessor,
+    # which readers that resolved the old tree may still be walking
+    KEEP_SNAPSHOTS = 2
+    
+    def __init__(
+        self,
+        repo_url: str,
+        knowledge_dir: str,
+        local_path: Path,
+        freshness_seconds: float = 300.0,
+        clone_depth: Optional[int] = 1,
+        sparse: bool = True,
+        executor: Optional[Executor] = None,
+        file_cache: Optional[FileCache] = None,
+        ref: Optional[str] = None,
+        store_path: Optional[Path] = None,
+    ) -> None:
         """Initialize WikiKnowledgeSource.
         
         Args:
             repo_url: Repository URL (e.g., 'https://github.com/user/repo')
             knowledge_dir: Directory path within repository containing knowledge files (e.g., 'docs', 'wiki')
             local_path: Local directory to clone/store repository
+            freshness_seconds: How long a synced snapshot is served before a background refresh
+            clone_depth: History depth fetched by the initial clone (None for full history)
+            sparse: Check out only knowledge_dir and fetch file contents lazily for it
+            executor: Executor for async variants (defaults to the shared knowledge I/O pool)
+            file_cache: Cache for loaded file contents (defaults to a private 64 MB cache)
+            ref: Branch to serve (defaults to the remote's default branch)
+            store_path: Store clone to use, possibly shared with other sources of the
+                same repository (defaults to .<name>.store next to local_path)
         """
         self.repo_url = repo_url
         self.knowledge_dir = knowledge_dir
         self.local_path = Path(local_path)
         self.knowledge_path = self.local_path / knowledge_dir
+        self.ref = ref
+        if store_path is None:
+            store_path = self.local_path.with_name(f".{self.local_path.name}.store")
+        self.store_path = Path(store_path)
+        self.store_lock_path = self.store_path.with_name(f"{self.store_path.name}.lock")
+        self.snapshots_path = self.local_path.with_name(f".{self.local_path.name}.snapshots")
+        self.lock_path = self.local_path.with_name(f".{self.local_path.name}.lock")
+        self.freshness_seconds = freshness_seconds
+        self.clone_depth = clone_depth
+        self.sparse = sparse
+        self.executor = executor
+        self.file_cache = file_cache if file_cache is not None else FileCache()
+        
+        # Changes pulled by the most recent clone_or_update()
+        self.last_changes: Optional[ChangeSet] = None
+        
+        # Sync bookkeeping (monotonic clock)
+        self.last_synced_at: Optional[float] = None
+        self.last_sync_error: Optional[Exception] = None
+        self._last_attempt_at: Optional[float] = None
+        self._sync_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        # (monotonic time, fingerprint) of a knowledge directory outside git
+        self._fingerprint: Optional[tuple[float, str]] = None
     
     def clone_or_update(self) -> None:
-        """Clone repository if not exists, otherwise pull latest changes."""
-        if not self.local_path.exists():
-            self.local_path.mkdir(parents=True, exist_ok=True)
-            git.Repo.clone_from(self.repo_url, self.local_path)
-        elif (self.local_path / ".git").exists():
-            repo = git.Repo(self.local_path)
-            repo.remotes.origin.pull()
+        """Fetch the latest commit and switch local_path to it.
+        
+        Holds the cross-process refresh lock. If another process held it,
+        that process has just refreshed, so its result is used instead of
+        fetching again. A local_path that is a plain git checkout (created
+        by older versions) is pulled in place; any other existing directory
+        is left untouched.
+        
+        Records the HEAD SHAs before and after the operation in last_changes.
+        A fresh clone has no previous SHA and lists no individual files.
+        """
+        legacy = not self.local_path.is_symlink() and self.local_path.exists()
+        if legacy and not (self.local_path / ".git").exists():
+            return
+        
+        with telemetry.span("wiki.clone_or_update") as span:
+            before = self.current_revision()
+            with self._interprocess_lock() as waited:
+                span.set("waited_for_lock", waited)
+                if not waited:
+                    if legacy:
+                        git.Repo(self.local_path).remotes.origin.pull()
+                    else:
+                        self._checkout_latest()
+            after = self.current_revision()
+            
+            changes = None if before is None else self.changes_between(before, after)
+            if changes is None:
+                # The cache may be shared with other sources (see agent.store)
+                self.file_cache.invalidate_under(self.local_path)
+                changes = ChangeSet(before, after)
+            else:
+                for path in [*changes.removed_paths(), *changes.updated_paths()]:
+                    self.file_cache.invalidate(self.knowledge_path / path)
+            self.last_changes = changes
+            span.set("revision", after or "")
+            span.add("files_changed", len(changes.removed_paths()) + len(changes.updated_paths()))
+    
+    @contextmanager
+    def _interprocess_lock(self, lock_path: Optional[Path] = None) -> Iterator[bool]:
+        """Hold the refresh lock shared by every process using local_path.
+        
+        flock() locks belong to the open file, so the lock also excludes
+        other threads of this process. Without fcntl (Windows) no locking
+        is done.
+        
+        Args:
+            lock_path: Lock file to hold instead (e.g. the store lock)
+        
+        Yields:
+            True if the lock was busy, i.e. another refresh just completed
+        """
+        lock_path = lock_path or self.lock_path
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            if fcntl is None:
+                yield False
+                return
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                waited = False
+            except BlockingIOError:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                waited = True
+            try:
+                yield waited
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _checkout_latest(self) -> None:
+        """Fetch into the store and publish the fetched commit; caller holds the lock."""
+        # Sources sharing the store must not fetch or add worktrees at the same time
+        with self._interprocess_lock(self.store_lock_path):
+            if (self.store_path / ".git").exists():
+                store = git.Repo(self.store_path)
+                if self.ref is None:
+                    store.remotes.origin.fetch()
+            else:
+                store = self._clone_store()
+            if self.ref is not None:
+                self._fetch_ref(store)
+            
+            revision = store.git.rev_parse(f"origin/{self.ref or 'HEAD'}")
+            if revision == self.current_revision():
+                return
+            
+            snapshot = self.snapshots_path / revision
+            self._remove_snapshot(store, snapshot)  # Leftover of an interrupted refresh
+            self._add_snapshot(store, snapshot, revision)
+            self._switch_to(snapshot)
+            self._prune_snapshots(store)
+    
+    def _fetch_ref(self, store: git.Repo) -> None:
+        """Fetch the configured branch, which a single-branch clone doesn't track."""
+        remote_ref = f"refs/remotes/origin/{self.ref}"
+        options = {}
+        try:
+            store.git.rev_parse("--verify", "--quiet", remote_ref)
+        except git.GitCommandError:
+            if self.clone_depth is not None:
+                options["depth"] = self.clone_depth  # First fetch of the branch: limit history like the clone
+        store.git.fetch("origin", f"+refs/heads/{self.ref}:{remote_ref}", **options)
+    
+    def _clone_store(self) -> git.Repo:
+        """Clone the repository without a working tree, limited by clone_depth and sparse settings.
+        
+        A sparse store uses a partial clone filter, so file contents are
+        only downloaded for what snapshots check out. Later fetches get
+        only new commits.
+        """
+        options = {"no_checkout": True}
+        if self.clone_depth is not None:
+            # Remote URLs (https://, file://) honor depth; plain local paths ignore it
+            options["depth"] = self.clone_depth
+        if self._is_sparse():
+            options["filter"] = "blob:none"
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        return git.Repo.clone_from(self.repo_url, self.store_path, **options)
+    
+    def _is_sparse(self) -> bool:
+        """Whether snapshots check out only knowledge_dir."""
+        return self.sparse and self.knowledge_dir not in ("", ".")
+    
+    def _add_snapshot(self, store: git.Repo, snapshot: Path, revision: str) -> None:
+        """Check out a commit into a new worktree of the store."""
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        store.git.worktree("add", "--no-checkout", "--detach", str(snapshot.absolute()), revision)
+        worktree = git.Repo(snapshot)
+        if self._is_sparse():
+            worktree.git.sparse_checkout("set", self.knowledge_dir)
+        worktree.git.checkout("--detach", revision)
+    
+    def _switch_to(self, snapshot: Path) -> None:
+        """Atomically point local_path at a snapshot.
+        
+        The new symlink is created under a temporary name and renamed over
+        local_path; rename(2) replaces the old link in one step.
+        """
+        link = self.local_path.with_name(f".{self.local_path.name}.link-{os.getpid()}")
+        if link.is_symlink():
+            link.unlink()
+        link.symlink_to(os.path.relpath(snapshot.absolute(), self.local_path.absolute().parent))
+        os.replace(link, self.local_path)
+    
+    def _prune_snapshots(self, store: git.Repo) -> None:
+        """Delete all but the newest KEEP_SNAPSHOTS snapshots."""
+        current = self.local_path.resolve()
+        snapshots = sorted(
+            (path for path in self.snapshots_path.iterdir() if path.resolve() != current),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for snapshot in snapshots[self.KEEP_SNAPSHOTS - 1:]:
+            self._remove_snapshot(store, snapshot)
+    
+    @staticmethod
+    def _remove_snapshot(store: git.Repo, snapshot: Path) -> None:
+        """Delete a snapshot directory and its worktree registration."""
+        if not snapshot.exists():
+            return
+        shutil.rmtree(snapshot, ignore_errors=True)
+        store.git.worktree("prune")
+    
+    def unshallow(self, depth: Optional[int] = None) -> None:
+        """Fetch more history for a shallow clone.
+        
+        Needed when diffs against commits older than the clone are required.
+        
+        Args:
+            depth: Number of additional commits to fetch, or None for full history
+        """
+        repo = git.Repo(self.local_path)
+        # Snapshots are worktrees; history lives in the shared repository
+        if not (Path(repo.common_dir) / "shallow").exists():
+            return
+        if depth is None:
+            repo.git.fetch("--unshallow")
+        else:
+            repo.git.fetch(f"--deepen={depth}")
+    
+    def changes_between(self, before: Optional[str], after: Optional[str]) -> Optional[ChangeSet]:
+        """List knowledge files changed between two commits.
+        
+        Args:
+            before: Older commit SHA
+            after: Newer commit SHA
+            
+        Returns:
+            ChangeSet for the knowledge directory, or None if either commit is
+            unknown locally (callers should fall back to a full rebuild)
+        """
+        if before is None or after is None or not (self.local_path / ".git").exists():
+            return None
+        if before == after:
+            return ChangeSet(before, after)
+        
+        repo = git.Repo(self.local_path)
+        try:
+            # -z keeps non-ASCII (e.g. Japanese) file names unquoted
+            output = repo.git.diff(
+                "--name-status", "-M", "-z", before, after, "--", self.knowledge_dir
+            )
+        except git.GitCommandError:
+            return None
+        
+        added, modified, deleted, renamed = [], [], [], []
+        fields = output.split("\0")
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i][0]
+            if status in ("R", "C"):
+                old, new = self._relative(fields[i + 1]), self._relative(fields[i + 2])
+                if status == "R":
+                    renamed.append((old, new))
+                else:
+                    added.append(new)
+                i += 3
+                continue
+            path = self._relative(fields[i + 1])
+            if status == "A":
+                added.append(path)
+            elif status == "D":
+                deleted.append(path)
+            else:
+                modified.append(path)
+            i += 2
+        
+        return ChangeSet(
+            before=before,
+            after=after,
+            added=tuple(added),
+            modified=tuple(modified),
+            deleted=tuple(deleted),
+            renamed=tuple(renamed),
+        )
+    
+    def _relative(self, repo_path: str) -> Path:
+        """Convert a repository-relative path to a knowledge-relative path."""
+        return Path(repo_path).relative_to(self.knowledge_dir)
+    
+    def has_snapshot(self) -> bool:
+        """Check whether a local copy of the knowledge directory exists."""
+        return self.knowledge_path.exists()
+    
+    def is_stale(self) -> bool:
+        """Check whether the freshness window has elapsed since the last sync attempt."""
+        if self._last_attempt_at is None:
+            return True
+        return time.monotonic() - self._last_attempt_at >= self.freshness_seconds
+    
+    def sync(self) -> None:
+        """Run clone_or_update() now, recording the outcome.
+        
+        Single-flight: if another thread is already syncing, wait for it
+        and share its outcome instead of starting a second refresh.
+        
+        Raises:
+            Exception: Whatever clone_or_update() raised
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            with self._sync_lock:
+                if self.last_sync_error is not None:
+                    raise self.last_sync_error
+                return
+        try:
+            self._last_attempt_at = time.monotonic()
+            try:
+                self.clone_or_update()
+            except Exception as e:
+                self.last_sync_error = e
+                raise
+            self.last_sync_error = None
+            self.last_synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+    
+    def refresh_in_background(self) -> bool:
+        """Start a background sync unless one is already running.
+        
+        Returns:
+            True if a new refresh was started
+        """
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            # Count the attempt immediately so concurrent callers don't queue more refreshes
+            self._last_attempt_at = time.monotonic()
+            self._refresh_thread = threading.Thread(
+                target=self._background_sync, name="wiki-sync", daemon=True
+            )
+            self._refresh_thread.start()
+            return True
+    
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> None:
+        """Block until the running background refresh (if any) finishes."""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def ensure_fresh(self) -> None:
+        """Make a snapshot available without waiting on the network when possible.
+        
+        The first call without any local snapshot syncs synchronously, since
+        there is nothing to serve yet. Afterwards a stale snapshot triggers a
+        background refresh and this method returns immediately.
+        """
+        if not self.has_snapshot():
+            self.sync()
+        elif self.is_stale():
+            self.refresh_in_background()
+    
+    def _background_sync(self) -> None:
+        """Thread target for refresh_in_background()."""
+        try:
+            self.sync()
+        except Exception:
+            pass  # Recorded in last_sync_error; keep serving the previous snapshot
+    
+    def current_revision(self) -> Optional[str]:
+        """Return the commit SHA currently checked out.
+        
+        Called before every search, so the common case is cheap: snapshots
+        are named after their commit, and the SHA is read from the
+        local_path symlink without opening the repository.
+        
+        A plain directory (not a git checkout) has no commit; a fingerprint
+        of its files' paths, mtimes and sizes stands in for one, so callers
+        can keep derived state until a file changes. It is recomputed at
+        most once per freshness window, like a repository is refreshed.
+        
+        Returns:
+            HEAD commit SHA, a directory fingerprint, or None if the
+            knowledge directory doesn't exist
+        """
+        if self.local_path.is_symlink():
+            revision = os.path.basename(os.readlink(self.local_path))
+            if _is_sha(revision) and self.local_path.exists():
+                return revision
+        if not (self.local_path / ".git").exists():
+            return self._directory_fingerprint()
+        try:
+            return git.Repo(self.local_path).head.commit.hexsha
+        except ValueError:
+            # Repository without any commit yet
+            return None
+    
+    def _directory_fingerprint(self) -> Optional[str]:
+        """Fingerprint the knowledge directory by file path, mtime and size."""
+        if not self.knowledge_path.exists():
+            return None
+        cached = self._fingerprint
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.freshness_seconds:
+            return cached[1]
+        
+        digest = hashlib.blake2b(digest_size=16)
+        for path in sorted(self.list_files()):
+            try:
+                stat = (self.knowledge_path / path).stat()
+            except FileNotFoundError:
+                continue  # Deleted since listing
+            digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode("utf-8"))
+        # Fits the 40-character revision field of index snapshots
+        fingerprint = f"dir-{digest.hexdigest()}"
+        self._fingerprint = (now, fingerprint)
+        return fingerprint
     
     def load_file(self, path: Path) -> str:
         """Load file contents by path.
         
+        Contents are served from the file cache while the file's mtime and
+        size are unchanged.
+        
         Args:
             path: Path to file relative to knowledge directory or absolute path
             
@@ -48,12 +537,22 @@ class WikiKnowledgeSource:
         Raises:
             FileNotFoundError: If file doesn't exist
         """
+        return self.file_cache.load(self._resolve(path), self._read_text)
+    
+    def _resolve(self, path: Path) -> Path:
+        """Resolve a knowledge-relative path to an absolute one."""
         if path.is_absolute():
-            file_path = path
-        else:
-            file_path = self.knowledge_path / path
-            
-        return file_path.read_text(encoding='utf-8')
+            return path
+        return self.knowledge_path / path
+    
+    @staticmethod
+    def _read_text(file_path: Path) -> str:
+        """Read a file from disk."""
+        data = file_path.read_bytes()
+        span = telemetry.current()
+        span.add("files_read")
+        span.add("bytes_read", len(data))
+        return data.decode('utf-8')
     
     def list_files(self) -> List[Path]:
         """List all files in the knowledge directory.
@@ -64,10 +563,28 @@ class WikiKnowledgeSource:
         if not self.knowledge_path.exists():
             return []
             
-        files = []
-        for file_path in self.knowledge_path.rglob("*"):
-            if file_path.is_file() and not file_path.name.startswith('.'):
-                relative_path = file_path.relative_to(self.knowledge_path)
-                files.append(relative_path)
+        with telemetry.span("wiki.list_files") as span:
+            files = []
+            for file_path in self.knowledge_path.rglob("*"):
+                if file_path.is_file() and not file_path.name.startswith('.'):
+                    relative_path = file_path.relative_to(self.knowledge_path)
+                    files.append(relative_path)
+            span.add("files_scanned", len(files))
         
         return files
+    
+    async def aclone_or_update(self) -> None:
+        """Async variant of clone_or_update()."""
+        await run_blocking(self.clone_or_update, executor=self.executor)
+    
+    async def aensure_fresh(self) -> None:
+        """Async variant of ensure_fresh()."""
+        await run_blocking(self.ensure_fresh, executor=self.executor)
+    
+    async def aload_file(self, path: Path) -> str:
+        """Async variant of load_file()."""
+        return await run_blocking(self.load_file, path, executor=self.executor)
+    
+    async def alist_files(self) -> List[Path]:
+        """Async variant of list_files()."""
+        return await run_blocking(self.list_files, executor=self.executor)
@@ -0,0 +1,181 @@
+"""Lazily imported agent tools.
+
+The general-purpose tools from strands_tools (calculator pulls in SymPy,
+http_request pulls in requests and rich) make up a large share of process
+import time, yet most support conversations never call them. LazyTool
+registers such a tool under its real name and imports the implementation
+on first invocation.
+
+The model still needs each tool's spec on every call. A spec cache written
+at image build time (see agent.prefetch) provides it without importing the
+tool; without a cache the module is imported the first time the spec is
+requested.
+"""
+
+import importlib
+import json
+import os
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Optional
+
+from strands.tools.tools import PythonAgentTool
+from strands.types.tools import AgentTool, ToolGenerator, ToolSpec, ToolUse
+
+from agent import telemetry
+from agent.knowledge.executor import run_blocking
+
+# Tools registered with every SupportAgent: name -> module defining it
+BUILTIN_TOOLS = {
+    "calculator": "strands_tools.calculator",
+    "http_request": "strands_tools.http_request",
+}
+
+_SPEC_DISTRIBUTION = "strands-agents-tools"
+
+
+def _import_tool(module_name: str, name: str) -> AgentTool:
+    """Import a tool defined with @tool or as a module with TOOL_SPEC.
+
+    Raises:
+        ImportError: If the module can't be imported
+        ValueError: If the module doesn't define the tool
+    """
+    module = importlib.import_module(module_name)
+    candidate = getattr(module, name, None)
+    if isinstance(candidate, AgentTool):
+        return candidate
+    if callable(candidate) and hasattr(module, "TOOL_SPEC"):
+        return PythonAgentTool(name, module.TOOL_SPEC, candidate)
+    raise ValueError(f"Module {module_name} does not define tool {name!r}")
+
+
+class LazyTool(AgentTool):
+    """Agent tool whose implementation is imported on first use.
+
+    Registration only needs the name. The spec is served from the given
+    cached spec, or loaded with the tool when none was given.
+    """
+
+    def __init__(self, name: str, module: str, spec: Optional[ToolSpec] = None) -> None:
+        """Initialize the tool without importing it.
+
+        Args:
+            name: Tool name, as defined by the module
+            module: Module defining the tool (e.g. "strands_tools.calculator")
+            spec: Cached tool spec (None to load it from the module when needed)
+        """
+        super().__init__()
+        self._name = name
+        self._module = module
+        self._spec = spec
+        self._tool: Optional[AgentTool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tool_name(self) -> str:
+        return self._name
+
+    @property
+    def tool_spec(self) -> ToolSpec:
+        if self._spec is not None:
+            return self._spec
+        return self.load().tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return "python"
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the implementation has been imported."""
+        return self._tool is not None
+
+    def load(self) -> AgentTool:
+        """Import the tool implementation (once).
+
+        Returns:
+            The underlying tool
+
+        Raises:
+            ImportError: If the module can't be imported
+            ValueError: If the module doesn't define the tool
+        """
+        with self._lock:
+            if self._tool is None:
+                with telemetry.span("tool.load", tool=self._name):
+                    self._tool = _import_tool(self._module, self._name)
+            return self._tool
+
+    async def stream(self, tool_use: ToolUse, invocation_state: dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        """Import the tool off the event loop if needed, then run it."""
+        tool = self._tool or await run_blocking(self.load)
+        async for event in tool.stream(tool_use, invocation_state, **kwargs):
+            yield event
+
+
+def _installed_version() -> Optional[str]:
+    """Version of the package providing the built-in tools, if installed."""
+    try:
+        return metadata.version(_SPEC_DISTRIBUTION)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def write_tool_specs(path: Path, tools: Optional[dict[str, str]] = None) -> None:
+    """Import tools once and cache their specs in a JSON file.
+
+    The file is written next to the target and moved into place, so readers
+    never see a partial cache.
+
+    Args:
+        path: Destination file
+        tools: Tool name -> module (defaults to BUILTIN_TOOLS)
+    """
+    specs = {
+        name: _import_tool(module, name).tool_spec
+        for name, module in (tools if tools is not None else BUILTIN_TOOLS).items()
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    temp_path.write_text(
+        json.dumps({"version": _installed_version(), "specs": specs}, ensure_ascii=False, indent=1),
+        encoding="utf-8",
+    )
+    os.replace(temp_path, path)
+
+
+def load_tool_specs(path: Path) -> dict[str, ToolSpec]:
+    """Read cached tool specs.
+
+    A cache written for a different version of the tool package is
+    ignored, so a stale spec never reaches the model.
+
+    Args:
+        path: File written by write_tool_specs()
+
+    Returns:
+        Specs by tool name; empty if the cache is missing, unreadable or stale
+    """
+    try:
+        cache = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != _installed_version():
+        return {}
+    return cache.get("specs") or {}
+
+
+def builtin_tools(spec_path: Optional[Path] = None) -> list[LazyTool]:
+    """Create lazy instances of the built-in tools.
+
+    Args:
+        spec_path: Spec cache written by write_tool_specs() (None to load specs on demand)
+
+    Returns:
+        One LazyTool per entry of BUILTIN_TOOLS
+    """
+    specs = load_tool_specs(spec_path) if spec_path is not None else {}
+    return [LazyTool(name, module, specs.get(name)) for name, module in BUILTIN_TOOLS.items()]
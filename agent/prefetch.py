@@ -0,0 +1,83 @@
+"""Build-time prefetch of the knowledge repository and its search index.
+
+Run while building the container image so a new container starts from a
+local clone and a ready index snapshot instead of cloning on the first
+tool call, and with cached tool specs so the general-purpose tools are not
+imported at startup (see agent.lazy_tools):
+
+    python -m agent.prefetch --snapshot /app/repo_data.index --tool-specs /app/tool_specs.json
+
+Repository settings default to the same AGENT_* environment variables the
+runtime reads.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.lazy_tools import write_tool_specs
+from agent.registry import AgentConfig
+from agent.tools import SupportAgentTools
+
+
+def prefetch(config: AgentConfig, snapshot_path: Path) -> str | None:
+    """Clone (or update) the repository and write its index snapshot.
+
+    Args:
+        config: Repository configuration
+        snapshot_path: Destination of the index snapshot
+
+    Returns:
+        Commit SHA the snapshot was built from
+    """
+    wiki_source = WikiKnowledgeSource(
+        config.repo_url, config.knowledge_dir, Path(config.local_path), ref=config.repo_ref
+    )
+    wiki_source.sync()
+    return SupportAgentTools(wiki_source).save_snapshot(snapshot_path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    env_config = AgentConfig.from_env()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo-url", default=env_config.repo_url)
+    parser.add_argument("--knowledge-dir", default=env_config.knowledge_dir)
+    parser.add_argument("--repo-ref", default=env_config.repo_ref or "", help="Branch (default branch if empty)")
+    parser.add_argument("--local-path", default=env_config.local_path)
+    parser.add_argument(
+        "--snapshot",
+        default=env_config.index_snapshot or f"{env_config.local_path}.index",
+        help="Index snapshot output path",
+    )
+    parser.add_argument(
+        "--tool-specs",
+        default=env_config.tool_specs,
+        help="Tool spec cache output path (omit to skip)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.tool_specs:
+        write_tool_specs(Path(args.tool_specs))
+        print(f"Tool specs written to {args.tool_specs}")
+
+    if not args.repo_url:
+        print("No repository URL configured; skipping knowledge prefetch.")
+        return 0
+
+    config = AgentConfig(
+        repo_url=args.repo_url,
+        knowledge_dir=args.knowledge_dir,
+        local_path=args.local_path,
+        repo_ref=args.repo_ref or None,
+    )
+    revision = prefetch(config, Path(args.snapshot))
+    branch = f"{config.repo_ref}:" if config.repo_ref else ""
+    print(f"Prefetched {args.repo_url} ({branch}{args.knowledge_dir}) at {revision} into {args.local_path}")
+    print(f"Index snapshot written to {args.snapshot}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
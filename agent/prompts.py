@@ -1,5 +1,9 @@
 """Prompt and model settings for the AWS Support Agent."""
 
+from typing import Optional
+
+from strands.types.content import SystemContentBlock
+
 # System prompt for AWS customer support agent
 SUPPORT_AGENT_SYSTEM_PROMPT = """You are a specialized support agent for AWS account management and Genu (generative AI platform). You help customers by:
 
@@ -121,10 +125,32 @@ You have access to documentation covering the following topics:
 ## Available Tools
 
 - search_wiki: Search through documentation and wiki files
-- list_wiki_files: List available documentation files
+- list_wiki_files: List documentation files with titles and section headings (filter by path prefix or text, paginated)
 
 Always search the documentation before providing any answer. Your responses must be grounded in the retrieved content."""
 
+
+def build_system_prompt(base_prompt: str, knowledge_outline: Optional[str] = None) -> list[SystemContentBlock]:
+    """Assemble the system prompt as content blocks ending in a prompt cache point.
+
+    The base prompt is fixed and the outline only changes with the
+    knowledge commit, so everything before the cache point can be served
+    from the Bedrock prompt cache across turns and conversations.
+
+    Args:
+        base_prompt: Instructions for the agent
+        knowledge_outline: Generated outline of the knowledge base, if any
+
+    Returns:
+        System prompt content blocks
+    """
+    blocks: list[SystemContentBlock] = [{"text": base_prompt}]
+    if knowledge_outline:
+        blocks.append({"text": knowledge_outline})
+    blocks.append({"cachePoint": {"type": "default"}})
+    return blocks
+
+
 # Model configuration
 MODEL_CONFIG = {
     "model_id": "us.anthropic.claude-sonnet-4-5-20250929-v1:0",  # Claude Sonnet via Bedrock
@@ -0,0 +1,269 @@
+"""AgentRegistry - Process-level reuse of agents and knowledge state."""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Optional
+
+from agent.fanout import KnowledgeFanout, WikiSearchSource
+from agent.knowledge.snapshot import SnapshotError
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.lazy_tools import builtin_tools
+from agent.store import KnowledgeLease, shared_store
+from agent.streaming import StreamCoalescing
+from agent.support_agent import SupportAgent
+from agent.tools import SupportAgentTools
+
+
+@dataclass(frozen=True)
+class AgentConfig:
+    """Runtime configuration for the support agent."""
+
+    repo_url: str = "https://github.com/icoxfog417/personal-account-manager"
+    knowledge_dir: str = "docs"
+    local_path: str = "./repo_data"
+    repo_ref: Optional[str] = None
+    system_prompt: Optional[str] = None
+    freshness_seconds: float = 300.0
+    index_snapshot: Optional[str] = None
+    search_ranker: str = "bm25"
+    tool_specs: Optional[str] = None
+    stream_flush_bytes: int = 0
+    stream_flush_ms: float = 50.0
+    stream_queue_size: int = 64
+    knowledge_paths: tuple[str, ...] = ()
+    source_deadline_seconds: float = 5.0
+    store_root: Optional[str] = None
+    store_disk_mb: int = 2048
+    store_memory_mb: int = 512
+
+    @classmethod
+    def from_env(cls) -> "AgentConfig":
+        """Read configuration from AGENT_* environment variables."""
+        return cls(
+            repo_url=os.getenv("AGENT_REPO_URL") or cls.repo_url,
+            knowledge_dir=os.getenv("AGENT_KNOWLEDGE_DIR", cls.knowledge_dir),
+            local_path=os.getenv("AGENT_LOCAL_PATH", cls.local_path),
+            repo_ref=os.getenv("AGENT_REPO_REF") or None,
+            system_prompt=os.getenv("AGENT_SYSTEM_PROMPT") or None,
+            freshness_seconds=float(os.getenv("AGENT_SYNC_FRESHNESS_SECONDS", cls.freshness_seconds)),
+            index_snapshot=os.getenv("AGENT_INDEX_SNAPSHOT") or None,
+            search_ranker=os.getenv("AGENT_SEARCH_RANKER") or cls.search_ranker,
+            tool_specs=os.getenv("AGENT_TOOL_SPECS") or None,
+            stream_flush_bytes=int(os.getenv("AGENT_STREAM_FLUSH_BYTES", cls.stream_flush_bytes)),
+            stream_flush_ms=float(os.getenv("AGENT_STREAM_FLUSH_MS", cls.stream_flush_ms)),
+            stream_queue_size=int(os.getenv("AGENT_STREAM_QUEUE_SIZE", cls.stream_queue_size)),
+            knowledge_paths=tuple(
+                path for path in os.getenv("AGENT_KNOWLEDGE_PATHS", "").split(os.pathsep) if path
+            ),
+            source_deadline_seconds=float(
+                os.getenv("AGENT_SOURCE_DEADLINE_SECONDS", cls.source_deadline_seconds)
+            ),
+            store_root=os.getenv("AGENT_STORE_ROOT") or None,
+            store_disk_mb=int(os.getenv("AGENT_STORE_DISK_MB", cls.store_disk_mb)),
+            store_memory_mb=int(os.getenv("AGENT_STORE_MEMORY_MB", cls.store_memory_mb)),
+        )
+
+    def stream_coalescing(self) -> Optional[StreamCoalescing]:
+        """Text-delta coalescing rules; None while stream_flush_bytes is 0."""
+        if self.stream_flush_bytes <= 0:
+            return None
+        return StreamCoalescing(
+            max_bytes=self.stream_flush_bytes,
+            max_delay=self.stream_flush_ms / 1000,
+            queue_size=self.stream_queue_size,
+        )
+
+
+class AgentRegistry:
+    """Keeps knowledge state and per-session agents alive across invocations.
+
+    The knowledge source, its search index and the tool object are created
+    once per process and shared by every agent. If an index snapshot was
+    baked into the image (see agent.prefetch), the index starts from it and
+    the repository clone found at local_path only needs a delta pull. The
+    general-purpose tools are shared too and imported on first call, with
+    their specs read from the cache written by agent.prefetch. Local
+    document folders listed in knowledge_paths get their own index and are
+    searched together with the wiki by one shared KnowledgeFanout. With
+    store_root set, the knowledge source and tools come from the
+    process-wide KnowledgeStore instead, shared with every other registry
+    using the same repository; local_path and index_snapshot are then
+    unused. Each
+    session id maps to its own SupportAgent so conversation history stays
+    isolated; the least recently used idle sessions are dropped beyond
+    max_sessions. A session's agent comes with a lock, since an agent runs
+    one turn at a time (see stream_invocation); a session whose lock is
+    held is never dropped, so the registry may briefly exceed max_sessions.
+    """
+
+    def __init__(
+        self,
+        config: AgentConfig,
+        max_sessions: int = 256,
+        agent_factory: Callable[..., SupportAgent] = SupportAgent,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            config: Agent configuration
+            max_sessions: Maximum number of session agents kept in memory
+            agent_factory: Callable building an agent (SupportAgent signature)
+        """
+        self.config = config
+        self.max_sessions = max_sessions
+        self.agent_factory = agent_factory
+        self._lease: Optional[KnowledgeLease] = None
+        if config.store_root:
+            store = shared_store(
+                Path(config.store_root),
+                disk_budget_bytes=config.store_disk_mb * 1024 * 1024,
+                memory_budget_bytes=config.store_memory_mb * 1024 * 1024,
+                freshness_seconds=config.freshness_seconds,
+                ranker=config.search_ranker,
+            )
+            self._lease = store.acquire(config.repo_url, config.knowledge_dir, config.repo_ref)
+            self.wiki_source = self._lease.wiki_source
+            self.support_tools = self._lease.support_tools
+        else:
+            self.wiki_source = WikiKnowledgeSource(
+                config.repo_url,
+                config.knowledge_dir,
+                Path(config.local_path),
+                freshness_seconds=config.freshness_seconds,
+                ref=config.repo_ref,
+            )
+            self.support_tools = SupportAgentTools(self.wiki_source, ranker=config.search_ranker)
+        # Shared tools may already be indexed; a snapshot would only replace that work
+        if self._lease is None and config.index_snapshot and Path(config.index_snapshot).exists():
+            try:
+                self.support_tools.load_snapshot(Path(config.index_snapshot))
+            except SnapshotError:
+                pass  # Fall back to indexing the corpus on first search
+        self.knowledge_fanout = KnowledgeFanout(
+            [
+                WikiSearchSource(self.support_tools),
+                *(self._local_source(path) for path in config.knowledge_paths),
+            ],
+            deadline=config.source_deadline_seconds,
+        )
+        self.general_tools = builtin_tools(Path(config.tool_specs) if config.tool_specs else None)
+        self._sessions: OrderedDict[str, tuple[SupportAgent, asyncio.Lock]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _local_source(self, path: str) -> WikiSearchSource:
+        """Build a search source over a plain local document folder."""
+        # Without a .git directory the folder is served as is, never synced; its index is
+        # kept until a file changes, checked at most once per freshness window
+        wiki_source = WikiKnowledgeSource("", ".", Path(path), freshness_seconds=self.config.freshness_seconds)
+        return WikiSearchSource(SupportAgentTools(wiki_source, ranker=self.config.search_ranker), name=path)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_agent(self, session_id: Optional[str] = None) -> SupportAgent:
+        """Return the agent for a session, creating it on first use.
+
+        Args:
+            session_id: Conversation identifier; None creates a one-off agent
+
+        Returns:
+            SupportAgent sharing this registry's knowledge state
+        """
+        return self.get_session(session_id)[0]
+
+    def get_session(self, session_id: Optional[str] = None) -> tuple[SupportAgent, asyncio.Lock]:
+        """Return the agent for a session and the lock serializing its turns.
+
+        Args:
+            session_id: Conversation identifier; None creates a one-off agent
+
+        Returns:
+            (agent, lock) pair; hold the lock while the agent streams a turn
+        """
+        if session_id is None:
+            return self._create_agent(), asyncio.Lock()
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+            session = self._sessions[session_id] = (self._create_agent(), asyncio.Lock())
+            excess = max(0, len(self._sessions) - self.max_sessions)
+            idle = [key for key, (_, lock) in self._sessions.items() if not lock.locked() and key != session_id]
+            for idle_id in idle[:excess]:
+                del self._sessions[idle_id]  # Least recently used first; busy sessions stay
+            return session
+
+    def end_session(self, session_id: str) -> None:
+        """Forget a session's conversation state."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def close(self) -> None:
+        """Drop all sessions and release shared knowledge state."""
+        with self._lock:
+            self._sessions.clear()
+        self.knowledge_fanout.close()
+        if self._lease is not None:
+            self._lease.release()
+
+    def _create_agent(self) -> SupportAgent:
+        """Build an agent wired to the shared knowledge state."""
+        kwargs = {}
+        stream_coalescing = self.config.stream_coalescing()
+        if stream_coalescing is not None:
+            kwargs["stream_coalescing"] = stream_coalescing
+        if self.config.system_prompt:
+            kwargs["system_prompt"] = self.config.system_prompt
+        return self.agent_factory(
+            wiki_source=self.wiki_source,
+            support_tools=self.support_tools,
+            general_tools=self.general_tools,
+            knowledge_fanout=self.knowledge_fanout,
+            **kwargs,
+        )
+
+
+_registry: Optional[AgentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> AgentRegistry:
+    """Return the process-wide registry, configured from the environment on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AgentRegistry(AgentConfig.from_env())
+        return _registry
+
+
+async def stream_invocation(payload: dict[str, Any], registry: Optional[AgentRegistry] = None) -> AsyncIterator[dict]:
+    """Stream the frontend events for one AgentCore invocation.
+
+    Invocations of one session run one after another: an agent can't
+    stream two turns at once, and interleaving them would mix both into one
+    conversation history.
+
+    Args:
+        payload: Invocation payload with "prompt" and an optional "session_id"
+        registry: Registry to serve from (defaults to the process-wide one)
+
+    Yields:
+        Agent events (messages with an "event" key)
+    """
+    # Reuse knowledge state across invocations; conversation state is per session
+    if registry is None:
+        registry = get_registry()
+    agent, lock = registry.get_session(payload.get("session_id"))
+
+    message = payload.get("prompt", "")
+    async with lock:
+        async for msg in agent.stream_async(message):
+            if "event" in msg:
+                yield msg
@@ -0,0 +1,277 @@
+"""KnowledgeStore - Process-wide sharing of repository checkouts and indexes.
+
+Agents configured for the same (repository URL, ref, knowledge directory)
+get the same WikiKnowledgeSource and SupportAgentTools, so the repository
+is synced once and the corpus is indexed once no matter how many agents
+(tenants, registries) use it. Sources of one repository URL also share a
+single store clone, so git objects are fetched and stored once even for
+different refs or knowledge directories; each source only adds its own
+sparse snapshot worktrees. All sources share one file cache.
+
+Users hold a KnowledgeLease while they need a source. Sources nobody holds
+are kept for reuse until a budget is exceeded, then evicted least
+recently used first: over the memory budget their index is dropped (and
+rebuilt from disk when acquired again), over the disk budget their
+checkouts are deleted, and a store clone is deleted with its last source.
+
+On disk, under root:
+
+    stores/<url digest>/        clone shared by all sources of one URL
+    sources/<key digest>        symlink to a source's current snapshot
+    sources/.<key digest>.*     its snapshots and refresh lock
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import git
+
+from agent.knowledge.cache import FileCache
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.tools import SupportAgentTools
+
+
+@dataclass(frozen=True)
+class StoreKey:
+    """Identity of a shared knowledge source."""
+
+    repo_url: str
+    ref: Optional[str] = None
+    knowledge_dir: str = "docs"
+
+
+def _digest(*parts: Optional[str]) -> str:
+    return hashlib.sha256("\0".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _tree_size(path: Path) -> int:
+    """Bytes used by the files below a path, without following symlinks."""
+    if path.is_symlink() or path.is_file():
+        return path.lstat().st_size
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except FileNotFoundError:
+                pass  # Removed by a concurrent refresh
+    return total
+
+
+class _Entry:
+    """A shared source with its tools and reference count."""
+
+    def __init__(self, key: StoreKey, wiki_source: WikiKnowledgeSource) -> None:
+        self.key = key
+        self.wiki_source = wiki_source
+        self.tools: Optional[SupportAgentTools] = None
+        self.refs = 0
+
+
+class KnowledgeLease:
+    """A reference to shared knowledge state, kept from eviction until released."""
+
+    def __init__(self, store: "KnowledgeStore", entry: _Entry, tools: SupportAgentTools) -> None:
+        self.key = entry.key
+        self.wiki_source = entry.wiki_source
+        self.support_tools = tools
+        self._store = store
+        self._entry: Optional[_Entry] = entry
+
+    def release(self) -> None:
+        """Give the source back to the store; further calls do nothing."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._store._release(entry)
+
+    def __enter__(self) -> "KnowledgeLease":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class KnowledgeStore:
+    """Reference-counted knowledge sources shared within a process.
+
+    The first acquire() of a key decides its freshness window and ranker;
+    later acquires of the same key share them.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        disk_budget_bytes: int = 2 * 1024 ** 3,
+        memory_budget_bytes: int = 512 * 1024 ** 2,
+        freshness_seconds: float = 300.0,
+        ranker: str = "bm25",
+        file_cache: Optional[FileCache] = None,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            root: Directory holding all clones and snapshots
+            disk_budget_bytes: Disk space kept for idle sources' checkouts
+            memory_budget_bytes: Memory kept for indexes and cached file contents
+            freshness_seconds: How long a synced snapshot is served before a background refresh
+            ranker: Passage ranker of new sources ("bm25", "tfidf" or "hybrid")
+            file_cache: Cache shared by all sources (defaults to a quarter of the memory budget)
+        """
+        self.root = Path(root)
+        self.disk_budget_bytes = disk_budget_bytes
+        self.memory_budget_bytes = memory_budget_bytes
+        self.freshness_seconds = freshness_seconds
+        self.ranker = ranker
+        self.file_cache = file_cache if file_cache is not None else FileCache(memory_budget_bytes // 4)
+        self._entries: OrderedDict[StoreKey, _Entry] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def acquire(self, repo_url: str, knowledge_dir: str = "docs", ref: Optional[str] = None) -> KnowledgeLease:
+        """Return a lease on the shared source for a repository, creating it on first use.
+
+        Args:
+            repo_url: Repository URL
+            knowledge_dir: Directory within the repository containing knowledge files
+            ref: Branch to serve (defaults to the remote's default branch)
+
+        Returns:
+            Lease giving access to the source and its tools
+        """
+        key = StoreKey(repo_url, ref, knowledge_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(key, self._create_source(key))
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if entry.tools is None:
+                entry.tools = SupportAgentTools(entry.wiki_source, ranker=self.ranker)
+            entry.refs += 1
+            return KnowledgeLease(self, entry, entry.tools)
+
+    def _create_source(self, key: StoreKey) -> WikiKnowledgeSource:
+        return WikiKnowledgeSource(
+            key.repo_url,
+            key.knowledge_dir,
+            self.root / "sources" / _digest(key.repo_url, key.ref, key.knowledge_dir),
+            freshness_seconds=self.freshness_seconds,
+            file_cache=self.file_cache,
+            ref=key.ref,
+            store_path=self._store_path(key.repo_url),
+        )
+
+    def _store_path(self, repo_url: str) -> Path:
+        return self.root / "stores" / _digest(repo_url)
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs == 0:
+                self.evict()
+
+    def memory_usage(self) -> int:
+        """Estimated bytes held by indexes and the shared file cache."""
+        with self._lock:
+            tools = [entry.tools for entry in self._entries.values() if entry.tools is not None]
+            return sum(tool.memory_estimate() for tool in tools) + self.file_cache.size
+
+    def disk_usage(self) -> int:
+        """Bytes used below root."""
+        return _tree_size(self.root) if self.root.exists() else 0
+
+    def evict(self) -> list[StoreKey]:
+        """Apply the budgets to idle sources, least recently used first.
+
+        Returns:
+            Keys of the sources removed from disk (and from the store)
+        """
+        with self._lock:
+            idle = [entry for entry in self._entries.values() if entry.refs == 0]
+            memory = self.memory_usage()
+            for entry in idle:
+                if memory <= self.memory_budget_bytes:
+                    break
+                if entry.tools is not None:
+                    memory -= entry.tools.memory_estimate()
+                    entry.tools = None
+                cached = self.file_cache.size
+                self.file_cache.invalidate_under(entry.wiki_source.local_path)
+                memory -= cached - self.file_cache.size
+
+            removed = []
+            disk = self.disk_usage()
+            for entry in idle:
+                if disk <= self.disk_budget_bytes:
+                    break
+                disk -= self._remove(entry)
+                removed.append(entry.key)
+            return removed
+
+    def _remove(self, entry: _Entry) -> int:
+        """Delete an idle source's files, and its store clone if no other source uses it.
+
+        Returns:
+            Bytes freed
+        """
+        source = entry.wiki_source
+        source.wait_for_refresh()
+        del self._entries[entry.key]
+        self.file_cache.invalidate_under(source.local_path)
+
+        freed = 0
+        shared = any(other.key.repo_url == entry.key.repo_url for other in self._entries.values())
+        # Snapshots are worktrees of the store clone; other processes add them under this lock
+        with source._interprocess_lock(source.store_lock_path):
+            for path in (source.snapshots_path, source.local_path, source.lock_path):
+                if not (path.exists() or path.is_symlink()):
+                    continue
+                freed += _tree_size(path)
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
+
+            if not source.store_path.exists():
+                return freed
+            if shared:
+                git.Repo(source.store_path).git.worktree("prune")  # Forget the deleted snapshots
+            else:
+                freed += _tree_size(source.store_path)
+                shutil.rmtree(source.store_path, ignore_errors=True)
+        if not shared:
+            source.store_lock_path.unlink(missing_ok=True)
+        return freed
+
+
+_stores: dict[Path, KnowledgeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def shared_store(root: Path, **options) -> KnowledgeStore:
+    """Return the process-wide store for a root directory, creating it on first use.
+
+    Args:
+        root: Store directory
+        **options: KnowledgeStore arguments, used only when the store is created
+
+    Returns:
+        The store every caller with the same root shares
+    """
+    root = Path(root).absolute()
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = KnowledgeStore(root, **options)
+        return store
@@ -0,0 +1,206 @@
+"""Coalescing and backpressure for streamed agent events.
+
+The model streams text in small deltas, and every event forwarded to the
+frontend costs a network frame. coalesce_events() merges runs of
+consecutive text deltas into one event, flushed once the merged text
+reaches a byte size or has waited for a time interval. Every other event
+(tool use, block and message boundaries, metadata, the final result) is
+passed through unchanged and in order, after any text merged before it.
+
+Upstream events are read by a separate task into a bounded queue. When the
+consumer falls behind, the queue fills up and the upstream generator is
+paused instead of buffering without limit; the backlog that did build up
+is merged into as few frames as the size limit allows.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Optional
+
+Event = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class StreamCoalescing:
+    """Flush rules for merged text deltas.
+
+    Attributes:
+        max_bytes: Flush once the merged text reaches this many UTF-8 bytes
+        max_delay: Flush text that has been held this many seconds
+        queue_size: Upstream events buffered while the consumer is busy
+    """
+
+    max_bytes: int = 1024
+    max_delay: float = 0.05
+    queue_size: int = 64
+
+
+def _text_delta(message: Event) -> Optional[tuple[str, Any]]:
+    """Return (text, content block index) if a message is a plain text delta."""
+    event = message.get("event")
+    if len(message) != 1 or not isinstance(event, dict) or len(event) != 1:
+        return None
+    block = event.get("contentBlockDelta")
+    if not isinstance(block, dict):
+        return None
+    delta = block.get("delta")
+    if not isinstance(delta, dict) or set(delta) != {"text"}:
+        return None
+    return delta["text"], block.get("contentBlockIndex")
+
+
+class EventCoalescer:
+    """Merges consecutive text-delta events; pure state, no I/O or timers.
+
+    push() returns the events ready to be sent, flush() returns whatever
+    text is still held, and flush_due_in() tells the caller when the held
+    text must go out at the latest.
+    """
+
+    def __init__(self, policy: StreamCoalescing, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize an empty coalescer.
+
+        Args:
+            policy: Flush rules
+            clock: Monotonic time source in seconds
+        """
+        self.policy = policy
+        self.clock = clock
+        self.events_in = 0
+        self.events_out = 0
+        self._parts: list[str] = []
+        self._size = 0
+        self._block: Any = None
+        self._template: Optional[dict[str, Any]] = None
+        self._since = 0.0
+
+    @property
+    def pending(self) -> bool:
+        """Whether merged text is waiting to be flushed."""
+        return bool(self._parts)
+
+    def push(self, message: Event) -> list[Event]:
+        """Add an upstream event.
+
+        Args:
+            message: Event from the agent stream
+
+        Returns:
+            Events to send now, in order
+        """
+        self.events_in += 1
+        delta = _text_delta(message)
+        if delta is None:
+            ready = self.flush()
+            ready.append(message)
+            self.events_out += 1
+            return ready
+
+        text, block = delta
+        ready = self.flush() if self._parts and block != self._block else []
+        if not self._parts:
+            self._block = block
+            self._template = message["event"]["contentBlockDelta"]
+            self._since = self.clock()
+        self._parts.append(text)
+        self._size += len(text.encode("utf-8"))
+        if self._size >= self.policy.max_bytes:
+            ready.extend(self.flush())
+        return ready
+
+    def flush(self) -> list[Event]:
+        """Return the held text as one event (or nothing) and reset."""
+        if not self._parts:
+            return []
+        merged = {**self._template, "delta": {"text": "".join(self._parts)}}
+        self._parts = []
+        self._size = 0
+        self._template = None
+        self.events_out += 1
+        return [{"event": {"contentBlockDelta": merged}}]
+
+    def flush_due_in(self) -> Optional[float]:
+        """Seconds until held text must be flushed; None if nothing is held."""
+        if not self._parts:
+            return None
+        return max(0.0, self._since + self.policy.max_delay - self.clock())
+
+
+_END = object()
+
+
+class _Failure:
+    """Carries an upstream exception through the queue."""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+async def coalesce_events(
+    source: AsyncIterator[Event],
+    policy: StreamCoalescing = StreamCoalescing(),
+    coalescer: Optional[EventCoalescer] = None,
+) -> AsyncIterator[Event]:
+    """Merge text deltas of an event stream under bounded buffering.
+
+    Args:
+        source: Upstream events (e.g. Agent.stream_async output)
+        policy: Flush rules and queue size
+        coalescer: Coalescer to use (defaults to a new one for the policy)
+
+    Yields:
+        Events with runs of text deltas merged
+
+    Raises:
+        Exception: Whatever the upstream stream raised, after the text before it
+    """
+    coalescer = coalescer or EventCoalescer(policy)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, policy.queue_size))
+
+    async def pump() -> None:
+        try:
+            async for message in source:
+                await queue.put(message)
+        except Exception as error:
+            await queue.put(_Failure(error))
+        else:
+            await queue.put(_END)
+        finally:
+            # Let the upstream generator clean up if the consumer stopped early
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    producer = asyncio.create_task(pump())
+    try:
+        while True:
+            timeout = coalescer.flush_due_in()
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                for event in coalescer.flush():
+                    yield event
+                continue
+
+            ready: list[Event] = []
+            # Merge the backlog that built up while the consumer was busy, up to the next frame
+            while item is not _END and not isinstance(item, _Failure):
+                ready.extend(coalescer.push(item))
+                if ready or queue.empty():
+                    break
+                item = queue.get_nowait()
+            if item is _END or isinstance(item, _Failure):
+                ready.extend(coalescer.flush())
+            for event in ready:
+                yield event
+            if isinstance(item, _Failure):
+                raise item.error
+            if item is _END:
+                return
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
@@ -1,12 +1,16 @@
 """SupportAgent - AWS Customer Support Agent using Strands Agent framework."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from strands import Agent
-from strands_tools import calculator, http_request
+from strands.types.tools import AgentTool
+from agent.fanout import KnowledgeFanout, KnowledgeSearchSource, WikiSearchSource
+from agent.knowledge.executor import run_blocking
+from agent.lazy_tools import builtin_tools
 from agent.knowledge.wiki_source import WikiKnowledgeSource
-from agent.prompts import SUPPORT_AGENT_SYSTEM_PROMPT, MODEL_CONFIG
+from agent.prompts import SUPPORT_AGENT_SYSTEM_PROMPT, MODEL_CONFIG, build_system_prompt
+from agent.streaming import StreamCoalescing, coalesce_events
 from agent.tools import SupportAgentTools
 
 
@@ -16,6 +20,12 @@ class SupportAgent(Agent):
     Strands Agent that orchestrates conversation flow and owns all search/retrieve logic.
     Uses WikiKnowledgeSource for file I/O operations only.
     Implements search strategies and aggregates results from knowledge sources.
+    
+    Before each invocation the system prompt is extended with an outline of
+    the knowledge base (document paths, titles and headings), so the model
+    can pick search terms without a list_wiki_files round trip. The outline
+    is followed by a prompt cache point and only changes with the knowledge
+    commit.
     """
     
     def __init__(
@@ -24,6 +34,15 @@ class SupportAgent(Agent):
         knowledge_dir: str = "docs",
         local_path: str = "./repo_data",
         system_prompt: Optional[str] = None,
+        freshness_seconds: float = 300.0,
+        wiki_source: Optional[WikiKnowledgeSource] = None,
+        support_tools: Optional[SupportAgentTools] = None,
+        model: Optional[Any] = None,
+        knowledge_outline: bool = True,
+        general_tools: Optional[list[AgentTool]] = None,
+        stream_coalescing: Optional[StreamCoalescing] = None,
+        knowledge_sources: Optional[list[KnowledgeSearchSource]] = None,
+        knowledge_fanout: Optional[KnowledgeFanout] = None,
         **kwargs
     ):
         """Initialize SupportAgent.
@@ -33,27 +52,65 @@ class SupportAgent(Agent):
             knowledge_dir: Directory path within repository containing knowledge files
             local_path: Local path to store repository data
             system_prompt: Custom system prompt for the agent
+            freshness_seconds: Seconds a synced repository is served before a background refresh
+            wiki_source: Shared knowledge source to reuse instead of creating one
+            support_tools: Shared tools (and their index) to reuse instead of creating them
+            model: Model instance or Bedrock model id (defaults to MODEL_CONFIG)
+            knowledge_outline: Add the generated knowledge outline to the system prompt
+            general_tools: Tools besides the wiki tools (defaults to lazily imported
+                calculator and http_request, see agent.lazy_tools)
+            stream_coalescing: Merge text deltas in stream_async (None streams every delta)
+            knowledge_sources: Sources searched by search_knowledge besides the wiki
+            knowledge_fanout: Shared fan-out to reuse instead of building one from
+                the wiki and knowledge_sources
             **kwargs: Additional arguments passed to Agent constructor
         """
         # Initialize knowledge source (I/O only)
-        self.wiki_source = WikiKnowledgeSource(repo_url, knowledge_dir, Path(local_path))
+        if wiki_source is None:
+            if support_tools is not None:
+                wiki_source = support_tools.wiki_source
+            else:
+                wiki_source = WikiKnowledgeSource(
+                    repo_url, knowledge_dir, Path(local_path), freshness_seconds=freshness_seconds
+                )
+        self.wiki_source = wiki_source
         
         # Initialize tools (contains search/retrieve logic)
-        self.support_tools = SupportAgentTools(self.wiki_source)
+        if support_tools is None:
+            support_tools = SupportAgentTools(self.wiki_source)
+        self.support_tools = support_tools
+        
+        # Wiki plus any other sources, searched concurrently by search_knowledge
+        if knowledge_fanout is None:
+            knowledge_fanout = KnowledgeFanout(
+                [WikiSearchSource(self.support_tools), *(knowledge_sources or [])]
+            )
+        self.knowledge_fanout = knowledge_fanout
+        # A separate tool only pays off when there is more than the wiki
+        fanout_tools = [knowledge_fanout.search_knowledge_async] if len(knowledge_fanout.sources) > 1 else []
         
         # Use default system prompt if none provided
         if system_prompt is None:
             system_prompt = SUPPORT_AGENT_SYSTEM_PROMPT
+        self.base_system_prompt = system_prompt
+        self.knowledge_outline = knowledge_outline
+        self._outline: Optional[str] = None
+        self.stream_coalescing = stream_coalescing
+        
+        if general_tools is None:
+            general_tools = builtin_tools()
         
         # Initialize Strands Agent with tools
         super().__init__(
-            model=MODEL_CONFIG["model_id"],
-            system_prompt=system_prompt,
+            model=model if model is not None else MODEL_CONFIG["model_id"],
+            system_prompt=build_system_prompt(system_prompt) if knowledge_outline else system_prompt,
             tools=[
-                self.support_tools.search_wiki,
-                self.support_tools.list_wiki_files,
-                calculator,
-                http_request
+                # Async variants keep git and file I/O off the event loop
+                self.support_tools.search_wiki_async,
+                self.support_tools.list_wiki_files_async,
+                *fanout_tools,
+                # Imported on first call, not at startup
+                *general_tools,
             ],
             name="AWS Support Agent",
             **kwargs
@@ -62,8 +119,10 @@ class SupportAgent(Agent):
     def search_knowledge(self, query: str) -> str:
         """Search knowledge sources for relevant information.
 
-        Centralizes search logic across all knowledge sources.
-        Currently searches wiki, future: AgentCore Memory, Google Drive, etc.
+        Centralizes search logic across all knowledge sources. The wiki and
+        any additional sources (other repositories, local folders, memory)
+        are searched concurrently, each under its own deadline; sources
+        that miss it are left out (see agent.fanout).
 
         Args:
             query: Search query
@@ -71,8 +130,26 @@ class SupportAgent(Agent):
         Returns:
             Aggregated search results
         """
-        # Delegate to tools which contain the actual search logic
-        return self.support_tools.search_wiki(query)
+        return self.knowledge_fanout.search_text(query)
+
+    async def refresh_system_prompt(self) -> None:
+        """Put the current knowledge outline into the system prompt.
+
+        The prompt is only replaced when the outline changed (i.e. a new
+        knowledge commit), so the cached prefix stays valid between turns.
+        If the outline can't be built, the previous prompt is kept.
+        """
+        if not self.knowledge_outline:
+            return
+        try:
+            _, outline = await run_blocking(
+                self.support_tools.knowledge_outline, executor=self.support_tools.executor
+            )
+        except Exception:
+            return
+        if outline != self._outline:
+            self._outline = outline
+            self.system_prompt = build_system_prompt(self.base_system_prompt, outline)
 
     async def stream_async(self, user_message: str, **kwargs):
         """Stream agent responses in a format compatible with Genu frontend.
@@ -80,6 +157,8 @@ class SupportAgent(Agent):
         This method filters the agent's streaming output to only yield messages
         containing an "event" key, which is required by the Genu frontend.
         Also passes through the final "result" message for invoke_async compatibility.
+        With stream_coalescing set, consecutive text deltas are merged into
+        fewer events under bounded buffering (see agent.streaming).
 
         Args:
             user_message: User's input message
@@ -88,7 +167,16 @@ class SupportAgent(Agent):
         Yields:
             Messages containing "event" or "result" key
         """
-        # Stream messages from the base Agent class
+        await self.refresh_system_prompt()
+        
+        messages = self._frontend_messages(user_message, **kwargs)
+        if self.stream_coalescing is not None:
+            messages = coalesce_events(messages, self.stream_coalescing)
+        async for message in messages:
+            yield message
+    
+    async def _frontend_messages(self, user_message: str, **kwargs):
+        """Stream messages from the base Agent class that the frontend consumes."""
         async for message in super().stream_async(user_message, **kwargs):
             # Yield messages with "event" key (for frontend) or "result" key (for invoke_async)
             if "event" in message or "result" in message:
@@ -0,0 +1,179 @@
+"""Telemetry - timing spans and metrics for tools and knowledge I/O.
+
+Operations are wrapped in span(), which emits an OpenTelemetry span and
+records its duration and numeric counters as histograms tagged with the
+operation name. Code further down the call stack (file loads, cache
+lookups) adds to the innermost active span through current(), and counts
+roll up to enclosing spans, so a search_wiki span reports the bytes read
+by the index refresh it triggered.
+
+OpenTelemetry is optional. Without it, or with AGENT_TELEMETRY=off,
+span() and current() return a shared no-op object and cost one function
+call.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Optional
+
+try:
+    from opentelemetry import metrics as otel_metrics
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # pragma: no cover - exercised only without opentelemetry
+    otel_metrics = None
+    otel_trace = None
+
+INSTRUMENTATION_NAME = "agent"
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("agent_span", default=None)
+
+
+class NoopSpan:
+    """Span stand-in used while telemetry is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Ignore an attribute."""
+
+    def add(self, key: str, amount: int = 1) -> None:
+        """Ignore a counter increment."""
+
+
+_NOOP = NoopSpan()
+
+
+class Span:
+    """An active timed operation.
+
+    Attributes set with set() are attached to the OpenTelemetry span;
+    counters incremented with add() are attached too, propagate to every
+    enclosing span, and are recorded as histograms when the span ends.
+    """
+
+    __slots__ = ("name", "attributes", "counters", "parent", "_otel_span", "_scope", "_token", "_start")
+
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.counters: dict[str, int] = {}
+        self.parent: Optional[Span] = None
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        self._scope = _tracer.start_as_current_span(self.name, attributes=self.attributes)
+        self._otel_span = self._scope.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        labels = {"operation": self.name}
+        _instrument("duration", "ms").record(duration_ms, labels)
+        for key, value in self.counters.items():
+            _instrument(key, "1").record(value, labels)
+        if self.counters:
+            self._otel_span.set_attributes(self.counters)
+        if exc is not None:
+            self._otel_span.set_status(Status(StatusCode.ERROR, str(exc)))
+        _current.reset(self._token)
+        self._scope.__exit__(exc_type, exc, traceback)
+
+    def set(self, key: str, value: Any) -> None:
+        """Attach an attribute (str, bool, int or float) to this span."""
+        self.attributes[key] = value
+        self._otel_span.set_attribute(key, value)
+
+    def add(self, key: str, amount: int = 1) -> None:
+        """Increment a counter on this span and all enclosing spans."""
+        span: Optional[Span] = self
+        while span is not None:
+            span.counters[key] = span.counters.get(key, 0) + amount
+            span = span.parent
+
+
+def _enabled_from_env() -> bool:
+    """Read AGENT_TELEMETRY; anything but off/false/0 enables telemetry."""
+    return os.getenv("AGENT_TELEMETRY", "on").strip().lower() not in ("off", "false", "0")
+
+
+_enabled = otel_trace is not None and _enabled_from_env()
+_tracer = otel_trace.get_tracer(INSTRUMENTATION_NAME) if otel_trace is not None else None
+_meter = otel_metrics.get_meter(INSTRUMENTATION_NAME) if otel_metrics is not None else None
+_instruments: dict[str, Any] = {}
+_instruments_lock = threading.Lock()
+
+
+def _instrument(key: str, unit: str):
+    """Return (creating on first use) the histogram for an operation metric."""
+    histogram = _instruments.get(key)
+    if histogram is None:
+        with _instruments_lock:
+            histogram = _instruments.get(key)
+            if histogram is None:
+                histogram = _meter.create_histogram(f"agent.operation.{key}", unit=unit)
+                _instruments[key] = histogram
+    return histogram
+
+
+def configure(
+    enabled: Optional[bool] = None,
+    tracer_provider: Any = None,
+    meter_provider: Any = None,
+) -> None:
+    """Change telemetry settings.
+
+    By default spans and metrics go to the global OpenTelemetry providers,
+    which opentelemetry-instrument sets up in the container.
+
+    Args:
+        enabled: Turn telemetry on or off (None keeps the current setting)
+        tracer_provider: TracerProvider to use instead of the global one
+        meter_provider: MeterProvider to use instead of the global one
+    """
+    global _enabled, _tracer, _meter
+    if otel_trace is None:
+        return
+    if enabled is not None:
+        _enabled = enabled
+    _tracer = (tracer_provider or otel_trace.get_tracer_provider()).get_tracer(INSTRUMENTATION_NAME)
+    _meter = (meter_provider or otel_metrics.get_meter_provider()).get_meter(INSTRUMENTATION_NAME)
+    with _instruments_lock:
+        _instruments.clear()
+
+
+def is_enabled() -> bool:
+    """Check whether spans and metrics are being recorded."""
+    return _enabled
+
+
+def span(name: str, **attributes: Any) -> Span | NoopSpan:
+    """Start a timed operation; use as a context manager.
+
+    Args:
+        name: Operation name, e.g. "tool.search_wiki"
+        **attributes: Initial span attributes
+
+    Returns:
+        Span to record attributes and counters on
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def current() -> Span | NoopSpan:
+    """Return the innermost active span, or a no-op if there is none."""
+    if not _enabled:
+        return _NOOP
+    return _current.get() or _NOOP
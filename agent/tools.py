@@ -1,25 +1,388 @@
 """Tool definitions for the AWS Support Agent."""
 
+import sys
+import threading
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
 
 from strands import tool
 
+from agent import telemetry
+from agent.knowledge.cache import QueryCache
+from agent.knowledge.catalog import CatalogEntry, KnowledgeCatalog, describe_document
+from agent.knowledge.chunker import Passage, chunk_markdown
+from agent.knowledge.executor import run_blocking
+from agent.knowledge.index import BM25Index, reciprocal_rank_fusion
+from agent.knowledge.packing import estimate_tokens, pack_results
+from agent.knowledge.snapshot import SnapshotIndex, write_snapshot
 from agent.knowledge.wiki_source import WikiKnowledgeSource
 
+if TYPE_CHECKING:
+    from agent.knowledge.vector import HashedTfidfIndex
+
+# Level-2 headings shown per file by list_wiki_files
+_MAX_LISTED_HEADINGS = 6
+
+# Default size limit of the knowledge outline added to the system prompt
+OUTLINE_MAX_CHARS = 8000
+
+# Passage rankers: BM25 keyword scoring, hashed TF-IDF cosine, or both fused
+RANKERS = ("bm25", "tfidf", "hybrid")
+
+# Approximate bytes per BM25 posting (dict slot, frequency and the document's term tuple)
+POSTING_BYTES = 64
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count for humans (and few tokens)."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def passage_location(passage: Passage) -> str:
+    """Name a passage by its file and innermost two headings."""
+    if not passage.heading:
+        return passage.path
+    return passage.path + " > " + " > ".join(passage.heading.split(" > ")[-2:])
+
 
 class SupportAgentTools:
     """Tools for the AWS Support Agent.
     
     Centralizes all search and retrieve logic for knowledge sources.
     WikiKnowledgeSource provides I/O operations only.
+    
+    Each tool has an async variant registered under the same tool name,
+    which runs the blocking work on a bounded executor instead of the
+    event loop thread.
     """
     
-    def __init__(self, wiki_source: WikiKnowledgeSource) -> None:
+    def __init__(
+        self,
+        wiki_source: WikiKnowledgeSource,
+        index: Optional[BM25Index] = None,
+        max_results: int = 10,
+        token_budget: int = 3000,
+        executor: Optional[Executor] = None,
+        query_cache: Optional[QueryCache] = None,
+        ranker: str = "bm25",
+        vector_index: Optional["HashedTfidfIndex"] = None,
+    ) -> None:
         """Initialize tools with knowledge source.
         
         Args:
             wiki_source: WikiKnowledgeSource instance for file I/O
+            index: Search index to populate (defaults to an empty BM25Index)
+            max_results: Maximum number of candidate passages considered by search_wiki
+            token_budget: Estimated token budget for a search_wiki result
+            executor: Executor for async tool variants (defaults to the shared knowledge I/O pool)
+            query_cache: Cache of search_wiki results (defaults to a 1024-entry QueryCache
+                keyed to suit the ranker)
+            ranker: "bm25", "tfidf" or "hybrid" (reciprocal rank fusion of both)
+            vector_index: TF-IDF index for the tfidf and hybrid rankers (requires numpy;
+                defaults to a new HashedTfidfIndex)
+            
+        Raises:
+            ValueError: If the ranker is unknown
         """
+        if ranker not in RANKERS:
+            raise ValueError(f"Unknown ranker {ranker!r}; expected one of {', '.join(RANKERS)}")
         self.wiki_source = wiki_source
+        self.index = index if index is not None else BM25Index()
+        self.max_results = max_results
+        self.token_budget = token_budget
+        self.executor = executor
+        if query_cache is None:
+            # BM25 ignores repeated query terms; the TF-IDF query vector doesn't
+            query_cache = QueryCache(term_counts=ranker != "bm25")
+        self.query_cache = query_cache
+        self.ranker = ranker
+        if vector_index is None and ranker != "bm25":
+            # Imports numpy, which the default ranker doesn't need
+            from agent.knowledge.vector import HashedTfidfIndex
+            vector_index = HashedTfidfIndex(tokenizer=self.index.tokenizer)
+        self.vector_index = vector_index
+        self.catalog = KnowledgeCatalog()
+        self._outline: Optional[tuple[Optional[str], str]] = None  # (revision, outline)
+        self._passages: dict[str, Passage] = {}
+        self._file_passages: dict[str, list[str]] = {}
+        self._indexed_revision: Optional[str] = None
+        self._snapshot: Optional[SnapshotIndex] = None
+        # Tools are shared across sessions, so index updates and reads are serialized
+        self._index_lock = threading.RLock()
+    
+    def refresh_index(self) -> None:
+        """Bring the search index in line with the current repository revision.
+        
+        Files are split into heading-level passages (see chunk_markdown) and
+        each passage is indexed separately. The corpus is tokenized once per
+        revision. When the previous revision is known, only files changed
+        between the two commits are re-indexed. A plain directory reports a
+        fingerprint of its files instead of a commit and is re-indexed in
+        full when that changes.
+        
+        A loaded snapshot keeps serving queries while its revision is
+        current; once the repository moves on it is materialized into the
+        in-memory index and updated incrementally from there.
+        
+        The file catalog is maintained from the same file loads.
+        """
+        with self._index_lock, telemetry.span("index.refresh") as span:
+            revision = self.wiki_source.current_revision()
+            if revision is not None and revision == self._indexed_revision:
+                span.set("mode", "current")
+                return
+            
+            if self._snapshot is not None:
+                self._materialize_snapshot()
+            
+            changes = None
+            if revision is not None and self._indexed_revision is not None:
+                changes = self.wiki_source.changes_between(self._indexed_revision, revision)
+            
+            if changes is None:
+                self.index.clear()
+                if self.vector_index is not None:
+                    self.vector_index.clear()
+                self._passages.clear()
+                self._file_passages.clear()
+                self.catalog.clear()
+                updated_paths = self.wiki_source.list_files()
+                span.set("mode", "full")
+            else:
+                for file_path in changes.removed_paths():
+                    self._remove_document(file_path)
+                updated_paths = changes.updated_paths()
+                span.set("mode", "incremental")
+            
+            for file_path in updated_paths:
+                self._index_document(file_path)
+            span.add("files_indexed", len(updated_paths))
+            if changes is None:
+                self.catalog.complete = True
+            
+            self._indexed_revision = revision
+    
+    def search_passages(self, query: str, top_k: Optional[int] = None) -> list[Passage]:
+        """Return the passages that best match a query.
+        
+        Args:
+            query: Search query
+            top_k: Maximum number of passages (defaults to max_results)
+            
+        Returns:
+            Passages sorted by descending score
+        """
+        return [passage for passage, _ in self.search_scored(query, top_k)]
+    
+    def search_scored(self, query: str, top_k: Optional[int] = None) -> list[tuple[Passage, float]]:
+        """Return the best-matching passages with their ranker scores.
+        
+        Scores are only comparable within one ranker and corpus; see
+        agent.fanout for merging results of several sources.
+        
+        Args:
+            query: Search query
+            top_k: Maximum number of passages (defaults to max_results)
+            
+        Returns:
+            (passage, score) pairs sorted by descending score
+        """
+        with self._index_lock:
+            self.refresh_index()
+            return self._rank_batch([self.index.tokenizer(query)], top_k or self.max_results)[0]
+    
+    def search_batch(self, queries: Sequence[str], top_k: Optional[int] = None) -> list[list[Passage]]:
+        """Rank passages for many queries in one pass over the index.
+        
+        Meant for offline evaluation and prefetch: the index is refreshed
+        once, each distinct query is tokenized and ranked once, and term
+        scoring is shared across the batch (see BM25Index.search_batch and
+        HashedTfidfIndex.search_batch). The query cache is bypassed.
+        
+        Args:
+            queries: Search queries
+            top_k: Maximum number of passages per query (defaults to max_results)
+            
+        Returns:
+            Passages per query, in query order, each sorted best first
+        """
+        with self._index_lock, telemetry.span("search.batch", queries=len(queries)) as span:
+            self.refresh_index()
+            term_lists = [tuple(self.index.tokenizer(query)) for query in queries]
+            distinct = list(dict.fromkeys(term_lists))
+            span.add("distinct_queries", len(distinct))
+            ranked = dict(zip(distinct, self._rank_batch(distinct, top_k or self.max_results)))
+            return [[passage for passage, _ in ranked[terms]] for terms in term_lists]
+    
+    def _rank_passages(self, terms: Sequence[str], top_k: int) -> list[Passage]:
+        """Rank passages of the current index; caller holds the index lock."""
+        return [passage for passage, _ in self._rank_batch([terms], top_k)[0]]
+    
+    def _rank_batch(
+        self, term_lists: Sequence[Sequence[str]], top_k: int
+    ) -> list[list[tuple[Passage, float]]]:
+        """Rank passages for several tokenized queries; caller holds the index lock."""
+        if self._snapshot is not None:
+            # Only kept with the bm25 ranker; see load_snapshot()
+            return [self._snapshot.search_passages(terms, top_k) for terms in term_lists]
+        if self.ranker == "bm25":
+            hit_lists = self.index.search_batch(term_lists, top_k=top_k)
+        elif self.ranker == "tfidf":
+            hit_lists = self.vector_index.search_batch(term_lists, top_k=top_k)
+        else:
+            # Fuse deeper candidate lists so either scorer can promote a passage
+            hit_lists = [
+                reciprocal_rank_fusion([keyword_hits, vector_hits])[:top_k]
+                for keyword_hits, vector_hits in zip(
+                    self.index.search_batch(term_lists, top_k=2 * top_k),
+                    self.vector_index.search_batch(term_lists, top_k=2 * top_k),
+                )
+            ]
+        return [[(self._passages[hit.doc_id], hit.score) for hit in hits] for hits in hit_lists]
+    
+    def memory_estimate(self) -> int:
+        """Approximate bytes held by passages and search indexes.
+        
+        File contents are not included; they live in the wiki source's
+        file cache. A memory-mapped snapshot counts as nothing.
+        """
+        with self._index_lock:
+            passages = sum(sys.getsizeof(p.text) + sys.getsizeof(p.heading) for p in self._passages.values())
+            vectors = self.vector_index.nbytes if self.vector_index is not None else 0
+            return passages + self.index.posting_count * POSTING_BYTES + vectors
+    
+    def load_snapshot(self, path: Path) -> None:
+        """Serve queries from an on-disk index snapshot.
+        
+        The snapshot is memory-mapped, so no corpus file is read or
+        tokenized until the repository revision differs from the one the
+        snapshot was built from. The file catalog stored with it serves
+        list_wiki_files and the knowledge outline. The tfidf and hybrid
+        rankers need passage vectors, so with them the snapshot is loaded
+        into memory right away (still without reading corpus files).
+        
+        Args:
+            path: Snapshot file written by save_snapshot()
+            
+        Raises:
+            SnapshotError: If the snapshot can't be opened
+        """
+        snapshot = SnapshotIndex(path)
+        with self._index_lock:
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self.index.clear()
+            if self.vector_index is not None:
+                self.vector_index.clear()
+            self._passages.clear()
+            self._file_passages.clear()
+            self.catalog.clear()
+            self._snapshot = snapshot
+            self._indexed_revision = snapshot.revision
+            catalog = snapshot.catalog()
+            if catalog is not None:
+                documents, assets = catalog
+                for entry in documents:
+                    self.catalog.add_document(entry)
+                for asset in assets:
+                    self.catalog.add_asset(asset)
+                self.catalog.complete = True
+            if self.vector_index is not None:
+                self._materialize_snapshot()
+    
+    def save_snapshot(self, path: Path) -> Optional[str]:
+        """Write the current index and file catalog to a snapshot file.
+        
+        Args:
+            path: Destination file
+            
+        Returns:
+            Revision the snapshot was built from
+        """
+        with self._index_lock:
+            self.refresh_index()
+            if self._snapshot is not None:
+                self._materialize_snapshot()
+            if not self.catalog.complete:
+                self._build_catalog()
+            write_snapshot(
+                path,
+                self.index,
+                self._passages,
+                self._indexed_revision,
+                catalog=(self.catalog.documents(), self.catalog.assets()),
+            )
+            return self._indexed_revision
+    
+    def _materialize_snapshot(self) -> None:
+        """Move a loaded snapshot into the in-memory index and close it."""
+        snapshot, self._snapshot = self._snapshot, None
+        with snapshot:
+            snapshot.to_index(self.index)
+            for passage in snapshot.passages():
+                self._passages[passage.id] = passage
+                self._file_passages.setdefault(passage.path, []).append(passage.id)
+                if self.vector_index is not None:
+                    self.vector_index.add(passage.id, f"{passage.heading}\n{passage.text}")
+    
+    def _build_catalog(self) -> None:
+        """Catalog every file without indexing; caller holds the index lock.
+        
+        Needed only while a loaded snapshot without a stored catalog serves
+        queries, since then no file has been read for the current revision.
+        """
+        self.catalog.clear()
+        for file_path in self.wiki_source.list_files():
+            self._load_document(file_path)
+        self.catalog.complete = True
+    
+    def _load_document(self, file_path: Path) -> Optional[str]:
+        """Load a document and record it in the catalog.
+        
+        Returns:
+            Document text, or None for non-document or unreadable files
+        """
+        # Only index markdown files for now
+        if file_path.suffix.lower() not in ['.md', '.txt']:
+            self.catalog.add_asset(str(file_path))
+            return None
+        try:
+            content = self.wiki_source.load_file(file_path)
+        except Exception:
+            return None  # Skip files that can't be read
+        self.catalog.add_document(describe_document(str(file_path), content))
+        return content
+    
+    def _index_document(self, file_path: Path) -> None:
+        """Load a single file and (re)index its passages."""
+        self._remove_document(file_path)
+        content = self._load_document(file_path)
+        if content is None:
+            return
+        
+        passages = chunk_markdown(str(file_path), content)
+        for passage in passages:
+            self._passages[passage.id] = passage
+            # Headings of enclosing sections count towards the match
+            tokens = self.index.tokenizer(f"{passage.heading}\n{passage.text}")
+            self.index.add_tokens(passage.id, tokens)
+            if self.vector_index is not None:
+                self.vector_index.add_tokens(passage.id, tokens)
+        self._file_passages[str(file_path)] = [passage.id for passage in passages]
+    
+    def _remove_document(self, file_path: Path) -> None:
+        """Drop all passages of a file from the index and catalog."""
+        self.catalog.remove(str(file_path))
+        for passage_id in self._file_passages.pop(str(file_path), []):
+            self._passages.pop(passage_id, None)
+            self.index.remove(passage_id)
+            if self.vector_index is not None:
+                self.vector_index.remove(passage_id)
     
     @tool
     def search_wiki(self, query: str) -> str:
@@ -31,74 +394,223 @@ class SupportAgentTools:
         Returns:
             Relevant content from wiki files
         """
-        try:
-            # Ensure wiki is up to date
-            self.wiki_source.clone_or_update()
-            
-            # Get all files from wiki
-            files = self.wiki_source.list_files()
-            
-            # Simple keyword-based search (Phase 1 implementation)
-            query_lower = query.lower()
-            relevant_content = []
-            
-            for file_path in files:
-                # Only search markdown files for now
-                if file_path.suffix.lower() in ['.md', '.txt']:
-                    try:
-                        content = self.wiki_source.load_file(file_path)
-                        content_lower = content.lower()
-                        
-                        # Check if query keywords appear in content
-                        if any(keyword.strip() in content_lower for keyword in query_lower.split()):
-                            # Add file with some context
-                            relevant_content.append(f"## From {file_path}\n\n{content[:2000]}...")
-                            
-                            # Limit results to avoid overwhelming the context
-                            if len(relevant_content) >= 10:
-                                break
-                                
-                    except Exception:
-                        continue  # Skip files that can't be read
-            
-            if relevant_content:
-                return "\n\n".join(relevant_content)
-            else:
-                return f"No relevant content found for query: {query}"
+        with telemetry.span("tool.search_wiki", query_chars=len(query)) as span:
+            try:
+                # Serve the last synced snapshot; refreshes happen in the background
+                self.wiki_source.ensure_fresh()
                 
-        except Exception as e:
-            return f"Error searching wiki: {str(e)}"
+                with self._index_lock:
+                    self.refresh_index()
+                    terms = self.index.tokenizer(query)
+                    relevant_content = self.query_cache.get(self._indexed_revision, terms)
+                    span.set("query_cache_hit", relevant_content is not None)
+                    if relevant_content is None:
+                        # Return only the best-matching sections, packed into the token budget
+                        relevant_content = "\n\n".join(pack_results(
+                            [
+                                self._format_passage(passage)
+                                for passage in self._rank_passages(terms, self.max_results)
+                            ],
+                            self.token_budget,
+                        ))
+                        self.query_cache.put(self._indexed_revision, terms, relevant_content)
+                
+                if relevant_content:
+                    result = relevant_content
+                else:
+                    result = f"No relevant content found for query: {query}"
+                    
+            except Exception as e:
+                span.set("error", type(e).__name__)
+                result = f"Error searching wiki: {str(e)}"
+            
+            self._record_result(span, result)
+            return result
+    
+    @staticmethod
+    def _format_passage(passage: Passage) -> str:
+        """Format a passage with a compact source header.
+        
+        The passage text itself starts with its own heading line.
+        """
+        return f"## From {passage_location(passage)}\n\n{passage.text}"
+    
+    @staticmethod
+    def _record_result(span: telemetry.Span | telemetry.NoopSpan, result: str) -> None:
+        """Record the size of a tool result, which is what the model pays for."""
+        span.add("result_chars", len(result))
+        if telemetry.is_enabled():
+            span.add("result_tokens", estimate_tokens(result))
     
     @tool
-    def list_wiki_files(self) -> str:
-        """List available files in the wiki repository.
+    def list_wiki_files(
+        self,
+        path_prefix: str = "",
+        contains: str = "",
+        page: int = 1,
+        page_size: int = 50,
+    ) -> str:
+        """List documentation files with their titles and section headings.
         
+        Args:
+            path_prefix: Only list files under this path (e.g. "billing/")
+            contains: Only list files whose path, title or headings contain this text
+            page: Page number, starting at 1
+            page_size: Files per page
+            
         Returns:
-            List of available files for reference
+            One line per file with size, title and top-level headings
         """
-        try:
-            # Ensure wiki is up to date
-            self.wiki_source.clone_or_update()
-            
-            files = self.wiki_source.list_files()
-            
-            # Group files by type
-            markdown_files = [f for f in files if f.suffix.lower() == '.md']
-            other_files = [f for f in files if f.suffix.lower() != '.md']
-            
-            result = "Available wiki files:\n\n"
+        with telemetry.span("tool.list_wiki_files") as span:
+            try:
+                # Serve the last synced snapshot; refreshes happen in the background
+                self.wiki_source.ensure_fresh()
+                
+                with self._index_lock:
+                    self.refresh_index()
+                    if not self.catalog.complete:
+                        self._build_catalog()
+                    entries = self.catalog.documents(path_prefix, contains or None)
+                    assets = self.catalog.asset_counts(path_prefix)
+                span.add("files_listed", len(entries))
+                result = self._format_catalog(entries, assets, path_prefix, contains, page, page_size)
+                
+            except Exception as e:
+                span.set("error", type(e).__name__)
+                result = f"Error listing wiki files: {str(e)}"
             
-            if markdown_files:
-                result += "Markdown files:\n"
-                for file_path in sorted(markdown_files):
-                    result += f"- {file_path}\n"
+            self._record_result(span, result)
+            return result
+    
+    @staticmethod
+    def _format_catalog(
+        entries: list[CatalogEntry],
+        assets: dict[str, int],
+        path_prefix: str,
+        contains: str,
+        page: int,
+        page_size: int,
+    ) -> str:
+        """Render one page of catalog entries, plus a count of non-document files."""
+        filters = []
+        if path_prefix:
+            filters.append(f"under '{path_prefix}'")
+        if contains:
+            filters.append(f"containing '{contains}'")
+        description = " ".join(filters)
+        
+        page_size = max(1, page_size)
+        pages = max(1, -(-len(entries) // page_size))
+        page = min(max(1, page), pages)
+        start = (page - 1) * page_size
+        shown = entries[start:start + page_size]
+        
+        if not entries:
+            lines = [f"No wiki files found{' ' + description if description else ''}."]
+        else:
+            header = f"Wiki files {start + 1}-{start + len(shown)} of {len(entries)}"
+            lines = [f"{header}{' ' + description if description else ''}:"]
+            for entry in shown:
+                line = f"- {entry.path} ({_format_size(entry.size)}) {entry.title}"
+                if entry.headings:
+                    headings = entry.headings[:_MAX_LISTED_HEADINGS]
+                    more = ", ..." if len(entry.headings) > len(headings) else ""
+                    line += f": {', '.join(headings)}{more}"
+                lines.append(line)
+            if page < pages:
+                lines.append(f"Page {page} of {pages}; request page={page + 1} for more.")
+        
+        if assets:
+            total = sum(assets.values())
+            breakdown = ", ".join(f"{count} {suffix or 'no suffix'}" for suffix, count in assets.items())
+            lines.append(f"Other files (not searchable): {total} ({breakdown})")
+        return "\n".join(lines)
+    
+    def knowledge_outline(self, max_chars: int = OUTLINE_MAX_CHARS) -> tuple[Optional[str], str]:
+        """Return a compact outline of the knowledge base for the system prompt.
+        
+        The outline lists every document with its title and top-level
+        headings, sorted by path, so it is byte-identical for a given commit
+        and can be served from the model's prompt cache. It is regenerated
+        only when the indexed revision changes.
+        
+        Args:
+            max_chars: Size limit; headings, then documents are dropped to fit
             
-            if other_files:
-                result += "\nOther files:\n"
-                for file_path in sorted(other_files):
-                    result += f"- {file_path}\n"
+        Returns:
+            (revision, outline) pair; revision is None for sources without one
+        """
+        self.wiki_source.ensure_fresh()
+        with self._index_lock:
+            self.refresh_index()
+            revision = self._indexed_revision
+            if self._outline is None or revision is None or self._outline[0] != revision:
+                if not self.catalog.complete:
+                    self._build_catalog()
+                self._outline = (revision, self._format_outline(self.catalog.documents(), max_chars))
+            return self._outline
+    
+    @staticmethod
+    def _format_outline(entries: list[CatalogEntry], max_chars: int) -> str:
+        """Render catalog entries as an outline of at most max_chars."""
+        header = (
+            "## Knowledge Outline\n\n"
+            "Documents available through search_wiki (path: title - top-level sections). "
+            "Use it to choose search terms; call list_wiki_files only for details it leaves out.\n"
+        )
+        detailed = [
+            f"- {entry.path}: {entry.title}" + (f" - {', '.join(entry.headings)}" if entry.headings else "")
+            for entry in entries
+        ]
+        outline = "\n".join([header, *detailed])
+        if len(outline) <= max_chars:
+            return outline
+        
+        # Too large: titles only, then as many documents as fit
+        lines = [header]
+        size = len(header)
+        for position, entry in enumerate(entries):
+            line = f"- {entry.path}: {entry.title}"
+            remaining = len(entries) - position
+            note = f"- ... {remaining} more documents (see list_wiki_files)"
+            if size + len(line) + 1 + len(note) + 1 > max_chars and remaining > 1:
+                lines.append(note)
+                break
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join(lines)
+    
+    @tool(name="search_wiki")
+    async def search_wiki_async(self, query: str) -> str:
+        """Search through wiki files for relevant content.
+        
+        Args:
+            query: Search query to find relevant information
             
-            return result
+        Returns:
+            Relevant content from wiki files
+        """
+        return await run_blocking(self.search_wiki, query, executor=self.executor)
+    
+    @tool(name="list_wiki_files")
+    async def list_wiki_files_async(
+        self,
+        path_prefix: str = "",
+        contains: str = "",
+        page: int = 1,
+        page_size: int = 50,
+    ) -> str:
+        """List documentation files with their titles and section headings.
+        
+        Args:
+            path_prefix: Only list files under this path (e.g. "billing/")
+            contains: Only list files whose path, title or headings contain this text
+            page: Page number, starting at 1
+            page_size: Files per page
             
-        except Exception as e:
-            return f"Error listing wiki files: {str(e)}"
+        Returns:
+            One line per file with size, title and top-level headings
+        """
+        return await run_blocking(
+            self.list_wiki_files, path_prefix, contains, page, page_size, executor=self.executor
+        )
@@ -0,0 +1 @@
+"""Benchmarks for the knowledge path (clone, pull, file access, indexing, search)."""
@@ -0,0 +1,134 @@
+"""Command line interface for the knowledge-path benchmarks.
+
+    python -m benchmarks run --files 1000 --output reports/head.json
+    python -m benchmarks compare reports/base.json reports/head.json
+    python -m benchmarks startup --budget-ms 1500
+    python -m benchmarks replay benchmarks/conversations.jsonl --concurrency 8 --repeat 10
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.report import compare, format_comparison, load_report, save_report
+from benchmarks.replay import (
+    DEFAULT_CONVERSATIONS,
+    ScriptedModel,
+    load_conversations,
+    repeat_conversations,
+    run_replay,
+)
+from benchmarks.runner import Result, build_report, run_suite
+from benchmarks.startup import deferred_modules_loaded, import_profile, run_startup
+
+
+def _print_results(results: list[Result]) -> None:
+    """Print one summary line per scenario."""
+    for result in results:
+        peak = f"  peak {result.peak_memory_bytes / 1024:9.0f} KiB" if result.peak_memory_bytes else ""
+        print(f"{result.name:<20} p50 {result.p50_ms:9.2f} ms  p95 {result.p95_ms:9.2f} ms{peak}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run all scenarios and write a JSON report")
+    run.add_argument("--files", type=int, default=1000, help="Synthetic corpus size")
+    run.add_argument("--iterations", type=int, default=5, help="Timed runs per scenario")
+    run.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    run.add_argument("--output", type=Path, default=Path("benchmark-report.json"))
+    run.add_argument("--skip-startup", action="store_true", help="Leave out the process startup scenarios")
+
+    diff = commands.add_parser("compare", help="Compare two reports")
+    diff.add_argument("base", type=Path)
+    diff.add_argument("head", type=Path)
+    diff.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+
+    startup = commands.add_parser("startup", help="Measure import time and time-to-ready of a new process")
+    startup.add_argument("--iterations", type=int, default=5, help="Processes to start")
+    startup.add_argument("--budget-ms", type=float, help="Fail if the median time-to-ready exceeds this")
+
+    replay = commands.add_parser("replay", help="Replay conversations end to end with a scripted local model")
+    replay.add_argument("conversations", type=Path, nargs="?", default=DEFAULT_CONVERSATIONS,
+                        help="JSON Lines file in the requests.jsonl format")
+    replay.add_argument("--concurrency", type=int, default=4, help="Conversations in flight at once")
+    replay.add_argument("--repeat", type=int, default=1, help="Play every conversation this many times")
+    replay.add_argument("--files", type=int, default=1000, help="Synthetic corpus size")
+    replay.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    replay.add_argument("--tools", default="search_wiki,list_wiki_files", help="Tools the model calls every turn")
+    replay.add_argument("--model-latency-ms", type=float, default=0.0, help="Delay before each model response")
+    replay.add_argument("--delta-delay-ms", type=float, default=0.0, help="Delay between streamed text deltas")
+    replay.add_argument("--flush-bytes", type=int, default=0, help="Coalesce streamed text (AGENT_STREAM_FLUSH_BYTES)")
+    replay.add_argument("--freshness-seconds", type=float, default=300.0, help="Knowledge sync freshness window")
+    replay.add_argument("--output", type=Path, default=Path("replay-report.json"))
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_suite(Path(work_dir), args.files, iterations=args.iterations, seed=args.seed)
+        if not args.skip_startup:
+            results += run_startup(args.iterations)[0]
+        save_report(build_report(results, args.files, args.seed), args.output)
+        _print_results(results)
+        print(f"Report written to {args.output}")
+        return 0
+
+    if args.command == "startup":
+        results, traced = run_startup(args.iterations)
+        _print_results(results)
+        print("\nSlowest dependencies imported by the agent:")
+        for module, milliseconds in import_profile():
+            print(f"  {module:<40} {milliseconds:9.1f} ms")
+        failed = False
+        loaded = deferred_modules_loaded(traced)
+        if loaded:
+            print(f"\nImported at startup but meant to be deferred: {', '.join(loaded)}")
+            failed = True
+        ready = next(result for result in results if result.name == "startup_ready")
+        if args.budget_ms is not None and ready.p50_ms > args.budget_ms:
+            print(f"\nTime-to-ready {ready.p50_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+            failed = True
+        return 1 if failed else 0
+
+    if args.command == "replay":
+        conversations = repeat_conversations(load_conversations(args.conversations), args.repeat)
+        model = ScriptedModel(
+            tools=[name for name in args.tools.split(",") if name],
+            latency=args.model_latency_ms / 1000,
+            delta_delay=args.delta_delay_ms / 1000,
+        )
+        with tempfile.TemporaryDirectory() as work_dir:
+            results, details = run_replay(
+                Path(work_dir),
+                conversations,
+                num_files=args.files,
+                concurrency=args.concurrency,
+                model=model,
+                freshness_seconds=args.freshness_seconds,
+                stream_flush_bytes=args.flush_bytes,
+                seed=args.seed,
+            )
+        report = build_report(results, args.files, args.seed)
+        report["replay"] = {**details, "concurrency": args.concurrency}
+        save_report(report, args.output)
+        _print_results(results)
+        print(f"\n{details['turns']} turns in {details['sessions']} sessions, {len(details['errors'])} failed")
+        for name, tool in details["tools"].items():
+            print(f"  {name:<20} mean {tool['mean_ms']:9.2f} ms  {tool['share_of_turn_time'] * 100:5.1f}% of turn time")
+        if details["context_tokens"]:
+            tokens = details["context_tokens"]
+            print(f"  context tokens       p50 {tokens['p50']:9.0f}     p95 {tokens['p95']:9.0f}     max {tokens['max']:.0f}")
+        print(f"Report written to {args.output}")
+        return 1 if details["errors"] else 0
+
+    changes = compare(load_report(args.base), load_report(args.head), threshold=args.threshold)
+    print(format_comparison(changes))
+    return 1 if any(change.regressed for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Synthetic knowledge corpora and local git origins for benchmarks.
+
+Corpora are deterministic for a given seed: the same arguments always
+produce byte-identical files, so reports from different commits measure
+the code, not the data.
+"""
+
+import random
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import git
+
+# Vocabulary resembling the support wiki: account, billing and AWS operations
+JAPANESE_WORDS = (
+    "請求書", "支払い", "アカウント", "契約", "更新", "手続き", "申請", "承認",
+    "料金", "見積もり", "設定", "権限", "管理者", "利用者", "確認", "変更",
+    "解約", "問い合わせ", "障害", "復旧", "監視", "通知", "予算", "割引",
+    "リザーブド", "インスタンス", "サポート", "プラン", "組織", "移行",
+)
+JAPANESE_PARTICLES = ("の", "を", "に", "は", "が", "で", "と", "から")
+ENGLISH_WORDS = (
+    "account", "invoice", "billing", "payment", "contract", "renewal", "request",
+    "approval", "budget", "discount", "savings", "plan", "support", "organization",
+    "permission", "role", "policy", "console", "region", "instance", "reserved",
+    "migration", "alert", "monitoring", "incident", "recovery", "cost", "usage",
+)
+SECTIONS = ("概要", "Overview", "手順", "Steps", "注意事項", "Notes", "FAQ", "参考")
+
+COMMIT_AUTHOR = git.Actor("benchmark", "benchmark@example.com")
+
+
+def _japanese_sentence(rng: random.Random) -> str:
+    """Build a sentence alternating nouns and particles."""
+    words = rng.choices(JAPANESE_WORDS, k=rng.randint(4, 9))
+    parts = [word + rng.choice(JAPANESE_PARTICLES) for word in words[:-1]]
+    return "".join(parts) + words[-1] + "します。"
+
+
+def _english_sentence(rng: random.Random) -> str:
+    """Build a lowercase pseudo-sentence from the English vocabulary."""
+    words = rng.choices(ENGLISH_WORDS, k=rng.randint(6, 14))
+    return " ".join(words).capitalize() + "."
+
+
+def generate_document(rng: random.Random, title: str, japanese_ratio: float = 0.7) -> str:
+    """Generate one markdown document with nested headings.
+
+    Args:
+        rng: Random source
+        title: Top-level heading
+        japanese_ratio: Probability that a paragraph is Japanese
+
+    Returns:
+        Markdown text
+    """
+    lines = [f"# {title}", ""]
+    for section in rng.sample(SECTIONS, k=rng.randint(2, 5)):
+        lines += [f"## {section}", ""]
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.3:
+                lines += [f"### {rng.choice(ENGLISH_WORDS)} {rng.choice(JAPANESE_WORDS)}", ""]
+            sentence = _japanese_sentence if rng.random() < japanese_ratio else _english_sentence
+            lines += [" ".join(sentence(rng) for _ in range(rng.randint(2, 6))), ""]
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    root: Path,
+    num_files: int,
+    seed: int = 0,
+    japanese_ratio: float = 0.7,
+    files_per_dir: int = 100,
+) -> list[Path]:
+    """Write a synthetic markdown corpus.
+
+    Files are spread over subdirectories of files_per_dir files each, so
+    large corpora look like a real wiki tree rather than one huge directory.
+
+    Args:
+        root: Directory to write into (created if missing)
+        num_files: Number of markdown files (100 to 100k is the intended range)
+        seed: Random seed; equal seeds give identical corpora
+        japanese_ratio: Share of Japanese paragraphs
+        files_per_dir: Maximum files per subdirectory
+
+    Returns:
+        Written file paths relative to root
+    """
+    rng = random.Random(seed)
+    paths = []
+    for number in range(num_files):
+        relative = Path(f"section-{number // files_per_dir:04d}") / f"page-{number:06d}.md"
+        title = f"{rng.choice(JAPANESE_WORDS)} {rng.choice(ENGLISH_WORDS)} {number}"
+        (root / relative.parent).mkdir(parents=True, exist_ok=True)
+        (root / relative).write_text(generate_document(rng, title, japanese_ratio), encoding="utf-8")
+        paths.append(relative)
+    return paths
+
+
+def create_origin(
+    path: Path,
+    num_files: int,
+    knowledge_dir: str = "docs",
+    seed: int = 0,
+    japanese_ratio: float = 0.7,
+) -> Path:
+    """Create a bare git repository holding a synthetic corpus.
+
+    The repository is built in a scratch working copy and cloned bare, so
+    clones from it exercise the same code paths as a remote (use
+    origin_url() for a file:// URL that honors depth and filters).
+
+    Args:
+        path: Location of the bare repository
+        num_files: Number of markdown files under knowledge_dir
+        knowledge_dir: Directory holding the corpus
+        seed: Corpus random seed
+        japanese_ratio: Share of Japanese paragraphs
+
+    Returns:
+        Path of the bare repository
+    """
+    work_path = path.with_name(f"{path.name}.work")
+    repo = git.Repo.init(work_path)
+    generate_corpus(work_path / knowledge_dir, num_files, seed=seed, japanese_ratio=japanese_ratio)
+    (work_path / "README.md").write_text("# Benchmark origin\n", encoding="utf-8")
+    repo.git.add(A=True)
+    repo.index.commit("initial corpus", author=COMMIT_AUTHOR, committer=COMMIT_AUTHOR)
+
+    bare = git.Repo.clone_from(work_path, path, bare=True)
+    with bare.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    repo.close()
+    shutil.rmtree(work_path)
+    return path
+
+
+def origin_url(path: Path) -> str:
+    """Return the file:// URL of an origin created by create_origin()."""
+    return path.absolute().as_uri()
+
+
+def push_changes(
+    origin: Path,
+    num_changes: int,
+    knowledge_dir: str = "docs",
+    seed: int = 1,
+    scratch: Optional[Path] = None,
+) -> str:
+    """Commit edits to existing corpus files and push them to the origin.
+
+    Args:
+        origin: Bare repository created by create_origin()
+        num_changes: Number of files to rewrite
+        knowledge_dir: Directory holding the corpus
+        seed: Random seed for the choice of files and their new content
+        scratch: Working copy location (defaults to a sibling of origin)
+
+    Returns:
+        SHA of the pushed commit
+    """
+    scratch = scratch or origin.with_name(f"{origin.name}.push")
+    if scratch.exists():
+        shutil.rmtree(scratch)
+    repo = git.Repo.clone_from(origin, scratch)
+    rng = random.Random(seed)
+    files = sorted((scratch / knowledge_dir).rglob("*.md"))
+    for file_path in rng.sample(files, k=min(num_changes, len(files))):
+        file_path.write_text(generate_document(rng, file_path.stem), encoding="utf-8")
+    repo.git.add(A=True)
+    commit = repo.index.commit(f"edit {num_changes} files", author=COMMIT_AUTHOR, committer=COMMIT_AUTHOR)
+    repo.remotes.origin.push()
+    repo.close()
+    shutil.rmtree(scratch)
+    return commit.hexsha
@@ -0,0 +1,378 @@
+"""Offline end-to-end replay of recorded conversations.
+
+Conversations are played through the same path as an AgentCore
+invocation (agent.registry.stream_invocation): the registry, a session
+agent, knowledge sync against a local git origin, tool execution and
+event streaming. Only the model endpoint is replaced, by ScriptedModel,
+which answers every user message with fixed tool calls (search_wiki with
+the message's first line, optionally list_wiki_files) and then streams
+text quoted from the tool results. No network is needed, and the same
+input always produces the same turns.
+
+Conversations use the requests.jsonl line format ({"request_id", "title",
+"body"}); the prompt is the title followed by the body. Lines sharing a
+"session_id" form one multi-turn conversation, in file order; any other
+line is a conversation of its own.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from strands.models import Model
+
+from agent.knowledge.packing import estimate_tokens
+from agent.registry import AgentConfig, AgentRegistry, stream_invocation
+from agent.support_agent import SupportAgent
+from benchmarks.corpus import create_origin, origin_url
+from benchmarks.runner import Result, percentile, summarize
+from benchmarks.startup import write_spec_cache
+
+DEFAULT_CONVERSATIONS = Path(__file__).with_name("conversations.jsonl")
+
+# Longest search query the scripted model sends
+MAX_QUERY_CHARS = 100
+
+
+@dataclass(frozen=True)
+class ReplayTurn:
+    """One recorded user message.
+
+    Attributes:
+        session_id: Conversation the turn belongs to
+        request_id: Identifier of the recorded line
+        prompt: User message
+    """
+
+    session_id: str
+    request_id: str
+    prompt: str
+
+
+def load_conversations(path: Path) -> list[list[ReplayTurn]]:
+    """Read conversations from a requests.jsonl-style file.
+
+    Args:
+        path: JSON Lines file
+
+    Returns:
+        Conversations (lists of turns), in order of their first line
+    """
+    conversations: dict[str, list[ReplayTurn]] = {}
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        request_id = str(record.get("request_id", number))
+        session_id = str(record.get("session_id") or request_id)
+        prompt = "\n\n".join(part for part in (record.get("title"), record.get("body")) if part)
+        conversations.setdefault(session_id, []).append(ReplayTurn(session_id, request_id, prompt))
+    return list(conversations.values())
+
+
+def repeat_conversations(conversations: Sequence[list[ReplayTurn]], times: int) -> list[list[ReplayTurn]]:
+    """Copy conversations under new session ids to scale up a replay."""
+    if times <= 1:
+        return list(conversations)
+    return [
+        [ReplayTurn(f"{turn.session_id}#{copy}", turn.request_id, turn.prompt) for turn in conversation]
+        for copy in range(times)
+        for conversation in conversations
+    ]
+
+
+def _text(content: Sequence[dict]) -> str:
+    return "\n".join(block["text"] for block in content if "text" in block)
+
+
+class ScriptedModel(Model):
+    """Deterministic stand-in for the Bedrock model.
+
+    A turn takes two model calls: the first requests the scripted tools,
+    the second streams an answer built from their results. Usage metadata
+    reports the estimated tokens of everything sent to the model (system
+    prompt, messages and tool specs), i.e. the tokens in context.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[str] = ("search_wiki",),
+        answer_chars: int = 400,
+        chunk_chars: int = 8,
+        latency: float = 0.0,
+        delta_delay: float = 0.0,
+        structured: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Initialize the script.
+
+        Args:
+            tools: Tools called on every user message ("search_wiki", "list_wiki_files")
+            answer_chars: Length of the streamed answer
+            chunk_chars: Characters per streamed text delta
+            latency: Seconds before the first event of every model call
+            delta_delay: Seconds between streamed text deltas
+            structured: Field values of every structured_output result
+        """
+        self.tools = tuple(tools)
+        self.answer_chars = answer_chars
+        self.chunk_chars = chunk_chars
+        self.latency = latency
+        self.delta_delay = delta_delay
+        self.structured = dict(structured or {})
+
+    def update_config(self, **model_config: Any) -> None:
+        pass
+
+    def get_config(self) -> dict[str, Any]:
+        return {"tools": self.tools, "answer_chars": self.answer_chars, "chunk_chars": self.chunk_chars}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Return the scripted field values as an output_model instance."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        yield {"output": output_model(**self.structured)}
+
+    def _tool_input(self, name: str, prompt: str) -> dict[str, Any]:
+        if name == "search_wiki":
+            return {"query": prompt.strip().splitlines()[0][:MAX_QUERY_CHARS] if prompt.strip() else ""}
+        return {}
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt=None,
+        *,
+        system_prompt_content=None,
+        **kwargs,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Answer with tool calls, or with text once tool results arrived."""
+        system = system_prompt or _text(system_prompt_content or [])
+        context = estimate_tokens(
+            system + json.dumps(messages, ensure_ascii=False, default=str) + json.dumps(tool_specs or [])
+        )
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        last = messages[-1]["content"] if messages else []
+        results = [block["toolResult"] for block in last if "toolResult" in block]
+        yield {"messageStart": {"role": "assistant"}}
+        if not results and self.tools:
+            prompt = _text(last)
+            for index, name in enumerate(self.tools):
+                tool_input = json.dumps(self._tool_input(name, prompt), ensure_ascii=False)
+                yield {"contentBlockStart": {
+                    "contentBlockIndex": index,
+                    "start": {"toolUse": {"toolUseId": f"tool-{len(messages)}-{index}", "name": name}},
+                }}
+                yield {"contentBlockDelta": {"contentBlockIndex": index, "delta": {"toolUse": {"input": tool_input}}}}
+                yield {"contentBlockStop": {"contentBlockIndex": index}}
+            stop_reason, answer = "tool_use", ""
+        else:
+            quoted = " ".join(_text(result["content"]) for result in results)
+            answer = (quoted or "No tool results were available.")[:self.answer_chars]
+            for start in range(0, len(answer), self.chunk_chars):
+                if self.delta_delay:
+                    await asyncio.sleep(self.delta_delay)
+                yield {"contentBlockDelta": {"delta": {"text": answer[start:start + self.chunk_chars]}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        output = estimate_tokens(answer)
+        yield {"metadata": {
+            "usage": {"inputTokens": context, "outputTokens": output, "totalTokens": context + output},
+            "metrics": {"latencyMs": 0},
+        }}
+
+
+@dataclass(frozen=True)
+class TurnRecord:
+    """Measurements of one replayed turn.
+
+    Attributes:
+        session_id: Conversation id
+        request_id: Recorded line id
+        latency_s: Time until the stream ended
+        first_text_s: Time until the first streamed text (None if no text arrived)
+        events: Events streamed to the client
+        tool_seconds: Tool execution time per tool name
+        context_tokens: Largest context of the turn's model calls (estimated tokens)
+        input_tokens: Context tokens summed over the turn's model calls
+        error: Exception raised by the turn, if any
+    """
+
+    session_id: str
+    request_id: str
+    latency_s: float
+    first_text_s: Optional[float]
+    events: int
+    tool_seconds: dict[str, float] = field(default_factory=dict)
+    context_tokens: int = 0
+    input_tokens: int = 0
+    error: Optional[str] = None
+
+
+def _tool_times(agent: Any) -> dict[str, float]:
+    """Cumulative tool time per tool name of an agent."""
+    return {name: metrics.total_time for name, metrics in agent.event_loop_metrics.tool_metrics.items()}
+
+
+async def replay_turn(registry: AgentRegistry, turn: ReplayTurn) -> TurnRecord:
+    """Play one turn through stream_invocation and measure it."""
+    agent = registry.get_agent(turn.session_id)
+    tools_before = _tool_times(agent)
+    first_text = None
+    events = 0
+    usages: list[int] = []
+    error = None
+    start = time.perf_counter()
+    try:
+        async for message in stream_invocation({"prompt": turn.prompt, "session_id": turn.session_id}, registry):
+            events += 1
+            event = message["event"]
+            if first_text is None and "text" in event.get("contentBlockDelta", {}).get("delta", {}):
+                first_text = time.perf_counter() - start
+            if "metadata" in event:
+                usages.append(event["metadata"].get("usage", {}).get("inputTokens", 0))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    latency = time.perf_counter() - start
+    tool_seconds = {
+        name: total - tools_before.get(name, 0.0)
+        for name, total in _tool_times(agent).items()
+        if total > tools_before.get(name, 0.0)
+    }
+    return TurnRecord(
+        turn.session_id, turn.request_id, latency, first_text, events,
+        tool_seconds, max(usages, default=0), sum(usages), error,
+    )
+
+
+async def replay(
+    registry: AgentRegistry,
+    conversations: Sequence[Sequence[ReplayTurn]],
+    concurrency: int = 4,
+) -> list[TurnRecord]:
+    """Replay conversations, running up to concurrency of them at a time.
+
+    Turns of one conversation run in order; conversations interleave.
+
+    Args:
+        registry: Registry serving the session agents
+        conversations: Conversations to play
+        concurrency: Conversations in flight at once
+
+    Returns:
+        Records of all turns, in completion order
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+    records: list[TurnRecord] = []
+
+    async def play(conversation: Sequence[ReplayTurn]) -> None:
+        async with slots:
+            for turn in conversation:
+                records.append(await replay_turn(registry, turn))
+
+    await asyncio.gather(*(play(conversation) for conversation in conversations))
+    return records
+
+
+def _distribution(values: Sequence[float]) -> dict[str, float]:
+    """Mean and nearest-rank percentiles of a non-empty sequence."""
+    return {
+        "mean": statistics.fmean(values),
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values),
+    }
+
+
+def summarize_replay(records: Sequence[TurnRecord]) -> tuple[list[Result], dict[str, Any]]:
+    """Aggregate turn records.
+
+    Args:
+        records: Replayed turns
+
+    Returns:
+        (replay_turn and replay_first_text results for benchmark reports,
+        details: turn counts, tool time breakdown and tokens in context)
+    """
+    completed = [record for record in records if record.error is None]
+    results = []
+    if completed:
+        results.append(summarize("replay_turn", [record.latency_s for record in completed], 0))
+    first_texts = [record.first_text_s for record in completed if record.first_text_s is not None]
+    if first_texts:
+        results.append(summarize("replay_first_text", first_texts, 0))
+
+    turn_time = sum(record.latency_s for record in completed)
+    tools: dict[str, dict[str, float]] = {}
+    for record in completed:
+        for name, seconds in record.tool_seconds.items():
+            entry = tools.setdefault(name, {"turns": 0, "total_ms": 0.0})
+            entry["turns"] += 1
+            entry["total_ms"] += seconds * 1000
+    for entry in tools.values():
+        entry["mean_ms"] = entry["total_ms"] / entry["turns"]
+        entry["share_of_turn_time"] = entry["total_ms"] / 1000 / turn_time if turn_time else 0.0
+
+    details = {
+        "turns": len(records),
+        "sessions": len({record.session_id for record in records}),
+        "errors": {record.request_id: record.error for record in records if record.error},
+        "tools": tools,
+        "context_tokens": _distribution([record.context_tokens for record in completed]) if completed else {},
+        "events_per_turn": _distribution([record.events for record in completed]) if completed else {},
+    }
+    return results, details
+
+
+def run_replay(
+    work_dir: Path,
+    conversations: Sequence[Sequence[ReplayTurn]],
+    num_files: int = 1000,
+    concurrency: int = 4,
+    model: Optional[ScriptedModel] = None,
+    freshness_seconds: float = 300.0,
+    stream_flush_bytes: int = 0,
+    seed: int = 0,
+) -> tuple[list[Result], dict[str, Any]]:
+    """Replay conversations against a fresh synthetic knowledge origin.
+
+    The first turn pays for the initial clone and index build, like the
+    first invocation of a new container; later turns reuse both.
+
+    Args:
+        work_dir: Scratch directory for the origin, clone and tool spec cache
+        conversations: Conversations to play
+        num_files: Corpus size
+        concurrency: Conversations in flight at once
+        model: Scripted model (defaults to ScriptedModel())
+        freshness_seconds: Sync freshness window (small values exercise background refreshes)
+        stream_flush_bytes: Text-delta coalescing size (0 streams every delta)
+        seed: Corpus random seed
+
+    Returns:
+        (results, details) as returned by summarize_replay()
+    """
+    origin = create_origin(work_dir / "origin.git", num_files, seed=seed)
+    config = AgentConfig(
+        repo_url=origin_url(origin),
+        local_path=str(work_dir / "repo_data"),
+        freshness_seconds=freshness_seconds,
+        tool_specs=str(write_spec_cache(work_dir)),
+        stream_flush_bytes=stream_flush_bytes,
+    )
+    factory = partial(SupportAgent, model=model or ScriptedModel(), callback_handler=None)
+    registry = AgentRegistry(config, max_sessions=max(256, len(conversations)), agent_factory=factory)
+    try:
+        records = asyncio.run(replay(registry, conversations, concurrency))
+    finally:
+        registry.close()
+    return summarize_replay(records)
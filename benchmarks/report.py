@@ -0,0 +1,87 @@
+"""Benchmark report persistence and comparison between runs."""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Metrics compared between reports and whether a higher value is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput_per_s": True,
+    "peak_memory_bytes": False,
+}
+
+
+@dataclass(frozen=True)
+class Change:
+    """Difference of one metric between two reports.
+
+    Attributes:
+        scenario: Scenario name
+        metric: Metric name
+        base: Value in the baseline report
+        head: Value in the new report
+        ratio: head / base (None when base is 0)
+        regressed: True if head is worse than base by more than the threshold
+    """
+
+    scenario: str
+    metric: str
+    base: float
+    head: float
+    ratio: Optional[float]
+    regressed: bool
+
+
+def save_report(report: dict, path: Path) -> None:
+    """Write a report as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_report(path: Path) -> dict:
+    """Read a report written by save_report()."""
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(base: dict, head: dict, threshold: float = 0.1) -> list[Change]:
+    """Compare the scenarios present in both reports.
+
+    Args:
+        base: Baseline report
+        head: New report
+        threshold: Relative change beyond which a worse value counts as a regression
+
+    Returns:
+        One change per scenario and metric, in head's scenario order
+    """
+    changes = []
+    for scenario, head_result in head["results"].items():
+        base_result = base["results"].get(scenario)
+        if base_result is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            base_value, head_value = base_result[metric], head_result[metric]
+            ratio = head_value / base_value if base_value else None
+            if ratio is None:
+                regressed = False
+            elif higher_is_better:
+                regressed = ratio < 1 - threshold
+            else:
+                regressed = ratio > 1 + threshold
+            changes.append(Change(scenario, metric, base_value, head_value, ratio, regressed))
+    return changes
+
+
+def format_comparison(changes: list[Change]) -> str:
+    """Render changes as a fixed-width table."""
+    lines = [f"{'scenario':<20} {'metric':<18} {'base':>14} {'head':>14} {'change':>9}"]
+    for change in changes:
+        delta = "n/a" if change.ratio is None else f"{(change.ratio - 1) * 100:+.1f}%"
+        marker = "  REGRESSION" if change.regressed else ""
+        lines.append(
+            f"{change.scenario:<20} {change.metric:<18} {change.base:>14.2f} {change.head:>14.2f} {delta:>9}{marker}"
+        )
+    return "\n".join(lines)
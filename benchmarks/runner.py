@@ -0,0 +1,256 @@
+"""Benchmark scenarios for the knowledge path.
+
+Every scenario is timed without tracing first, then run once more under
+tracemalloc to record peak Python memory, so the tracing overhead never
+leaks into latency numbers.
+"""
+
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.tools import SupportAgentTools
+from benchmarks.corpus import create_origin, origin_url, push_changes
+
+DEFAULT_QUERIES = (
+    "請求書の支払い",
+    "アカウント 権限 変更",
+    "reserved instance discount",
+    "budget alert monitoring",
+    "サポート プラン 解約 手続き",
+)
+
+
+@dataclass(frozen=True)
+class Result:
+    """Summary of one scenario.
+
+    Attributes:
+        name: Scenario name
+        iterations: Number of timed runs
+        mean_ms: Mean latency
+        p50_ms: Median latency
+        p95_ms: 95th percentile latency
+        min_ms: Fastest run
+        max_ms: Slowest run
+        throughput_per_s: Runs per second of timed work
+        peak_memory_bytes: Peak traced allocation during one extra run
+    """
+
+    name: str
+    iterations: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    min_ms: float
+    max_ms: float
+    throughput_per_s: float
+    peak_memory_bytes: int
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    iterations: int = 10,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Result:
+    """Time a callable and record its peak memory.
+
+    Args:
+        name: Scenario name
+        func: Operation to measure
+        iterations: Number of timed runs
+        warmup: Untimed runs before timing
+        setup: Untimed preparation before every run (e.g. clearing caches)
+
+    Returns:
+        Latency, throughput and memory summary
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    latencies = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return summarize(name, latencies, peak)
+
+
+def summarize(name: str, latencies: Sequence[float], peak_memory_bytes: int) -> Result:
+    """Build a Result from per-run latencies in seconds."""
+    total = sum(latencies)
+    return Result(
+        name=name,
+        iterations=len(latencies),
+        mean_ms=statistics.fmean(latencies) * 1000,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        min_ms=min(latencies) * 1000,
+        max_ms=max(latencies) * 1000,
+        throughput_per_s=len(latencies) / total if total else 0.0,
+        peak_memory_bytes=peak_memory_bytes,
+    )
+
+
+def _source(url: str, local_path: Path) -> WikiKnowledgeSource:
+    """Create a source that never refreshes in the background during a run."""
+    return WikiKnowledgeSource(url, "docs", local_path, freshness_seconds=float("inf"))
+
+
+def _remove_checkout(source: WikiKnowledgeSource) -> None:
+    """Delete everything a source wrote next to its local_path."""
+    for path in (source.local_path, source.store_path, source.snapshots_path, source.lock_path):
+        if path.is_symlink() or path.is_file():
+            path.unlink()
+        elif path.exists():
+            shutil.rmtree(path)
+
+
+def run_suite(
+    work_dir: Path,
+    num_files: int,
+    iterations: int = 5,
+    queries: Sequence[str] = DEFAULT_QUERIES,
+    seed: int = 0,
+) -> list[Result]:
+    """Run all knowledge-path scenarios against a fresh synthetic origin.
+
+    Args:
+        work_dir: Scratch directory for the origin and clones
+        num_files: Corpus size
+        iterations: Timed runs per scenario (clone and pull scenarios use fewer)
+        queries: search_wiki queries; one run searches all of them
+        seed: Corpus random seed
+
+    Returns:
+        One result per scenario
+    """
+    origin = create_origin(work_dir / "origin.git", num_files, seed=seed)
+    url = origin_url(origin)
+    results = []
+
+    clone_source = _source(url, work_dir / "clone")
+    results.append(
+        measure(
+            "clone",
+            clone_source.clone_or_update,
+            iterations=max(1, iterations // 2),
+            warmup=0,
+            setup=lambda: _remove_checkout(clone_source),
+        )
+    )
+
+    source = _source(url, work_dir / "wiki")
+    source.sync()
+    results.append(measure("pull_noop", source.clone_or_update, iterations=iterations))
+
+    pushes = iter(range(1000))
+    results.append(
+        measure(
+            "pull_10_changes",
+            source.clone_or_update,
+            iterations=max(1, iterations // 2),
+            warmup=0,
+            setup=lambda: push_changes(origin, 10, seed=next(pushes)),
+        )
+    )
+
+    results.append(measure("list_files", source.list_files, iterations=iterations))
+
+    files = sorted(source.list_files())
+    sample = files[:: max(1, len(files) // 100)]
+
+    def load_sample():
+        for path in sample:
+            source.load_file(path)
+
+    results.append(measure("load_file_cold", load_sample, iterations=iterations, setup=source.file_cache.clear))
+    results.append(measure("load_file_warm", load_sample, iterations=iterations))
+
+    def build_index():
+        SupportAgentTools(source).refresh_index()
+
+    results.append(measure("index_build", build_index, iterations=max(1, iterations // 2), warmup=0))
+
+    tools = SupportAgentTools(source)
+    tools.refresh_index()
+
+    def search_all():
+        for query in queries:
+            tools.search_wiki(query)
+
+    results.append(measure("search_wiki_cold", search_all, iterations=iterations, setup=tools.query_cache.clear))
+    results.append(measure("search_wiki_warm", search_all, iterations=iterations))
+    results.append(measure("search_batch", lambda: tools.search_batch(queries), iterations=iterations))
+    results.append(measure("list_wiki_files", tools.list_wiki_files, iterations=iterations))
+    return results
+
+
+def _code_revision() -> Optional[str]:
+    """Return the commit of the code under test, if run from a git checkout."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def build_report(results: Sequence[Result], num_files: int, seed: int) -> dict:
+    """Wrap results with the metadata needed to compare runs.
+
+    Args:
+        results: Scenario results
+        num_files: Corpus size
+        seed: Corpus random seed
+
+    Returns:
+        JSON-serializable report
+    """
+    return {
+        "meta": {
+            "revision": _code_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "num_files": num_files,
+            "seed": seed,
+        },
+        "results": {result.name: asdict(result) for result in results},
+    }
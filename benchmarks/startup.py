@@ -0,0 +1,160 @@
+"""Process startup benchmarks.
+
+Every run starts a fresh interpreter, imports the agent and builds a
+registry with one session agent, the work a container does before it can
+serve its first request. Import time and time-to-ready are reported by the
+child process itself; one extra run under tracemalloc records peak memory.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.runner import Result, summarize
+
+# Modules the agent must not import before a request needs them
+DEFERRED_MODULES = (
+    "strands_tools.calculator",
+    "strands_tools.http_request",
+    "sympy",
+    "numpy",
+)
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, sys, time, tracemalloc
+if sys.argv[1] == "trace":
+    tracemalloc.start()
+start = time.perf_counter()
+from agent.registry import AgentConfig, AgentRegistry
+imported = time.perf_counter()
+config = AgentConfig(repo_url="", local_path=sys.argv[2], tool_specs=sys.argv[3] or None)
+AgentRegistry(config).get_agent("startup")
+ready = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "ready_s": ready - start,
+    "peak_memory_bytes": tracemalloc.get_traced_memory()[1],
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+@dataclass(frozen=True)
+class StartupRun:
+    """Measurements reported by one child process.
+
+    Attributes:
+        import_s: Time to import the agent package
+        ready_s: Time until the first session agent exists
+        peak_memory_bytes: Peak traced allocation (0 unless traced)
+        modules: Modules loaded once ready
+    """
+
+    import_s: float
+    ready_s: float
+    peak_memory_bytes: int
+    modules: tuple[str, ...]
+
+
+def _run_child(work_dir: Path, spec_path: Optional[Path], trace: bool = False) -> StartupRun:
+    """Start an interpreter that imports and builds the agent."""
+    output = subprocess.run(
+        [
+            sys.executable, "-c", _CHILD,
+            "trace" if trace else "time",
+            str(work_dir / "repo"),
+            str(spec_path or ""),
+        ],
+        cwd=_PROJECT_ROOT,
+        env={**os.environ, "AGENT_TELEMETRY": "off"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    data = json.loads(output.stdout.strip().splitlines()[-1])
+    return StartupRun(data["import_s"], data["ready_s"], data["peak_memory_bytes"], tuple(data["modules"]))
+
+
+def write_spec_cache(work_dir: Path) -> Path:
+    """Write the tool spec cache the container image ships with."""
+    from agent.lazy_tools import write_tool_specs
+
+    spec_path = work_dir / "tool_specs.json"
+    write_tool_specs(spec_path)
+    return spec_path
+
+
+def run_startup(iterations: int = 5, spec_path: Optional[Path] = None) -> tuple[list[Result], StartupRun]:
+    """Measure startup in fresh interpreters.
+
+    Args:
+        iterations: Timed child processes
+        spec_path: Tool spec cache (None measures with a freshly written one)
+
+    Returns:
+        (startup_import and startup_ready results, the traced run)
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        if spec_path is None:
+            spec_path = write_spec_cache(work_dir)
+        runs = [_run_child(work_dir, spec_path) for _ in range(iterations)]
+        traced = _run_child(work_dir, spec_path, trace=True)
+    results = [
+        summarize("startup_import", [run.import_s for run in runs], traced.peak_memory_bytes),
+        summarize("startup_ready", [run.ready_s for run in runs], traced.peak_memory_bytes),
+    ]
+    return results, traced
+
+
+def deferred_modules_loaded(run: StartupRun) -> list[str]:
+    """Return the DEFERRED_MODULES a startup run imported."""
+    return [module for module in DEFERRED_MODULES if module in run.modules]
+
+
+_IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def import_profile(module: str = "agent.registry", top: int = 15) -> list[tuple[str, float]]:
+    """Find the dependencies that dominate importing a module.
+
+    Uses the interpreter's -X importtime report and keeps every module
+    imported directly by one of the project's own ("agent.") modules, with
+    the cumulative time of its whole import subtree.
+
+    Args:
+        module: Module to import in a fresh interpreter
+        top: Number of entries to return
+
+    Returns:
+        (module, cumulative milliseconds) pairs, slowest first
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Children are reported before their parent, so walk the report backwards
+    parents: list[str] = []
+    costs: dict[str, float] = {}
+    for line in reversed(output.stderr.splitlines()):
+        match = _IMPORT_TIME.match(line)
+        if not match:
+            continue
+        depth = len(match.group(2)) // 2
+        name = match.group(3)
+        del parents[depth:]
+        parents.append(name)
+        if depth and parents[depth - 1].startswith("agent.") and not name.startswith("agent"):
+            costs[name] = max(costs.get(name, 0.0), int(match.group(1)) / 1000)
+    return sorted(costs.items(), key=lambda entry: -entry[1])[:top]
@@ -17,18 +17,25 @@ export class SupportAgentStack extends cdk.Stack {
       description: 'Name for the agent runtime',
     });
 
+    // Knowledge repository baked into the image at build time (see agent/prefetch.py)
+    const knowledgeBuildArgs: { [key: string]: string } = {
+      AGENT_REPO_URL: agentConfig.repo_url || '',
+      AGENT_REPO_REF: agentConfig.repo_ref || '',
+      AGENT_KNOWLEDGE_DIR: agentConfig.knowledge_dir || 'docs',
+      AGENT_LOCAL_PATH: agentConfig.local_path || './repo_data',
+    };
+
     const agentRuntimeArtifact = agentcore.AgentRuntimeArtifact.fromAsset(
       path.join(__dirname, '../../agent'),
       {
         platform: cdk.aws_ecr_assets.Platform.LINUX_ARM64,
+        buildArgs: knowledgeBuildArgs,
       }
     );
 
     const envVars: { [key: string]: string } = {
       AWS_DEFAULT_REGION: this.region,
-      AGENT_REPO_URL: agentConfig.repo_url || '',
-      AGENT_KNOWLEDGE_DIR: agentConfig.knowledge_dir || 'docs',
-      AGENT_LOCAL_PATH: agentConfig.local_path || './repo_data',
+      ...knowledgeBuildArgs,
     };
 
     if (agentConfig.system_prompt) {
@@ -0,0 +1,166 @@
+"""Tests for the benchmark corpus generator, runner and reports."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import git
+import pytest
+from pydantic import BaseModel
+
+from benchmarks.corpus import create_origin, generate_corpus, origin_url, push_changes
+from benchmarks.replay import DEFAULT_CONVERSATIONS, ScriptedModel, load_conversations, run_replay
+from benchmarks.report import compare
+from benchmarks.runner import build_report, measure, run_suite
+from benchmarks.startup import deferred_modules_loaded, import_profile, run_startup
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for test."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def test_generate_corpus_is_deterministic(temp_dir):
+    """Test that equal seeds produce identical mixed-language corpora."""
+    first = generate_corpus(temp_dir / "a", 120, seed=3)
+    second = generate_corpus(temp_dir / "b", 120, seed=3)
+
+    assert first == second
+    assert len({path.parent for path in first}) == 2  # 100 files per directory
+    for path in first:
+        assert (temp_dir / "a" / path).read_bytes() == (temp_dir / "b" / path).read_bytes()
+
+    text = (temp_dir / "a" / first[0]).read_text(encoding="utf-8")
+    assert text.startswith("# ")
+    assert "\n## " in text
+
+
+def test_origin_accepts_clones_and_pushes(temp_dir):
+    """Test that the bare origin serves clones and receives pushed edits."""
+    origin = create_origin(temp_dir / "origin.git", 10)
+    clone = git.Repo.clone_from(origin_url(origin), temp_dir / "clone")
+
+    assert git.Repo(origin).bare
+    assert len(list((temp_dir / "clone" / "docs").rglob("*.md"))) == 10
+
+    pushed = push_changes(origin, 3)
+    clone.remotes.origin.pull()
+
+    assert clone.head.commit.hexsha == pushed
+    assert len(clone.head.commit.stats.files) == 3
+
+
+def test_measure_summarizes_latency():
+    """Test that measure runs setup before every run and reports percentiles."""
+    calls = []
+    result = measure("noop", lambda: calls.append("run"), iterations=4, warmup=1, setup=lambda: calls.append("setup"))
+
+    # warmup + timed runs + one traced run, each preceded by setup
+    assert calls == ["setup", "run"] * 6
+    assert result.iterations == 4
+    assert result.min_ms <= result.p50_ms <= result.p95_ms <= result.max_ms
+    assert result.throughput_per_s > 0
+
+
+def test_run_suite_report(temp_dir):
+    """Test that a small suite run covers every scenario."""
+    results = run_suite(temp_dir, 20, iterations=1)
+    report = build_report(results, 20, seed=0)
+
+    assert set(report["results"]) == {
+        "clone", "pull_noop", "pull_10_changes", "list_files", "load_file_cold",
+        "load_file_warm", "index_build", "search_wiki_cold", "search_wiki_warm", "search_batch", "list_wiki_files",
+    }
+    assert report["meta"]["num_files"] == 20
+
+
+def test_compare_flags_regressions():
+    """Test that slower latency and lower throughput count as regressions."""
+    def report(p50, throughput):
+        return {"results": {"search": {
+            "p50_ms": p50, "p95_ms": p50, "throughput_per_s": throughput, "peak_memory_bytes": 100,
+        }}}
+
+    changes = {change.metric: change for change in compare(report(10.0, 100.0), report(12.0, 105.0))}
+
+    assert changes["p50_ms"].regressed
+    assert not changes["throughput_per_s"].regressed
+    assert not changes["peak_memory_bytes"].regressed
+    assert changes["p50_ms"].ratio == pytest.approx(1.2)
+
+
+def test_startup_is_ready_in_time_without_deferred_modules():
+    """Test that a new process is ready within a generous limit, without the deferred modules."""
+    results, traced = run_startup(iterations=1)
+
+    assert [result.name for result in results] == ["startup_import", "startup_ready"]
+    assert results[1].p50_ms >= results[0].p50_ms > 0
+    assert results[1].p50_ms < 10_000  # About 0.4 s here; only catches gross regressions
+    assert "agent.support_agent" in traced.modules
+    assert deferred_modules_loaded(traced) == []
+
+
+def test_import_profile_lists_dependencies():
+    """Test that the profile attributes import time to third-party modules."""
+    profile = import_profile("agent.knowledge.wiki_source")
+
+    assert "git" in dict(profile)
+    assert all(not module.startswith("agent") for module, _ in profile)
+
+
+def test_load_conversations_groups_sessions(temp_dir):
+    """Test that lines sharing a session_id form one conversation in file order."""
+    path = temp_dir / "conversations.jsonl"
+    path.write_text(
+        '{"request_id": "a", "session_id": "s", "title": "MFA", "body": "How?"}\n'
+        '{"request_id": "b", "title": "Billing", "body": "When?"}\n'
+        '\n'
+        '{"request_id": "c", "session_id": "s", "body": "Thanks"}\n',
+        encoding="utf-8",
+    )
+
+    conversations = load_conversations(path)
+
+    assert [[turn.request_id for turn in conversation] for conversation in conversations] == [["a", "c"], ["b"]]
+    assert conversations[0][0].prompt == "MFA\n\nHow?"
+    assert len(load_conversations(DEFAULT_CONVERSATIONS)) > 1
+
+
+def test_replay_runs_offline_end_to_end(temp_dir):
+    """Test that a replay drives tools and streaming and reports every turn."""
+    conversations = load_conversations(DEFAULT_CONVERSATIONS)[:3]
+    turns = sum(len(conversation) for conversation in conversations)
+    model = ScriptedModel(tools=("search_wiki", "list_wiki_files"), answer_chars=64, chunk_chars=4)
+
+    results, details = run_replay(temp_dir, conversations, num_files=20, concurrency=2, model=model)
+
+    assert [result.name for result in results] == ["replay_turn", "replay_first_text"]
+    assert results[0].iterations == details["turns"] == turns
+    assert details["errors"] == {}
+    assert set(details["tools"]) == {"search_wiki", "list_wiki_files"}
+    assert details["tools"]["search_wiki"]["turns"] == turns
+    assert details["context_tokens"]["p50"] > 0
+
+
+def test_replay_coalescing_reduces_events(temp_dir):
+    """Test that the streaming path under replay honors text-delta coalescing."""
+    conversations = load_conversations(DEFAULT_CONVERSATIONS)[:1]
+    model = ScriptedModel(answer_chars=64, chunk_chars=4)
+
+    _, plain = run_replay(temp_dir / "plain", conversations, num_files=10, model=model)
+    _, merged = run_replay(temp_dir / "merged", conversations, num_files=10, model=model, stream_flush_bytes=1024)
+
+    assert merged["events_per_turn"]["max"] < plain["events_per_turn"]["max"]
+
+
+def test_scripted_model_returns_structured_output():
+    """Test that structured_output yields the scripted values as the requested model."""
+    class Ticket(BaseModel):
+        priority: str
+
+    async def collect():
+        return [event async for event in ScriptedModel(structured={"priority": "high"}).structured_output(Ticket, [])]
+
+    assert asyncio.run(collect()) == [{"output": Ticket(priority="high")}]
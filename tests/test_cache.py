@@ -0,0 +1,145 @@
+"""Tests for knowledge caches."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from agent.knowledge.cache import FileCache, LRUCache, QueryCache
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the oldest unused entry is evicted over budget."""
+    cache = LRUCache(max_size=2, sizeof=lambda value: 1)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.size == 2
+
+
+def test_lru_counts_hits_and_misses():
+    """Test that lookups update hit and miss counters."""
+    cache = LRUCache(max_size=10, sizeof=lambda value: 1)
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_skips_values_over_budget():
+    """Test that values larger than the budget are not cached."""
+    cache = LRUCache(max_size=5, sizeof=len)
+    cache.put("big", "x" * 10)
+
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a WikiKnowledgeSource over a plain directory."""
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "guide.md").write_text("ＭＦＡ Guide", encoding="utf-8")
+    return WikiKnowledgeSource("https://example.com/repo", "docs", tmp_path)
+
+
+def test_load_file_is_served_from_cache(source):
+    """Test that repeated loads hit the cache."""
+    source.load_file(Path("guide.md"))
+    source.load_file(Path("guide.md"))
+
+    assert (source.file_cache.hits, source.file_cache.misses) == (1, 1)
+
+
+def test_load_file_detects_changed_file(source):
+    """Test that a changed file is re-read."""
+    path = source.knowledge_path / "guide.md"
+    source.load_file(Path("guide.md"))
+    path.write_text("Updated guide", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert source.load_file(Path("guide.md")) == "Updated guide"
+
+
+def test_invalidate_drops_all_forms(source):
+    """Test that invalidation removes text and normalized entries."""
+    cache = FileCache()
+    path = source.knowledge_path / "guide.md"
+    cache.load(path, lambda p: "text")
+    cache.load(path, lambda p: "normalized", kind="normalized")
+
+    cache.invalidate(path)
+
+    assert cache.size == 0
+
+
+def test_invalidate_under_drops_a_directory(source, tmp_path):
+    """Test that files below a directory are dropped and others kept."""
+    cache = FileCache()
+    cache.load(source.knowledge_path / "guide.md", lambda p: "guide")
+    other = tmp_path / "docs-old" / "guide.md"
+    other.parent.mkdir()
+    other.write_text("old", encoding="utf-8")
+    cache.load(other, lambda p: "old")
+
+    cache.invalidate_under(source.knowledge_path)
+
+    assert cache.size > 0
+    cache.load(other, lambda p: "old")
+    assert cache.hits == 1
+
+
+def test_query_cache_normalizes_queries():
+    """Test that case, width, spacing and order variants share an entry."""
+    from agent.knowledge.tokenizer import tokenize
+
+    cache = QueryCache()
+    cache.put("rev1", tokenize("MFA 設定"), "result")
+
+    assert cache.get("rev1", tokenize("  ｍｆａ　設定 ")) == "result"
+    assert cache.get("rev1", tokenize("設定 mfa")) == "result"
+    assert cache.get("rev1", tokenize("MFA")) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_query_cache_can_key_on_term_counts():
+    """Test that repeated terms get their own entry for count-sensitive rankers."""
+    cache = QueryCache(term_counts=True)
+    cache.put("rev1", ["mfa", "setup"], "once")
+
+    assert cache.get("rev1", ["setup", "mfa"]) == "once"
+    assert cache.get("rev1", ["mfa", "mfa", "mfa", "setup"]) is None
+
+
+def test_query_cache_is_keyed_by_revision():
+    """Test that a new revision invalidates older entries."""
+    cache = QueryCache()
+    cache.put("rev1", ["mfa"], "old")
+
+    assert cache.get("rev2", ["mfa"]) is None
+    assert cache.get("rev1", ["mfa"]) is None
+
+
+def test_query_cache_skips_unversioned_sources():
+    """Test that nothing is cached without a revision."""
+    cache = QueryCache()
+    cache.put(None, ["mfa"], "result")
+
+    assert cache.get(None, ["mfa"]) is None
+    assert len(cache) == 0
+
+
+def test_query_cache_evicts_lru_entries():
+    """Test that the cache is bounded by entry count."""
+    cache = QueryCache(max_entries=2)
+    for term in ["a", "b", "c"]:
+        cache.put("rev1", [term], term)
+
+    assert len(cache) == 2
+    assert cache.get("rev1", ["a"]) is None
@@ -0,0 +1,43 @@
+"""Tests for the knowledge catalog."""
+
+from agent.knowledge.catalog import CatalogEntry, KnowledgeCatalog, describe_document
+
+
+def test_describe_document_uses_headings():
+    """Test that title and top-level sections come from markdown headings."""
+    text = "# 請求書の発行\n\n## 概要\n\ntext\n\n### 詳細\n\n## **手順**\n\n```\n## not a heading\n```\n"
+
+    entry = describe_document("billing/invoice.md", text)
+
+    assert entry.title == "請求書の発行"
+    assert entry.headings == ("概要", "手順")
+    assert entry.size == len(text.encode("utf-8"))
+
+
+def test_describe_document_without_title_uses_file_name():
+    """Test that a document without a level-1 heading is titled by its file name."""
+    assert describe_document("notes/setup.txt", "plain text").title == "setup"
+
+
+def test_catalog_filters_and_sorts():
+    """Test prefix and normalized substring filters."""
+    catalog = KnowledgeCatalog()
+    catalog.add_document(CatalogEntry("login/mfa.md", "MFA", (), 10))
+    catalog.add_document(CatalogEntry("billing/payment.md", "Payment", ("クレジットカード",), 10))
+    catalog.add_document(CatalogEntry("billing/invoice.md", "Invoice", (), 10))
+
+    assert [e.path for e in catalog.documents("billing/")] == ["billing/invoice.md", "billing/payment.md"]
+    assert [e.path for e in catalog.documents(contains="ｸﾚｼﾞｯﾄ")] == ["billing/payment.md"]
+    assert [e.path for e in catalog.documents(contains="MFA")] == ["login/mfa.md"]
+
+
+def test_catalog_counts_assets_by_suffix():
+    """Test that non-document files are counted per suffix and can be removed."""
+    catalog = KnowledgeCatalog()
+    for path in ["assets/a.png", "assets/b.PNG", "assets/c.svg", "other/d.png"]:
+        catalog.add_asset(path)
+    catalog.remove("other/d.png")
+
+    assert catalog.asset_counts() == {".png": 2, ".svg": 1}
+    assert catalog.asset_counts("other/") == {}
+    assert len(catalog) == 0
@@ -0,0 +1,74 @@
+"""Tests for the markdown chunker."""
+
+from agent.knowledge.chunker import chunk_markdown, slugify
+
+DOCUMENT = """Intro text before headings.
+
+# Guide
+
+## Setup
+
+Install the **CLI**.
+
+```bash
+# not a heading
+npm install
+```
+
+## Setup
+
+Second setup section.
+
+### Notes
+
+Nested notes.
+"""
+
+
+def test_slugify_matches_github_anchors():
+    """Test that headings become lowercase hyphenated anchors."""
+    assert slugify("3.1 RAG Overview!") == "31-rag-overview"
+    assert slugify("適格請求書 の発行") == "適格請求書-の発行"
+
+
+def test_chunk_splits_at_headings():
+    """Test that each heading with body text becomes a passage."""
+    passages = chunk_markdown("guide.md", DOCUMENT)
+
+    assert [p.id for p in passages] == [
+        "guide.md",
+        "guide.md#setup",
+        "guide.md#setup-1",
+        "guide.md#notes",
+    ]
+    assert passages[0].heading == ""
+    assert passages[1].heading == "Guide > Setup"
+    assert passages[3].heading == "Guide > Setup > Notes"
+
+
+def test_chunk_ignores_headings_in_code_fences():
+    """Test that comment lines inside code blocks stay in their section."""
+    passages = chunk_markdown("guide.md", DOCUMENT)
+
+    assert "# not a heading" in passages[1].text
+    assert passages[1].text.startswith("## Setup")
+
+
+def test_chunk_ids_are_stable_across_edits():
+    """Test that editing one section leaves other passage ids unchanged."""
+    before = chunk_markdown("guide.md", DOCUMENT)
+    after = chunk_markdown("guide.md", DOCUMENT.replace("Nested notes.", "Changed notes."))
+
+    assert [p.id for p in before] == [p.id for p in after]
+
+
+def test_chunk_splits_long_sections():
+    """Test that oversized sections are split at paragraph boundaries."""
+    text = "# Long\n\n" + "\n\n".join(f"Paragraph {i} " + "x" * 50 for i in range(10))
+
+    passages = chunk_markdown("long.md", text, max_chars=200)
+
+    assert len(passages) > 1
+    assert passages[1].id == "long.md#long:2"
+    assert all(len(p.text) <= 200 for p in passages)
+    assert all(p.heading == "Long" for p in passages)
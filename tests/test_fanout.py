@@ -0,0 +1,254 @@
+"""Tests for concurrent search across knowledge sources."""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from agent.fanout import (
+    KnowledgeFanout,
+    KnowledgeSearchSource,
+    MemorySearchSource,
+    SourceHit,
+    WikiSearchSource,
+    merge_hits,
+)
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.tools import SupportAgentTools
+
+
+class StaticSource(KnowledgeSearchSource):
+    """Source returning fixed hits after a delay."""
+
+    def __init__(self, name, scores, delay=0.0, deadline=None, weight=1.0, error=None):
+        super().__init__(name, deadline, weight)
+        self.scores = scores
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def search(self, query, top_k):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [SourceHit(self.name, f"{self.name}-{i}", f"{query} text {i}", score)
+                for i, score in enumerate(self.scores[:top_k])]
+
+
+@pytest.fixture
+def local_folder(tmp_path):
+    """Create a plain document folder (no git repository)."""
+    folder = tmp_path / "runbooks"
+    folder.mkdir()
+    (folder / "restore.md").write_text("# Restore\n\nRestore the RDS snapshot before noon.\n")
+    (folder / "mfa.md").write_text("# MFA\n\nReset MFA devices in IAM.\n")
+    return folder
+
+
+def test_sources_are_searched_concurrently():
+    """Test that latency is the slowest source, not the sum."""
+    sources = [StaticSource(f"s{i}", [1.0], delay=0.2) for i in range(3)]
+    fanout = KnowledgeFanout(sources, deadline=2.0)
+
+    start = time.monotonic()
+    result = fanout.search("query")
+
+    assert time.monotonic() - start < 0.5
+    assert {hit.source for hit in result.hits} == {"s0", "s1", "s2"}
+    assert not result.partial
+
+
+def test_slow_source_degrades_to_partial_results():
+    """Test that a source missing its deadline doesn't block the others."""
+    slow = StaticSource("slow", [5.0], delay=5.0, deadline=0.1)
+    fast = StaticSource("fast", [1.0, 0.5])
+    fanout = KnowledgeFanout([slow, fast], deadline=2.0)
+
+    start = time.monotonic()
+    result = fanout.search("query")
+
+    assert time.monotonic() - start < 1.0
+    assert [hit.location for hit in result.hits] == ["fast-0", "fast-1"]
+    assert result.timed_out == ("slow",)
+    assert result.partial
+    slow.release.set()
+
+
+def test_busy_source_is_not_queried_again():
+    """Test that a source still running an earlier query is skipped."""
+    slow = StaticSource("slow", [1.0], delay=5.0, deadline=0.05)
+    fanout = KnowledgeFanout([slow, StaticSource("fast", [1.0])])
+    fanout.search("first")
+
+    result = fanout.search("second")
+
+    assert slow.calls == 1
+    assert result.timed_out == ("slow",)
+    slow.release.set()
+
+
+def test_concurrent_callers_both_get_results():
+    """Test that a source busy with another caller's query within its deadline still answers."""
+    sources = [StaticSource(f"s{i}", [1.0], delay=0.3) for i in range(2)]
+    fanout = KnowledgeFanout(sources, deadline=5.0)
+    results = {}
+
+    callers = [
+        threading.Thread(target=lambda q=query: results.setdefault(q, fanout.search(q)))
+        for query in ("first", "second")
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    for result in results.values():
+        assert {hit.source for hit in result.hits} == {"s0", "s1"}
+        assert result.timed_out == ()
+    assert [source.calls for source in sources] == [2, 2]
+
+
+def test_identical_concurrent_queries_share_one_search():
+    """Test that a query already running on a source is joined, not repeated."""
+    source = StaticSource("wiki", [1.0], delay=0.3)
+    fanout = KnowledgeFanout([source], deadline=5.0)
+    results = []
+
+    callers = [threading.Thread(target=lambda: results.append(fanout.search("same"))) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert source.calls == 1
+    assert [[hit.location for hit in result.hits] for result in results] == [["wiki-0"], ["wiki-0"]]
+
+
+def test_failing_source_is_reported():
+    """Test that an exception in one source leaves the others' results."""
+    fanout = KnowledgeFanout([
+        StaticSource("broken", [1.0], error=RuntimeError("unreachable")),
+        StaticSource("ok", [3.0]),
+    ])
+
+    result = fanout.search("query")
+
+    assert [hit.source for hit in result.hits] == ["ok"]
+    assert result.failed == {"broken": "RuntimeError: unreachable"}
+
+
+def test_scores_are_normalized_per_source():
+    """Test that sources on different score scales are merged fairly."""
+    bm25 = StaticSource("bm25", [12.0, 3.0])
+    cosine = StaticSource("cosine", [0.4, 0.3], weight=0.5)
+
+    merged = merge_hits([(bm25, bm25.search("q", 10)), (cosine, cosine.search("q", 10))], top_k=10)
+
+    assert [(hit.location, round(hit.score, 3)) for hit in merged] == [
+        ("bm25-0", 1.0), ("cosine-0", 0.5), ("cosine-1", 0.375), ("bm25-1", 0.25),
+    ]
+
+
+def test_duplicate_source_names_are_rejected():
+    """Test that each source needs its own name."""
+    with pytest.raises(ValueError, match="unique"):
+        KnowledgeFanout([StaticSource("a", []), StaticSource("a", [])])
+
+
+def test_search_text_labels_sources_and_notes_missing_ones():
+    """Test the formatted result the model receives."""
+    slow = StaticSource("slow", [1.0], delay=5.0, deadline=0.05)
+    fanout = KnowledgeFanout([StaticSource("wiki", [1.0]), slow])
+
+    text = fanout.search_text("billing")
+
+    assert text.startswith("## From wiki: wiki-0\n\nbilling text 0")
+    assert "Partial results: no answer in time from slow" in text
+    slow.release.set()
+
+
+def test_search_text_reports_failures_apart_from_timeouts():
+    """Test that a source that raised isn't described as slow."""
+    slow = StaticSource("slow", [1.0], delay=5.0, deadline=0.05)
+    broken = StaticSource("broken", [1.0], error=RuntimeError("unreachable"))
+    fanout = KnowledgeFanout([StaticSource("wiki", [1.0]), slow, broken])
+
+    text = fanout.search_text("billing")
+
+    assert text.endswith("(Partial results: no answer in time from slow; search failed in broken)")
+    slow.release.set()
+
+
+def test_search_text_without_results():
+    """Test the fallback message when no source matches."""
+    fanout = KnowledgeFanout([StaticSource("wiki", [])])
+
+    assert fanout.search_text("nothing") == "No relevant content found for query: nothing"
+
+
+def test_memory_source_ranks_notes():
+    """Test the in-process memory stand-in."""
+    memory = MemorySearchSource()
+    memory.remember("pref", "The customer prefers invoices by email")
+    memory.remember("plan", "Enterprise support plan since 2023")
+    memory.forget("plan")
+
+    hits = memory.search("invoices email", 5)
+
+    assert [(hit.source, hit.location) for hit in hits] == [("memory", "pref")]
+
+
+def test_local_folder_and_memory_are_merged(local_folder):
+    """Test a wiki-style local folder searched together with memory."""
+    wiki_source = WikiKnowledgeSource("", ".", local_folder)
+    memory = MemorySearchSource()
+    memory.remember("note", "Customer asked twice how to restore RDS snapshots")
+    fanout = KnowledgeFanout([WikiSearchSource(SupportAgentTools(wiki_source), name="runbooks"), memory])
+
+    result = fanout.search("restore RDS snapshot")
+
+    assert {hit.source for hit in result.hits} == {"runbooks", "memory"}
+    assert any(hit.location == "restore.md > Restore" for hit in result.hits)
+
+
+def test_local_folder_index_is_kept_until_files_change(local_folder):
+    """Test that a folder without git is re-indexed only when its files change."""
+    tools = SupportAgentTools(WikiKnowledgeSource("", ".", local_folder, freshness_seconds=0))
+    source = WikiSearchSource(tools, name="runbooks")
+
+    with patch.object(tools, "_index_document", wraps=tools._index_document) as index_document:
+        source.search("restore", 5)
+        source.search("mfa", 5)
+        assert index_document.call_count == 2
+        (local_folder / "restore.md").write_text("# Restore\n\nRestore from the nightly backup.\n")
+        hits = source.search("nightly backup", 5)
+
+    assert index_document.call_count == 4
+    assert hits[0].location == "restore.md > Restore"
+
+
+def test_local_folder_is_rescanned_once_per_freshness_window(local_folder):
+    """Test that the folder fingerprint is cached like a synced snapshot."""
+    wiki_source = WikiKnowledgeSource("", ".", local_folder, freshness_seconds=300)
+    revision = wiki_source.current_revision()
+    (local_folder / "new.md").write_text("# New\n")
+
+    assert revision.startswith("dir-")
+    assert wiki_source.current_revision() == revision
+    wiki_source._fingerprint = None  # Window elapsed
+    assert wiki_source.current_revision() != revision
+
+
+def test_wiki_source_uses_tool_ranking():
+    """Test that wiki hits carry the passage location and score."""
+    tools = Mock(spec=SupportAgentTools)
+    tools.wiki_source = Mock(spec=WikiKnowledgeSource)
+    tools.search_scored.return_value = []
+
+    assert WikiSearchSource(tools).search("q", 3) == []
+    tools.wiki_source.ensure_fresh.assert_called_once()
+    tools.search_scored.assert_called_once_with("q", 3)
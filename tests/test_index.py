@@ -0,0 +1,97 @@
+"""Tests for BM25Index."""
+
+import pytest
+
+from agent.knowledge.index import BM25Index, SearchHit, reciprocal_rank_fusion
+
+
+@pytest.fixture
+def index():
+    """Create an index with a few small documents."""
+    index = BM25Index()
+    index.add("lambda.md", "AWS Lambda runs code. Lambda scales automatically.")
+    index.add("s3.md", "Amazon S3 stores objects in buckets.")
+    index.add("mixed.md", "Trigger Lambda from S3 bucket events.")
+    return index
+
+
+def test_search_ranks_by_relevance(index):
+    """Test that documents with more matching terms rank first."""
+    hits = index.search("lambda")
+
+    assert [hit.doc_id for hit in hits] == ["lambda.md", "mixed.md"]
+    assert hits[0].score > hits[1].score
+
+
+def test_search_respects_top_k(index):
+    """Test that search returns at most top_k hits."""
+    hits = index.search("lambda s3", top_k=1)
+
+    assert len(hits) == 1
+    assert hits[0].doc_id == "mixed.md"
+
+
+def test_search_without_matches_returns_empty(index):
+    """Test that unknown terms produce no hits."""
+    assert index.search("ec2") == []
+
+
+def test_add_replaces_existing_document(index):
+    """Test that re-adding a document replaces its postings."""
+    index.add("lambda.md", "Nothing relevant here")
+
+    assert [hit.doc_id for hit in index.search("lambda")] == ["mixed.md"]
+    assert len(index) == 3
+
+
+def test_remove_document(index):
+    """Test that removed documents are no longer returned."""
+    index.remove("mixed.md")
+
+    assert "mixed.md" not in index
+    assert [hit.doc_id for hit in index.search("s3")] == ["s3.md"]
+
+
+def test_clear_empties_index(index):
+    """Test that clear removes all documents."""
+    index.clear()
+
+    assert len(index) == 0
+    assert index.search("lambda") == []
+
+
+def test_search_matches_japanese_query():
+    """Test that Japanese queries match without whitespace segmentation."""
+    index = BM25Index()
+    index.add("invoice.md", "適格請求書（インボイス）は請求書画面から発行できます。")
+    index.add("mfa.md", "多要素認証（MFA）の設定方法について説明します。")
+
+    hits = index.search("適格請求書の発行方法")
+
+    assert hits[0].doc_id == "invoice.md"
+
+
+def test_search_batch_matches_single_queries(index):
+    """Test that batch ranking equals per-query ranking, in query order."""
+    queries = [["lambda"], ["s3", "bucket"], ["lambda", "s3"], [], ["missing"], ["lambda"]]
+
+    results = index.search_batch(queries, top_k=2)
+
+    assert results == [index.search_tokens(tokens, top_k=2) for tokens in queries]
+    assert results[3] == [] and results[4] == []
+
+
+def test_search_batch_on_empty_index():
+    """Test that an empty index returns one empty result per query."""
+    assert BM25Index().search_batch([["lambda"], ["s3"]]) == [[], []]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Test that documents ranked by both scorers beat single-scorer winners."""
+    keyword = [SearchHit("a", 12.0), SearchHit("b", 9.0), SearchHit("c", 1.0)]
+    vector = [SearchHit("d", 0.9), SearchHit("b", 0.8), SearchHit("c", 0.7)]
+
+    fused = reciprocal_rank_fusion([keyword, vector])
+
+    assert [hit.doc_id for hit in fused] == ["b", "c", "a", "d"]
+    assert fused[0].score == pytest.approx(2 / 62)
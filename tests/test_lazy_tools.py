@@ -0,0 +1,135 @@
+"""Tests for lazily imported tools."""
+
+import asyncio
+import json
+import sys
+import textwrap
+
+import pytest
+
+from agent import lazy_tools
+from agent.lazy_tools import BUILTIN_TOOLS, LazyTool, builtin_tools, load_tool_specs, write_tool_specs
+
+DECORATED = '''
+from strands import tool
+
+@tool
+def shout(text: str) -> str:
+    """Repeat text in upper case.
+
+    Args:
+        text: Text to repeat
+    """
+    return text.upper()
+'''
+
+MODULE_STYLE = '''
+TOOL_SPEC = {
+    "name": "echo",
+    "description": "Echo the input",
+    "inputSchema": {"json": {"type": "object", "properties": {"text": {"type": "string"}}}},
+}
+
+def echo(tool, **kwargs):
+    return {"toolUseId": tool["toolUseId"], "status": "success", "content": [{"text": tool["input"]["text"]}]}
+'''
+
+
+@pytest.fixture
+def tool_modules(tmp_path, monkeypatch):
+    """Provide two importable tool modules that are not imported yet."""
+    (tmp_path / "lazy_shout.py").write_text(textwrap.dedent(DECORATED))
+    (tmp_path / "lazy_echo.py").write_text(textwrap.dedent(MODULE_STYLE))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield {"shout": "lazy_shout", "echo": "lazy_echo"}
+    for module in ("lazy_shout", "lazy_echo"):
+        sys.modules.pop(module, None)
+
+
+def run_tool(tool, name, tool_input):
+    """Invoke a tool through its stream interface and return the final result."""
+    async def collect():
+        events = []
+        tool_use = {"toolUseId": "t1", "name": name, "input": tool_input}
+        async for event in tool.stream(tool_use, {}):
+            events.append(event)
+        return events[-1]
+
+    return asyncio.run(collect())
+
+
+def test_cached_spec_is_served_without_import(tool_modules):
+    """Test that registration and the spec don't import the tool module."""
+    tool = LazyTool("shout", tool_modules["shout"], spec={"name": "shout", "description": "d", "inputSchema": {}})
+
+    assert tool.tool_name == "shout"
+    assert tool.tool_spec["description"] == "d"
+    assert not tool.loaded
+    assert "lazy_shout" not in sys.modules
+
+
+def test_spec_without_cache_loads_tool(tool_modules):
+    """Test that a missing cached spec falls back to importing the tool."""
+    tool = LazyTool("shout", tool_modules["shout"])
+
+    assert tool.tool_spec["name"] == "shout"
+    assert tool.loaded
+
+
+def test_invocation_imports_decorated_tool(tool_modules):
+    """Test that the first call imports and runs a @tool function."""
+    tool = LazyTool("shout", tool_modules["shout"], spec={"name": "shout"})
+
+    result = run_tool(tool, "shout", {"text": "hi"})
+
+    assert tool.loaded
+    assert "HI" in str(result)
+
+
+def test_invocation_imports_module_style_tool(tool_modules):
+    """Test that tools defined by TOOL_SPEC and a function are supported."""
+    tool = LazyTool("echo", tool_modules["echo"], spec={"name": "echo"})
+
+    result = run_tool(tool, "echo", {"text": "hello"})
+
+    assert "hello" in str(result)
+
+
+def test_missing_tool_is_reported(tool_modules):
+    """Test that a module without the named tool raises on load."""
+    with pytest.raises(ValueError, match="does not define tool"):
+        LazyTool("whisper", tool_modules["shout"]).load()
+
+
+def test_spec_cache_round_trip(tool_modules, tmp_path):
+    """Test that written specs are read back by builtin_tools()."""
+    write_tool_specs(tmp_path / "specs.json", tool_modules)
+
+    specs = load_tool_specs(tmp_path / "specs.json")
+
+    assert set(specs) == {"shout", "echo"}
+    assert specs["echo"]["description"] == "Echo the input"
+
+
+def test_stale_or_missing_spec_cache_is_ignored(tmp_path, monkeypatch):
+    """Test that caches from another tool package version aren't used."""
+    path = tmp_path / "specs.json"
+    path.write_text(json.dumps({"version": "0.0.1", "specs": {"calculator": {"name": "calculator"}}}))
+
+    assert load_tool_specs(path) == {}
+    assert load_tool_specs(tmp_path / "missing.json") == {}
+    monkeypatch.setattr(lazy_tools, "_installed_version", lambda: "0.0.1")
+    assert load_tool_specs(path) == {"calculator": {"name": "calculator"}}
+
+
+def test_builtin_tools_use_cached_specs(tmp_path, monkeypatch):
+    """Test that builtin tools take their specs from the cache."""
+    path = tmp_path / "specs.json"
+    specs = {name: {"name": name, "description": "cached", "inputSchema": {}} for name in BUILTIN_TOOLS}
+    path.write_text(json.dumps({"version": "1.0", "specs": specs}))
+    monkeypatch.setattr(lazy_tools, "_installed_version", lambda: "1.0")
+
+    tools = builtin_tools(path)
+
+    assert [tool.tool_name for tool in tools] == list(BUILTIN_TOOLS)
+    assert all(tool.tool_spec["description"] == "cached" and not tool.loaded for tool in tools)
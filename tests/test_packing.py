@@ -0,0 +1,54 @@
+"""Tests for token-budget result packing."""
+
+from agent.knowledge.packing import estimate_tokens, pack_results, truncate_to_tokens
+
+
+def test_estimate_tokens_counts_japanese_per_character():
+    """Test that Japanese characters cost more than Latin ones."""
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("請求書") == 3
+
+
+def test_pack_keeps_score_order_within_budget():
+    """Test that results are taken best-first until the budget is spent."""
+    results = ["alpha " * 40, "beta " * 40, "gamma " * 40]
+
+    packed = pack_results(results, token_budget=130)
+
+    assert packed == results[:2]
+
+
+def test_pack_skips_large_result_for_smaller_ones():
+    """Test that a result that doesn't fit is skipped, not the rest."""
+    results = ["alpha " * 20, "beta " * 200, "gamma " * 20]
+
+    packed = pack_results(results, token_budget=80)
+
+    assert packed == [results[0], results[2]]
+
+
+def test_pack_drops_near_duplicates():
+    """Test that results overlapping a selected one are removed."""
+    results = [
+        "## From a.md\n\nEnable MFA for the root user account",
+        "## From b.md\n\nEnable MFA for the root user account",
+        "## From c.md\n\nInvoices are issued monthly",
+    ]
+
+    packed = pack_results(results, token_budget=1000, duplicate_threshold=0.7)
+
+    assert packed == [results[0], results[2]]
+
+
+def test_pack_truncates_oversized_best_result():
+    """Test that the best result is truncated rather than dropped."""
+    packed = pack_results(["word " * 400], token_budget=50)
+
+    assert len(packed) == 1
+    assert packed[0].endswith("...")
+    assert estimate_tokens(packed[0]) <= 50
+
+
+def test_truncate_to_tokens_keeps_short_text():
+    """Test that text within budget is unchanged."""
+    assert truncate_to_tokens("short", 10) == "short"
@@ -0,0 +1,261 @@
+"""Tests for AgentRegistry."""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+import git
+import pytest
+
+from agent.prefetch import main as prefetch_main
+from agent.registry import AgentConfig, AgentRegistry, stream_invocation
+from agent.streaming import StreamCoalescing
+from agent.support_agent import SupportAgent
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Create a registry with a stub agent factory."""
+    config = AgentConfig(local_path=str(tmp_path / "repo"), system_prompt="Be brief")
+    return AgentRegistry(config, max_sessions=2, agent_factory=Mock(side_effect=lambda **kwargs: Mock(**kwargs)))
+
+
+def test_config_from_env(monkeypatch):
+    """Test that configuration is read from AGENT_* variables."""
+    monkeypatch.setenv("AGENT_REPO_URL", "https://example.com/repo")
+    monkeypatch.setenv("AGENT_KNOWLEDGE_DIR", "wiki")
+    monkeypatch.setenv("AGENT_SYNC_FRESHNESS_SECONDS", "30")
+    monkeypatch.delenv("AGENT_SYSTEM_PROMPT", raising=False)
+
+    config = AgentConfig.from_env()
+
+    assert config.repo_url == "https://example.com/repo"
+    assert config.knowledge_dir == "wiki"
+    assert config.freshness_seconds == 30.0
+    assert config.system_prompt is None
+    assert config.stream_coalescing() is None
+
+
+def test_stream_coalescing_from_env(monkeypatch):
+    """Test that a flush size enables coalescing with the configured rules."""
+    monkeypatch.setenv("AGENT_STREAM_FLUSH_BYTES", "512")
+    monkeypatch.setenv("AGENT_STREAM_FLUSH_MS", "20")
+    monkeypatch.setenv("AGENT_STREAM_QUEUE_SIZE", "8")
+
+    config = AgentConfig.from_env()
+    registry = AgentRegistry(config, agent_factory=Mock())
+    registry.get_agent("s1")
+
+    expected = StreamCoalescing(max_bytes=512, max_delay=0.02, queue_size=8)
+    assert config.stream_coalescing() == expected
+    assert registry.agent_factory.call_args.kwargs["stream_coalescing"] == expected
+
+
+def test_knowledge_paths_from_env(tmp_path, monkeypatch):
+    """Test that local folders are added as sources of one shared fan-out."""
+    runbooks = tmp_path / "runbooks"
+    runbooks.mkdir()
+    (runbooks / "restore.md").write_text("# Restore\n\nRestore the RDS snapshot.\n")
+    monkeypatch.setenv("AGENT_LOCAL_PATH", str(tmp_path / "repo"))
+    monkeypatch.setenv("AGENT_KNOWLEDGE_PATHS", str(runbooks))
+    monkeypatch.setenv("AGENT_SOURCE_DEADLINE_SECONDS", "1.5")
+
+    registry = AgentRegistry(AgentConfig.from_env(), agent_factory=Mock())
+    registry.get_agent("s1")
+    result = registry.knowledge_fanout.sources[1].search("restore", 5)
+
+    assert [source.name for source in registry.knowledge_fanout.sources] == ["wiki", str(runbooks)]
+    assert registry.knowledge_fanout.deadline == 1.5
+    assert registry.agent_factory.call_args.kwargs["knowledge_fanout"] is registry.knowledge_fanout
+    assert result[0].location == "restore.md > Restore"
+
+
+def test_registries_share_the_knowledge_store(tmp_path):
+    """Test that registries for one repository share its source and tools."""
+    config = AgentConfig(repo_url="https://example.com/repo", store_root=str(tmp_path / "store"))
+    first = AgentRegistry(config, agent_factory=Mock())
+    second = AgentRegistry(AgentConfig(**{**vars(config), "system_prompt": "Hi"}), agent_factory=Mock())
+
+    assert first.support_tools is second.support_tools
+    assert first.wiki_source.store_path.is_relative_to(tmp_path / "store")
+    first.close()
+    second.close()
+
+
+def test_same_session_reuses_agent(registry):
+    """Test that a session id always maps to the same agent."""
+    assert registry.get_agent("s1") is registry.get_agent("s1")
+    assert registry.get_agent("s1") is not registry.get_agent("s2")
+
+
+class TurnRecorder:
+    """Stub agent recording how many of its turns overlap."""
+
+    def __init__(self, **kwargs):
+        self.active = 0
+        self.max_active = 0
+
+    async def stream_async(self, message):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        yield {"event": {"contentBlockDelta": {"delta": {"text": message}}}}
+        self.active -= 1
+
+
+def test_turns_of_one_session_are_serialized(tmp_path):
+    """Test that concurrent invocations of a session don't overlap, and other sessions do."""
+    registry = AgentRegistry(AgentConfig(local_path=str(tmp_path / "repo")), agent_factory=TurnRecorder)
+
+    async def invoke(session_id, prompt):
+        return [msg async for msg in stream_invocation({"prompt": prompt, "session_id": session_id}, registry)]
+
+    async def run():
+        return await asyncio.gather(invoke("s1", "a"), invoke("s1", "b"), invoke("s2", "c"))
+
+    results = asyncio.run(run())
+
+    assert [len(events) for events in results] == [1, 1, 1]
+    assert registry.get_agent("s1").max_active == 1
+    assert registry.get_session("s1")[1] is registry.get_session("s1")[1]
+
+
+def test_agents_share_knowledge_state(registry):
+    """Test that all agents receive the shared source and tools."""
+    registry.get_agent("s1")
+    registry.get_agent(None)
+
+    for call in registry.agent_factory.call_args_list:
+        assert call.kwargs["wiki_source"] is registry.wiki_source
+        assert call.kwargs["support_tools"] is registry.support_tools
+        assert call.kwargs["system_prompt"] == "Be brief"
+        assert call.kwargs["general_tools"] is registry.general_tools
+
+
+def test_least_recently_used_session_is_evicted(registry):
+    """Test that sessions beyond max_sessions are dropped LRU-first."""
+    first = registry.get_agent("s1")
+    registry.get_agent("s2")
+    registry.get_agent("s1")
+    registry.get_agent("s3")
+
+    assert len(registry) == 2
+    assert registry.get_agent("s1") is first
+    assert registry.agent_factory.call_count == 3
+
+
+def test_busy_session_is_not_evicted(registry):
+    """Test that a session running a turn survives eviction in favour of an idle one."""
+    busy, lock = registry.get_session("s1")
+    idle = registry.get_agent("s2")
+
+    async def run():
+        async with lock:
+            registry.get_agent("s3")
+
+    asyncio.run(run())
+
+    assert registry.get_agent("s1") is busy
+    assert registry.get_agent("s2") is not idle
+
+
+def test_end_session(registry):
+    """Test that ending a session creates a fresh agent next time."""
+    first = registry.get_agent("s1")
+    registry.end_session("s1")
+
+    assert registry.get_agent("s1") is not first
+
+
+def test_support_agent_uses_injected_tools(tmp_path):
+    """Test that SupportAgent reuses injected knowledge objects."""
+    registry = AgentRegistry(AgentConfig(local_path=str(tmp_path / "repo")))
+
+    agent = registry.get_agent("s1")
+
+    assert isinstance(agent, SupportAgent)
+    assert agent.wiki_source is registry.wiki_source
+    assert agent.support_tools is registry.support_tools
+
+
+def test_registry_starts_from_prefetched_snapshot(tmp_path):
+    """Test that a baked clone and snapshot serve searches without re-indexing."""
+    origin = tmp_path / "origin"
+    (origin / "docs").mkdir(parents=True)
+    (origin / "docs" / "mfa.md").write_text("# MFA\n\nEnable MFA for the root user.", encoding="utf-8")
+    repo = git.Repo.init(origin)
+    repo.git.add(A=True)
+    repo.index.commit("initial", author=git.Actor("test", "test@example.com"))
+
+    local_path = tmp_path / "repo_data"
+    snapshot = tmp_path / "knowledge.index"
+    assert prefetch_main([
+        "--repo-url", str(origin),
+        "--knowledge-dir", "docs",
+        "--local-path", str(local_path),
+        "--snapshot", str(snapshot),
+    ]) == 0
+
+    config = AgentConfig(
+        repo_url=str(origin), local_path=str(local_path), index_snapshot=str(snapshot)
+    )
+    registry = AgentRegistry(config, agent_factory=Mock())
+    with patch.object(registry.wiki_source, "load_file") as load_file:
+        result = registry.support_tools.search_wiki("MFA")
+
+    load_file.assert_not_called()
+    assert "Enable MFA" in result
+
+
+def test_prefetch_bakes_the_configured_branch(tmp_path):
+    """Test that prefetch checks out and indexes the configured branch, not the default one."""
+    origin = tmp_path / "origin"
+    (origin / "docs").mkdir(parents=True)
+    (origin / "docs" / "mfa.md").write_text("# MFA\n\nEnable MFA for the root user.", encoding="utf-8")
+    repo = git.Repo.init(origin)
+    repo.git.add(A=True)
+    repo.index.commit("initial", author=git.Actor("test", "test@example.com"))
+    default = repo.active_branch.name
+    repo.git.checkout("-b", "staging")
+    (origin / "docs" / "mfa.md").write_text("# MFA\n\nUse passkeys for the root user.", encoding="utf-8")
+    repo.git.add(A=True)
+    staging = repo.index.commit("staging", author=git.Actor("test", "test@example.com"))
+    repo.git.checkout(default)
+
+    local_path = tmp_path / "repo_data"
+    snapshot = tmp_path / "knowledge.index"
+    assert prefetch_main([
+        "--repo-url", str(origin),
+        "--repo-ref", "staging",
+        "--local-path", str(local_path),
+        "--snapshot", str(snapshot),
+    ]) == 0
+
+    config = AgentConfig(
+        repo_url=str(origin), local_path=str(local_path), index_snapshot=str(snapshot), repo_ref="staging"
+    )
+    registry = AgentRegistry(config, agent_factory=Mock())
+    with patch.object(registry.wiki_source, "load_file") as load_file:
+        result = registry.support_tools.search_wiki("MFA")
+
+    load_file.assert_not_called()
+    assert registry.wiki_source.current_revision() == staging.hexsha
+    assert "passkeys" in result
+
+
+def test_prefetch_skips_without_repo_url(tmp_path):
+    """Test that an empty repository URL makes prefetch a no-op."""
+    assert prefetch_main(["--repo-url", "", "--local-path", str(tmp_path / "repo")]) == 0
+    assert not (tmp_path / "repo").exists()
+
+
+def test_prefetch_writes_tool_specs(tmp_path):
+    """Test that prefetch caches tool specs the registry's lazy tools serve."""
+    specs = tmp_path / "tool_specs.json"
+    assert prefetch_main(["--repo-url", "", "--tool-specs", str(specs)]) == 0
+
+    registry = AgentRegistry(
+        AgentConfig(local_path=str(tmp_path / "repo"), tool_specs=str(specs)), agent_factory=Mock()
+    )
+
+    assert [tool.tool_name for tool in registry.general_tools] == ["calculator", "http_request"]
+    assert all(tool.tool_spec["inputSchema"] and not tool.loaded for tool in registry.general_tools)
@@ -0,0 +1,117 @@
+"""Tests for on-disk index snapshots."""
+
+import pytest
+
+from agent.knowledge.catalog import describe_document
+from agent.knowledge.chunker import chunk_markdown
+from agent.knowledge.index import BM25Index
+from agent.knowledge.snapshot import SnapshotError, SnapshotIndex, write_snapshot
+from agent.knowledge.tokenizer import tokenize
+
+DOCUMENTS = {
+    "billing.md": "# 請求\n\n## インボイス\n\n適格請求書はコンソールから発行できます。\n\n## Receipts\n\nAWS does not issue receipts.",
+    "security.md": "# Security\n\n## MFA\n\nEnable MFA (多要素認証) for the root user.",
+}
+
+
+@pytest.fixture
+def corpus():
+    """Build an index and passage map over a small corpus."""
+    index = BM25Index()
+    passages = {}
+    for path, text in DOCUMENTS.items():
+        for passage in chunk_markdown(path, text):
+            passages[passage.id] = passage
+            index.add(passage.id, passage.text)
+    return index, passages
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, corpus):
+    """Write the corpus to a snapshot file."""
+    index, passages = corpus
+    path = tmp_path / "index.snapshot"
+    write_snapshot(path, index, passages, "a" * 40)
+    return path
+
+
+@pytest.mark.parametrize("query", ["適格請求書の発行", "MFA root", "receipts", "unknown"])
+def test_snapshot_ranks_like_index(corpus, snapshot_path, query):
+    """Test that the mapped snapshot returns the same ranking as the index."""
+    index, passages = corpus
+
+    with SnapshotIndex(snapshot_path) as snapshot:
+        ranked = snapshot.search_passages(tokenize(query), top_k=5)
+
+    expected = index.search(query, top_k=5)
+    assert [(p.id, round(score, 9)) for p, score in ranked] == [
+        (hit.doc_id, round(hit.score, 9)) for hit in expected
+    ]
+    assert all(p == passages[p.id] for p, _ in ranked)
+
+
+def test_snapshot_records_revision(snapshot_path, corpus):
+    """Test that header fields round-trip."""
+    with SnapshotIndex(snapshot_path) as snapshot:
+        assert snapshot.revision == "a" * 40
+        assert len(snapshot) == len(corpus[1])
+
+
+def test_snapshot_keeps_sha256_revisions(corpus, tmp_path):
+    """Test that a 64-character object id isn't truncated, and longer ids are refused."""
+    index, passages = corpus
+    write_snapshot(tmp_path / "sha256.snapshot", index, passages, "b" * 64)
+
+    with SnapshotIndex(tmp_path / "sha256.snapshot") as snapshot:
+        assert snapshot.revision == "b" * 64
+    with pytest.raises(ValueError, match="longer than 64"):
+        write_snapshot(tmp_path / "long.snapshot", index, passages, "c" * 65)
+
+
+def test_snapshot_materializes_to_index(corpus, snapshot_path):
+    """Test that to_index rebuilds an equivalent mutable index."""
+    index, _ = corpus
+
+    with SnapshotIndex(snapshot_path) as snapshot:
+        restored = snapshot.to_index()
+
+    assert sorted(restored.documents()) == sorted(index.documents())
+    assert restored.search("MFA") == index.search("MFA")
+
+
+def test_snapshot_stores_catalog(tmp_path, corpus):
+    """Test that catalog entries and other file paths round-trip."""
+    index, passages = corpus
+    documents = [describe_document(path, text) for path, text in sorted(DOCUMENTS.items())]
+    path = tmp_path / "catalog.snapshot"
+    write_snapshot(path, index, passages, "a" * 40, catalog=(documents, ["images/logo.png"]))
+
+    with SnapshotIndex(path) as snapshot:
+        assert snapshot.catalog() == (documents, ["images/logo.png"])
+
+
+def test_snapshot_without_catalog(snapshot_path):
+    """Test that a snapshot written without a catalog reports none."""
+    with SnapshotIndex(snapshot_path) as snapshot:
+        assert snapshot.catalog() is None
+
+
+def test_snapshot_rejects_bad_file(tmp_path):
+    """Test that foreign or truncated files raise SnapshotError."""
+    path = tmp_path / "bad.snapshot"
+    path.write_bytes(b"not a snapshot" * 20)
+
+    with pytest.raises(SnapshotError):
+        SnapshotIndex(path)
+    with pytest.raises(SnapshotError):
+        SnapshotIndex(tmp_path / "missing.snapshot")
+
+
+def test_empty_snapshot(tmp_path):
+    """Test that an empty index can be written and searched."""
+    path = tmp_path / "empty.snapshot"
+    write_snapshot(path, BM25Index(), {}, None)
+
+    with SnapshotIndex(path) as snapshot:
+        assert snapshot.revision is None
+        assert snapshot.search_passages(["mfa"]) == []
@@ -0,0 +1,156 @@
+"""Tests for the process-wide KnowledgeStore."""
+
+import threading
+from pathlib import Path
+
+import git
+import pytest
+
+from agent.store import KnowledgeStore, StoreKey, shared_store
+
+
+def _commit(repo, message):
+    """Stage everything in the working tree and commit it."""
+    repo.git.add(A=True)
+    repo.index.commit(message, author=git.Actor("test", "test@example.com"))
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """Create an origin with two knowledge directories and a staging branch."""
+    path = tmp_path / "origin"
+    (path / "docs").mkdir(parents=True)
+    (path / "faq").mkdir()
+    (path / "docs" / "mfa.md").write_text("# MFA\n\nEnable MFA for the root user.", encoding="utf-8")
+    (path / "faq" / "billing.md").write_text("# Billing\n\nInvoices are sent monthly.", encoding="utf-8")
+    repo = git.Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    _commit(repo, "initial")
+    default = repo.active_branch.name
+    repo.git.checkout("-b", "staging")
+    (path / "docs" / "mfa.md").write_text("# MFA\n\nUse passkeys for the root user.", encoding="utf-8")
+    _commit(repo, "staging")
+    repo.git.checkout(default)
+    return str(path)
+
+
+def test_same_key_shares_source_and_tools(origin, tmp_path):
+    """Test that leases on one key share the source, its index and the file cache."""
+    store = KnowledgeStore(tmp_path / "store")
+
+    with store.acquire(origin) as first, store.acquire(origin) as second:
+        assert first.wiki_source is second.wiki_source
+        assert first.support_tools is second.support_tools
+        assert first.wiki_source.file_cache is store.file_cache
+        assert "Enable MFA" in first.support_tools.search_wiki("MFA")
+    assert len(store) == 1
+
+
+def test_sources_of_one_repository_share_a_clone(origin, tmp_path):
+    """Test that refs and knowledge directories of one URL use one store clone."""
+    store = KnowledgeStore(tmp_path / "store")
+    docs = store.acquire(origin, "docs")
+    faq = store.acquire(origin, "faq")
+    staging = store.acquire(origin, "docs", ref="staging")
+
+    results = [lease.support_tools.search_wiki(query) for lease, query in
+               [(docs, "MFA"), (faq, "invoices"), (staging, "MFA")]]
+
+    assert len([path for path in (tmp_path / "store" / "stores").iterdir() if path.is_dir()]) == 1
+    assert "Enable MFA" in results[0]
+    assert "Invoices are sent monthly" in results[1]
+    assert "passkeys" in results[2]
+    assert not (faq.wiki_source.knowledge_path.parent / "docs").exists()  # Sparse snapshot
+
+
+def test_first_sync_keeps_other_sources_cached_files(origin, tmp_path):
+    """Test that a source's clone or full rebuild doesn't empty the shared file cache."""
+    store = KnowledgeStore(tmp_path / "store")
+    docs = store.acquire(origin, "docs")
+    docs.support_tools.search_wiki("MFA")
+    cached = len(store.file_cache)
+
+    store.acquire(origin, "faq").support_tools.search_wiki("invoices")
+
+    assert cached == 1
+    assert len(store.file_cache) == 2
+
+
+def test_memory_budget_drops_idle_indexes(origin, tmp_path):
+    """Test that idle sources over the memory budget lose their index but not their files."""
+    store = KnowledgeStore(tmp_path / "store", memory_budget_bytes=1)
+    lease = store.acquire(origin)
+    lease.support_tools.search_wiki("MFA")
+    held = store.acquire(origin, "faq")
+    held.support_tools.search_wiki("billing")
+
+    lease.release()
+    again = store.acquire(origin)
+
+    assert again.support_tools is not lease.support_tools
+    assert again.wiki_source is lease.wiki_source
+    assert held.support_tools.memory_estimate() > 0  # Leased sources are kept
+    assert "Enable MFA" in again.support_tools.search_wiki("MFA")
+
+
+def test_disk_budget_removes_idle_sources_then_the_clone(origin, tmp_path):
+    """Test that eviction deletes checkouts, and the clone with its last source."""
+    store = KnowledgeStore(tmp_path / "store", disk_budget_bytes=0)
+    docs = store.acquire(origin, "docs")
+    faq = store.acquire(origin, "faq")
+    docs.support_tools.search_wiki("MFA")
+    faq.support_tools.search_wiki("billing")
+    clone = docs.wiki_source.store_path
+
+    docs.release()
+
+    assert StoreKey(origin, None, "docs") not in store
+    assert not docs.wiki_source.snapshots_path.exists()
+    assert clone.exists()
+    assert "Invoices" in faq.support_tools.search_wiki("invoices")
+
+    faq.release()
+
+    assert len(store) == 0
+    assert not clone.exists()
+
+
+def test_removal_waits_for_the_store_lock(origin, tmp_path):
+    """Test that snapshots aren't deleted while another process updates the clone."""
+    fcntl = pytest.importorskip("fcntl")
+    store = KnowledgeStore(tmp_path / "store", disk_budget_bytes=0)
+    docs = store.acquire(origin, "docs")
+    faq = store.acquire(origin, "faq")
+    docs.support_tools.search_wiki("MFA")
+
+    with open(docs.wiki_source.store_lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # A separate open file, as another process would hold
+        release = threading.Thread(target=docs.release)
+        release.start()
+        release.join(0.2)
+        assert release.is_alive()
+        assert docs.wiki_source.snapshots_path.exists()
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    release.join()
+
+    assert not docs.wiki_source.snapshots_path.exists()
+    faq.release()
+
+
+def test_release_is_idempotent(origin, tmp_path):
+    """Test that releasing a lease twice doesn't free another holder's reference."""
+    store = KnowledgeStore(tmp_path / "store", memory_budget_bytes=1)
+    first = store.acquire(origin)
+    second = store.acquire(origin)
+
+    first.release()
+    first.release()
+
+    assert store.acquire(origin).support_tools is second.support_tools
+
+
+def test_shared_store_is_per_root(tmp_path):
+    """Test that one store exists per root directory in a process."""
+    assert shared_store(tmp_path / "a") is shared_store(tmp_path / "a")
+    assert shared_store(tmp_path / "a") is not shared_store(Path(tmp_path / "b"))
@@ -0,0 +1,208 @@
+"""Tests for stream event coalescing."""
+
+import asyncio
+
+import pytest
+
+from agent.streaming import EventCoalescer, StreamCoalescing, coalesce_events
+
+
+def text(value, index=None):
+    """Build a text-delta event as produced by Agent.stream_async."""
+    block = {"delta": {"text": value}}
+    if index is not None:
+        block["contentBlockIndex"] = index
+    return {"event": {"contentBlockDelta": block}}
+
+
+def texts(events):
+    """Extract the text of text-delta events (None for other events)."""
+    return [event.get("event", {}).get("contentBlockDelta", {}).get("delta", {}).get("text") for event in events]
+
+
+STOP = {"event": {"contentBlockStop": {}}}
+TOOL_USE = {"event": {"contentBlockDelta": {"delta": {"toolUse": {"input": "{}"}}}}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEventCoalescer:
+    """Tests for the merge rules."""
+
+    def test_consecutive_deltas_are_merged(self):
+        """Test that text deltas are held and merged until flushed."""
+        coalescer = EventCoalescer(StreamCoalescing(max_bytes=100))
+
+        assert coalescer.push(text("Hel", 0)) == []
+        assert coalescer.push(text("lo", 0)) == []
+        assert coalescer.flush() == [text("Hello", 0)]
+        assert coalescer.flush() == []
+
+    def test_other_events_flush_and_keep_order(self):
+        """Test that tool-use and stop events follow the text merged before them."""
+        coalescer = EventCoalescer(StreamCoalescing(max_bytes=100))
+        coalescer.push(text("a"))
+        coalescer.push(text("b"))
+
+        assert coalescer.push(TOOL_USE) == [text("ab"), TOOL_USE]
+        assert coalescer.push(STOP) == [STOP]
+        assert (coalescer.events_in, coalescer.events_out) == (4, 3)
+
+    def test_new_content_block_starts_new_frame(self):
+        """Test that deltas of different content blocks are never merged."""
+        coalescer = EventCoalescer(StreamCoalescing(max_bytes=100))
+        coalescer.push(text("a", 0))
+
+        assert coalescer.push(text("b", 1)) == [text("a", 0)]
+        assert coalescer.flush() == [text("b", 1)]
+
+    def test_size_limit_flushes(self):
+        """Test that text is flushed once it reaches max_bytes (UTF-8)."""
+        coalescer = EventCoalescer(StreamCoalescing(max_bytes=6))
+
+        assert coalescer.push(text("請")) == []
+        assert coalescer.push(text("求")) == [text("請求")]
+        assert not coalescer.pending
+
+    def test_flush_deadline(self):
+        """Test that held text reports when it must be flushed."""
+        clock = FakeClock()
+        coalescer = EventCoalescer(StreamCoalescing(max_delay=0.05), clock=clock)
+
+        assert coalescer.flush_due_in() is None
+        coalescer.push(text("a"))
+        clock.now = 0.03
+        coalescer.push(text("b"))
+
+        assert coalescer.flush_due_in() == pytest.approx(0.02)
+        clock.now = 0.1
+        assert coalescer.flush_due_in() == 0.0
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+class TestCoalesceEvents:
+    """Tests for the async pipeline."""
+
+    def test_stream_is_merged_in_order(self):
+        """Test that a burst of deltas becomes one frame between other events."""
+        async def source():
+            yield {"event": {"messageStart": {"role": "assistant"}}}
+            for part in ["Hel", "lo ", "world"]:
+                yield text(part, 0)
+            yield STOP
+            yield {"result": "Hello world"}
+
+        events = asyncio.run(collect(coalesce_events(source(), StreamCoalescing(max_bytes=1024))))
+
+        assert events == [
+            {"event": {"messageStart": {"role": "assistant"}}},
+            text("Hello world", 0),
+            STOP,
+            {"result": "Hello world"},
+        ]
+
+    def test_held_text_is_flushed_after_max_delay(self):
+        """Test that a pause in the model stream doesn't hold text back."""
+        async def source():
+            yield text("first")
+            await asyncio.sleep(0.2)
+            yield text("second")
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            arrivals = []
+            async for event in coalesce_events(source(), StreamCoalescing(max_delay=0.02)):
+                arrivals.append((texts([event])[0], loop.time() - start))
+            return arrivals
+
+        arrivals = asyncio.run(run())
+
+        assert [value for value, _ in arrivals] == ["first", "second"]
+        assert arrivals[0][1] < 0.15
+
+    def test_upstream_error_after_pending_text(self):
+        """Test that text merged before a failure is delivered, then the error raised."""
+        async def source():
+            yield text("partial")
+            raise RuntimeError("model failed")
+
+        async def run():
+            received = []
+            with pytest.raises(RuntimeError, match="model failed"):
+                async for event in coalesce_events(source(), StreamCoalescing(max_delay=10)):
+                    received.append(event)
+            return received
+
+        assert asyncio.run(run()) == [text("partial")]
+
+    def test_slow_consumer_bounds_buffering(self):
+        """Test that the producer stays at most queue_size events ahead."""
+        produced = 0
+
+        async def source():
+            nonlocal produced
+            for _ in range(50):
+                produced += 1
+                yield STOP
+
+        async def run():
+            ahead = []
+            consumed = 0
+            async for _ in coalesce_events(source(), StreamCoalescing(queue_size=4)):
+                consumed += 1
+                await asyncio.sleep(0.001)
+                ahead.append(produced - consumed)
+            return consumed, max(ahead)
+
+        consumed, max_ahead = asyncio.run(run())
+
+        assert consumed == 50
+        assert max_ahead <= 4 + 3  # Queue, one event being produced, at most two being sent
+
+    def test_backlog_is_merged_for_slow_consumer(self):
+        """Test that deltas queued behind a slow consumer go out as fewer frames."""
+        async def source():
+            for _ in range(20):
+                yield text("x")
+
+        async def run():
+            events = []
+            async for event in coalesce_events(source(), StreamCoalescing(max_bytes=5, max_delay=10)):
+                events.append(event)
+                await asyncio.sleep(0.01)
+            return events
+
+        events = asyncio.run(run())
+
+        assert "".join(texts(events)) == "x" * 20
+        assert len(events) == 4
+
+    def test_early_close_closes_upstream(self):
+        """Test that a consumer stopping early lets the upstream generator clean up."""
+        closed = asyncio.Event()
+
+        async def source():
+            try:
+                while True:
+                    yield STOP
+            finally:
+                closed.set()
+
+        async def run():
+            stream = coalesce_events(source(), StreamCoalescing(queue_size=2))
+            async for _ in stream:
+                break
+            await stream.aclose()
+            return closed.is_set()
+
+        assert asyncio.run(run())
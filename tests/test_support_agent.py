@@ -1,11 +1,16 @@
 """Integration tests for SupportAgent."""
 
+import asyncio
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
+from strands.models import Model
 
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.streaming import StreamCoalescing
 from agent.support_agent import SupportAgent
+from agent.tools import SupportAgentTools
 
 
 @pytest.fixture
@@ -64,6 +69,145 @@ class TestSupportAgentIntegration:
         """Test that list_wiki_files returns actual files."""
         result = agent.support_tools.list_wiki_files()
 
-        assert "Available wiki files:" in result
+        assert result.startswith("Wiki files 1-")
         assert ".md" in result
 
+
+
+class StubModel(Model):
+    """Model that answers with fixed text and records the system prompt it received."""
+
+    def __init__(self):
+        self.system_prompts = []
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, *, system_prompt_content=None, **kwargs):
+        self.system_prompts.append(system_prompt_content)
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockDelta": {"delta": {"text": "ok"}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+class TestKnowledgeOutlinePrompt:
+    """Tests for the generated knowledge outline in the system prompt."""
+
+    @pytest.fixture
+    def wiki_source(self):
+        """Create a mock knowledge source at a fixed revision."""
+        mock = Mock(spec=WikiKnowledgeSource)
+        mock.current_revision.return_value = "abc123"
+        mock.list_files.return_value = [Path("billing/invoice.md"), Path("assets/logo.png")]
+        mock.load_file.return_value = "# 請求書\n\n## 発行手順\n\ntext\n\n## 再発行\n\ntext"
+        return mock
+
+    def _agent(self, wiki_source, model):
+        return SupportAgent(
+            wiki_source=wiki_source,
+            support_tools=SupportAgentTools(wiki_source),
+            model=model,
+            system_prompt="Base prompt",
+            callback_handler=None,
+        )
+
+    def test_outline_is_cached_prefix_of_system_prompt(self, wiki_source):
+        """Test that the outline follows the base prompt and precedes a cache point."""
+        model = StubModel()
+        agent = self._agent(wiki_source, model)
+
+        agent("hello")
+
+        base, outline, cache_point = model.system_prompts[0]
+        assert base == {"text": "Base prompt"}
+        assert "- billing/invoice.md: 請求書 - 発行手順, 再発行" in outline["text"]
+        assert "logo.png" not in outline["text"]
+        assert cache_point == {"cachePoint": {"type": "default"}}
+
+    def test_outline_regenerated_only_on_new_commit(self, wiki_source):
+        """Test that the prompt stays byte-identical until the revision changes."""
+        model = StubModel()
+        agent = self._agent(wiki_source, model)
+
+        agent("first")
+        agent("second")
+        wiki_source.current_revision.return_value = "def456"
+        wiki_source.changes_between.return_value = None
+        wiki_source.load_file.return_value = "# 請求書\n\n## 支払い方法\n\ntext"
+        agent("third")
+
+        first, second, third = model.system_prompts
+        assert first == second
+        assert "支払い方法" in third[1]["text"]
+        assert wiki_source.list_files.call_count == 2  # One full index build per commit
+
+    def test_outline_failure_keeps_base_prompt(self, wiki_source):
+        """Test that a failing knowledge source doesn't block the conversation."""
+        wiki_source.ensure_fresh.side_effect = RuntimeError("network down")
+        model = StubModel()
+        agent = self._agent(wiki_source, model)
+
+        agent("hello")
+
+        assert model.system_prompts[0] == [{"text": "Base prompt"}, {"cachePoint": {"type": "default"}}]
+
+    def test_outline_fits_size_limit(self, wiki_source):
+        """Test that a large knowledge base is shortened to the size limit."""
+        wiki_source.list_files.return_value = [Path(f"doc{i:04d}.md") for i in range(500)]
+        tools = SupportAgentTools(wiki_source)
+
+        _, outline = tools.knowledge_outline(max_chars=2000)
+
+        assert len(outline) <= 2000
+        assert "more documents (see list_wiki_files)" in outline
+        assert "発行手順" not in outline  # Headings are dropped first
+
+
+class ChattyModel(StubModel):
+    """Model that streams its answer in small deltas."""
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, *, system_prompt_content=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        for part in ["Your ", "invoice ", "is ", "ready."]:
+            yield {"contentBlockDelta": {"delta": {"text": part}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+class TestStreamCoalescing:
+    """Tests for merged text deltas in stream_async."""
+
+    def _events(self, **kwargs):
+        wiki_source = Mock(spec=WikiKnowledgeSource)
+        wiki_source.current_revision.return_value = None
+        wiki_source.list_files.return_value = []
+        agent = SupportAgent(
+            wiki_source=wiki_source, model=ChattyModel(), callback_handler=None, **kwargs
+        )
+
+        async def collect():
+            return [message async for message in agent.stream_async("hello")]
+
+        return asyncio.run(collect())
+
+    def test_deltas_are_forwarded_one_by_one_by_default(self):
+        """Test that without coalescing every delta is its own event."""
+        events = self._events()
+
+        deltas = [e for e in events if "contentBlockDelta" in e.get("event", {})]
+        assert len(deltas) == 4
+
+    def test_deltas_are_merged_with_coalescing(self):
+        """Test that coalescing merges the deltas and keeps the other events in order."""
+        events = self._events(stream_coalescing=StreamCoalescing(max_bytes=1024))
+
+        kinds = [next(iter(e["event"])) if "event" in e else "result" for e in events]
+        assert kinds == ["messageStart", "contentBlockDelta", "contentBlockStop", "messageStop", "result"]
+        assert events[1]["event"]["contentBlockDelta"]["delta"]["text"] == "Your invoice is ready."
@@ -0,0 +1,143 @@
+"""Tests for telemetry spans and metrics."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import StatusCode
+
+from agent import telemetry
+from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.tools import SupportAgentTools
+
+
+@pytest.fixture
+def exporters():
+    """Route telemetry to in-memory exporters for the duration of a test."""
+    spans = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(spans))
+    metrics = InMemoryMetricReader()
+    telemetry.configure(enabled=True, tracer_provider=tracer_provider, meter_provider=MeterProvider([metrics]))
+    yield spans, metrics
+    telemetry.configure(enabled=True)
+
+
+def _finished(spans):
+    """Map finished span names to their attributes."""
+    return {span.name: dict(span.attributes) for span in spans.get_finished_spans()}
+
+
+def _histograms(metrics):
+    """Map (metric name, operation) to the recorded sum."""
+    values = {}
+    for resource_metrics in metrics.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                for point in metric.data.data_points:
+                    values[(metric.name, point.attributes["operation"])] = point.sum
+    return values
+
+
+def test_disabled_telemetry_is_noop():
+    """Test that disabled telemetry hands out the shared no-op span."""
+    telemetry.configure(enabled=False)
+    try:
+        with telemetry.span("operation") as span:
+            span.set("key", "value")
+            span.add("count")
+            assert telemetry.current() is span
+        assert isinstance(span, telemetry.NoopSpan)
+    finally:
+        telemetry.configure(enabled=True)
+
+
+def test_counters_roll_up_to_enclosing_spans(exporters):
+    """Test that counts added in a nested span are reported by its parents."""
+    spans, metrics = exporters
+
+    with telemetry.span("outer"):
+        with telemetry.span("inner"):
+            telemetry.current().add("bytes_read", 10)
+        telemetry.current().add("bytes_read", 5)
+
+    finished = _finished(spans)
+    assert finished["inner"]["bytes_read"] == 10
+    assert finished["outer"]["bytes_read"] == 15
+    recorded = _histograms(metrics)
+    assert recorded[("agent.operation.bytes_read", "outer")] == 15
+    assert ("agent.operation.duration", "inner") in recorded
+
+
+def test_span_records_errors(exporters):
+    """Test that an exception marks the span as failed and propagates."""
+    spans, _ = exporters
+
+    with pytest.raises(ValueError):
+        with telemetry.span("failing"):
+            raise ValueError("boom")
+
+    assert spans.get_finished_spans()[0].status.status_code == StatusCode.ERROR
+    assert isinstance(telemetry.current(), telemetry.NoopSpan)
+
+
+def test_search_wiki_reports_io_and_result_size(exporters):
+    """Test that a search reports files read, cache hits and result size."""
+    spans, _ = exporters
+    with tempfile.TemporaryDirectory() as tmpdir:
+        docs = Path(tmpdir) / "repo" / "docs"
+        docs.mkdir(parents=True)
+        (docs / "billing.md").write_text("# Billing\n\n請求書の発行手順", encoding="utf-8")
+        (docs / "guide.md").write_text("# Guide\n\nGetting started", encoding="utf-8")
+        wiki_source = WikiKnowledgeSource("https://example.com/repo", "docs", Path(tmpdir) / "repo")
+        tools = SupportAgentTools(wiki_source)
+
+        with patch.object(wiki_source, "ensure_fresh"):
+            result = tools.search_wiki("請求書")
+            tools.search_wiki("請求書")
+
+    searches = [dict(span.attributes) for span in spans.get_finished_spans() if span.name == "tool.search_wiki"]
+    first, second = searches
+    assert first["files_read"] == 2
+    assert first["bytes_read"] == sum(len(text.encode()) for text in ["# Billing\n\n請求書の発行手順", "# Guide\n\nGetting started"])
+    assert first["file_cache_misses"] == 2
+    assert first["result_chars"] == len(result)
+    assert first["result_tokens"] > 0
+    assert first["query_cache_hit"] is False
+    # The folder's fingerprint is unchanged, so the result comes from the query cache
+    assert second["query_cache_hit"] is True
+    assert "files_read" not in second
+    assert _finished(spans)["wiki.list_files"]["files_scanned"] == 2
+
+
+def test_async_tool_spans_nest_under_the_caller(exporters):
+    """Test that spans opened on the I/O executor keep the caller's trace."""
+    spans, _ = exporters
+    tracer = TracerProvider().get_tracer("strands")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        docs = Path(tmpdir) / "repo" / "docs"
+        docs.mkdir(parents=True)
+        (docs / "billing.md").write_text("# Billing\n\nInvoices", encoding="utf-8")
+        wiki_source = WikiKnowledgeSource("https://example.com/repo", "docs", Path(tmpdir) / "repo")
+        tools = SupportAgentTools(wiki_source)
+
+        async def call_tool():
+            # Stands in for the execute_tool span strands opens around a tool call
+            with tracer.start_as_current_span("execute_tool search_wiki") as outer:
+                await tools.search_wiki_async("invoices")
+                return outer
+
+        with patch.object(wiki_source, "ensure_fresh"):
+            outer = asyncio.run(call_tool())
+
+    search = next(span for span in spans.get_finished_spans() if span.name == "tool.search_wiki")
+    assert search.parent is not None
+    assert search.parent.span_id == outer.context.span_id
+    assert search.context.trace_id == outer.context.trace_id
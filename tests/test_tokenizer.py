@@ -0,0 +1,33 @@
+"""Tests for the mixed Japanese/English tokenizer."""
+
+from agent.knowledge.tokenizer import normalize, tokenize
+
+
+def test_tokenize_lowercases_words():
+    """Test that Latin text is split into lowercase words."""
+    assert tokenize("AWS Lambda, S3!") == ["aws", "lambda", "s3"]
+
+
+def test_tokenize_japanese_into_bigrams():
+    """Test that kanji runs become bigrams and particles are dropped."""
+    assert tokenize("請求書の発行") == ["請求", "求書", "発行"]
+
+
+def test_tokenize_splits_at_script_boundaries():
+    """Test that mixed scripts are split into separate runs."""
+    assert tokenize("MFAを設定") == ["mfa", "設定"]
+
+
+def test_tokenize_supports_trigrams():
+    """Test that additional n-gram sizes are emitted."""
+    assert tokenize("請求書", ngram_sizes=(2, 3)) == ["請求", "求書", "請求書"]
+
+
+def test_tokenize_keeps_short_runs():
+    """Test that a single kanji is kept as a unigram."""
+    assert tokenize("株") == ["株"]
+
+
+def test_normalize_folds_width():
+    """Test that full-width Latin and half-width katakana are folded."""
+    assert normalize("ＭＦＡ ｶﾞｲﾄﾞ") == "mfa ガイド"
@@ -1,12 +1,14 @@
 """Tests for SupportAgentTools."""
 
+import asyncio
+import threading
 from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
 
-from agent.knowledge.wiki_source import WikiKnowledgeSource
-from agent.tools import SupportAgentTools
+from agent.knowledge.wiki_source import ChangeSet, WikiKnowledgeSource
+from agent.tools import RANKERS, SupportAgentTools
 
 
 @pytest.fixture
@@ -35,7 +37,8 @@ class TestSearchWiki:
 
         result = tools.search_wiki("lambda")
 
-        mock_wiki_source.clone_or_update.assert_called_once()
+        mock_wiki_source.ensure_fresh.assert_called_once()
+        mock_wiki_source.clone_or_update.assert_not_called()
         assert "Lambda information" in result
         assert "## From doc1.md" in result
 
@@ -66,44 +69,424 @@ class TestSearchWiki:
 
         assert "Lambda Functions" in result
 
+    def test_search_ranks_best_match_first(self, tools, mock_wiki_source):
+        """Test that results are ordered by relevance, not file order."""
+        mock_wiki_source.list_files.return_value = [Path("doc1.md"), Path("doc2.md")]
+        mock_wiki_source.load_file.side_effect = [
+            "Overview of many services including Lambda and S3 and EC2",
+            "Lambda Lambda Lambda",
+        ]
+
+        result = tools.search_wiki("lambda")
+
+        assert result.index("## From doc2.md") < result.index("## From doc1.md")
+
+    def test_search_indexes_once_per_revision(self, tools, mock_wiki_source):
+        """Test that files are loaded once while the revision is unchanged."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "Lambda functions are great"
+
+        tools.search_wiki("lambda")
+        tools.search_wiki("functions")
+
+        assert mock_wiki_source.load_file.call_count == 1
+
+    def test_search_reindexes_when_revision_changes(self, tools, mock_wiki_source):
+        """Test that a new revision triggers a rebuild when no diff is available."""
+        mock_wiki_source.current_revision.side_effect = ["abc123", "def456"]
+        mock_wiki_source.changes_between.return_value = None
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.side_effect = ["About S3", "About Lambda"]
+
+        tools.search_wiki("lambda")
+        result = tools.search_wiki("lambda")
+
+        assert "About Lambda" in result
+
+    def test_search_reindexes_only_changed_files(self, tools, mock_wiki_source):
+        """Test that a new revision re-indexes only files in the change set."""
+        mock_wiki_source.current_revision.side_effect = ["abc123", "def456"]
+        mock_wiki_source.changes_between.return_value = ChangeSet(
+            before="abc123",
+            after="def456",
+            modified=(Path("doc1.md"),),
+            deleted=(Path("doc2.md"),),
+            renamed=((Path("doc3.md"), Path("moved.md")),),
+        )
+        mock_wiki_source.list_files.return_value = [Path("doc1.md"), Path("doc2.md"), Path("doc3.md")]
+        mock_wiki_source.load_file.side_effect = [
+            "Old Lambda notes",
+            "Lambda in doc2",
+            "Lambda in doc3",
+            "New Lambda notes",
+            "Lambda in doc3",
+        ]
+
+        tools.search_wiki("lambda")
+        result = tools.search_wiki("lambda")
+
+        mock_wiki_source.changes_between.assert_called_once_with("abc123", "def456")
+        assert mock_wiki_source.load_file.call_count == 5
+        assert "New Lambda notes" in result
+        assert "## From moved.md" in result
+        assert "doc2.md" not in result
+        assert "doc3.md" not in result
+
+    def test_search_returns_matching_section_only(self, tools, mock_wiki_source):
+        """Test that only the best-matching section of a long file is returned."""
+        mock_wiki_source.list_files.return_value = [Path("guide.md")]
+        mock_wiki_source.load_file.return_value = (
+            "# Guide\n\n## Billing\n\nInvoices are issued monthly.\n\n"
+            "## Security\n\nEnable MFA for the root user."
+        )
+
+        result = tools.search_wiki("MFA")
+
+        assert "## From guide.md > Guide > Security" in result
+        assert "Enable MFA" in result
+        assert "Invoices" not in result
+
+    def test_search_respects_token_budget(self, mock_wiki_source):
+        """Test that search output is limited by the token budget."""
+        tools = SupportAgentTools(mock_wiki_source, token_budget=100)
+        mock_wiki_source.list_files.return_value = [Path(f"doc{i}.md") for i in range(5)]
+        mock_wiki_source.load_file.side_effect = [
+            f"Lambda note {i} " + "detail " * 60 for i in range(5)
+        ]
+
+        result = tools.search_wiki("lambda")
+
+        assert result.count("## From") == 1
+
+    def test_search_results_are_cached(self, tools, mock_wiki_source):
+        """Test that equivalent queries at the same revision reuse the result."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "MFA の設定方法"
+
+        first = tools.search_wiki("MFA 設定")
+        second = tools.search_wiki("ｍｆａ　設定")
+
+        assert first == second
+        assert (tools.query_cache.hits, tools.query_cache.misses) == (1, 1)
+
     def test_search_handles_error(self, tools, mock_wiki_source):
         """Test that search returns error message when operation fails."""
-        mock_wiki_source.clone_or_update.side_effect = Exception("Clone failed")
+        mock_wiki_source.ensure_fresh.side_effect = Exception("Clone failed")
 
         result = tools.search_wiki("lambda")
 
         assert "Error searching wiki: Clone failed" in result
 
 
+class TestRankers:
+    """Tests for the TF-IDF and hybrid rankers."""
+
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip("numpy")
+
+    @pytest.fixture
+    def documents(self, mock_wiki_source):
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("invoice.md"), Path("lambda.md")]
+        mock_wiki_source.load_file.side_effect = lambda path: {
+            "invoice.md": "# Invoices\n\nDownload the invoice from the billing console",
+            "lambda.md": "# Lambda\n\nLambda functions scale automatically",
+        }[str(path)]
+
+    def test_unknown_ranker_is_rejected(self, mock_wiki_source):
+        """Test that a typo in the ranker name fails early."""
+        with pytest.raises(ValueError, match="Unknown ranker"):
+            SupportAgentTools(mock_wiki_source, ranker="semantic")
+
+    def test_tfidf_matches_word_variants(self, mock_wiki_source, documents):
+        """Test that the TF-IDF ranker finds passages BM25 misses."""
+        bm25 = SupportAgentTools(mock_wiki_source)
+        tfidf = SupportAgentTools(mock_wiki_source, ranker="tfidf")
+
+        assert bm25.search_passages("downloads") == []
+        assert [p.path for p in tfidf.search_passages("downloads")] == ["invoice.md"]
+
+    def test_hybrid_fuses_both_rankers(self, mock_wiki_source, documents):
+        """Test that the hybrid ranker keeps exact matches first and adds fuzzy ones."""
+        tools = SupportAgentTools(mock_wiki_source, ranker="hybrid")
+
+        result = tools.search_wiki("lambda downloads")
+
+        assert result.index("lambda.md") < result.index("invoice.md")
+
+    def test_repeated_query_terms_are_cached_apart(self, mock_wiki_source, documents):
+        """Test that the query cache doesn't merge queries the TF-IDF ranker tells apart."""
+        tools = SupportAgentTools(mock_wiki_source, ranker="tfidf")
+
+        tools.search_wiki("lambda invoice")
+        result = tools.search_wiki("invoice invoice invoice lambda")
+
+        assert tools.query_cache.hits == 0
+        assert result.index("invoice.md") < result.index("lambda.md")
+
+    def test_vector_index_follows_incremental_updates(self, mock_wiki_source, documents):
+        """Test that changed files are re-vectorized with the keyword index."""
+        tools = SupportAgentTools(mock_wiki_source, ranker="tfidf")
+        tools.refresh_index()
+        mock_wiki_source.current_revision.return_value = "def456"
+        mock_wiki_source.changes_between.return_value = ChangeSet(
+            before="abc123", after="def456", deleted=(Path("invoice.md"),)
+        )
+
+        assert tools.search_passages("downloads") == []
+
+    def test_snapshot_with_vector_ranker(self, mock_wiki_source, documents, tmp_path):
+        """Test that passages from a snapshot are vectorized without reading files."""
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+        mock_wiki_source.load_file.reset_mock()
+
+        tools = SupportAgentTools(mock_wiki_source, ranker="tfidf")
+        tools.load_snapshot(tmp_path / "index.snapshot")
+
+        assert [p.path for p in tools.search_passages("downloads")] == ["invoice.md"]
+        mock_wiki_source.load_file.assert_not_called()
+
+
+class TestSearchBatch:
+    """Tests for batch search."""
+
+    @pytest.fixture
+    def documents(self, mock_wiki_source):
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("invoice.md"), Path("lambda.md")]
+        mock_wiki_source.load_file.side_effect = lambda path: {
+            "invoice.md": "# Invoices\n\nDownload the invoice from the billing console",
+            "lambda.md": "# Lambda\n\nLambda functions scale automatically",
+        }[str(path)]
+
+    @pytest.mark.parametrize("ranker", RANKERS)
+    def test_batch_matches_single_searches(self, mock_wiki_source, documents, ranker):
+        """Test that each batch result equals the result of a single search."""
+        if ranker != "bm25":
+            pytest.importorskip("numpy")
+        tools = SupportAgentTools(mock_wiki_source, ranker=ranker)
+        queries = ["invoice", "lambda scale", "qqq", "billing lambda"]
+
+        results = tools.search_batch(queries)
+
+        assert results == [tools.search_passages(query) for query in queries]
+        assert results[2] == []
+
+    def test_batch_refreshes_once_and_dedupes(self, tools, mock_wiki_source, documents):
+        """Test that the corpus is read once and equivalent queries share a ranking."""
+        tools.index = Mock(wraps=tools.index)
+
+        results = tools.search_batch(["Invoice", "invoice", "ＩＮＶＯＩＣＥ"], top_k=1)
+
+        assert [[p.path for p in passages] for passages in results] == [["invoice.md"]] * 3
+        assert mock_wiki_source.load_file.call_count == 2
+        ranked = tools.index.search_batch.call_args.args[0]
+        assert len(ranked) == 1
+
+    def test_batch_from_snapshot(self, mock_wiki_source, documents, tmp_path):
+        """Test that a loaded snapshot answers batches without reading files."""
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+        mock_wiki_source.load_file.reset_mock()
+        tools = SupportAgentTools(mock_wiki_source)
+        tools.load_snapshot(tmp_path / "index.snapshot")
+
+        results = tools.search_batch(["invoice", "lambda"])
+
+        assert [[p.path for p in passages] for passages in results] == [["invoice.md"], ["lambda.md"]]
+        mock_wiki_source.load_file.assert_not_called()
+
+
 class TestListWikiFiles:
     """Tests for list_wiki_files tool."""
 
     def test_list_returns_available_files(self, tools, mock_wiki_source):
-        """Test that list returns all available files."""
+        """Test that list describes documents and only counts other files."""
         mock_wiki_source.list_files.return_value = [
             Path("doc1.md"),
             Path("doc2.md"),
-            Path("image.png"),
+            Path("assets/image.png"),
+            Path("assets/logo.png"),
         ]
+        mock_wiki_source.load_file.side_effect = lambda path: {
+            "doc1.md": "# 請求書\n\n## 発行手順\n\ntext\n\n## FAQ\n\ntext",
+            "doc2.md": "no headings",
+        }[str(path)]
 
         result = tools.list_wiki_files()
 
-        assert "doc1.md" in result
-        assert "doc2.md" in result
-        assert "image.png" in result
+        assert "- doc1.md (48 B) 請求書: 発行手順, FAQ" in result
+        assert "- doc2.md (11 B) doc2" in result
+        assert "image.png" not in result
+        assert "Other files (not searchable): 2 (2 .png)" in result
 
-    def test_list_calls_clone_or_update(self, tools, mock_wiki_source):
-        """Test that list updates repository before listing."""
+    def test_list_filters_by_prefix_and_text(self, tools, mock_wiki_source):
+        """Test that path prefix and substring filters narrow the listing."""
+        mock_wiki_source.list_files.return_value = [
+            Path("billing/invoice.md"),
+            Path("billing/payment.md"),
+            Path("login/mfa.md"),
+        ]
+        mock_wiki_source.load_file.side_effect = lambda path: {
+            "billing/invoice.md": "# Invoice\n\n## PDF再発行",
+            "billing/payment.md": "# Payment\n\n## Card",
+            "login/mfa.md": "# MFA",
+        }[str(path)]
+
+        by_prefix = tools.list_wiki_files(path_prefix="billing/")
+        by_heading = tools.list_wiki_files(contains="ｐｄｆ再発行")  # Full-width, any case
+
+        assert "billing/invoice.md" in by_prefix and "billing/payment.md" in by_prefix
+        assert "login/mfa.md" not in by_prefix
+        assert "Wiki files 1-1 of 1 containing 'ｐｄｆ再発行':" in by_heading
+        assert "billing/invoice.md" in by_heading
+        assert "billing/payment.md" not in by_heading
+
+    def test_list_paginates(self, tools, mock_wiki_source):
+        """Test that long listings are split into pages."""
+        mock_wiki_source.list_files.return_value = [Path(f"doc{i:02d}.md") for i in range(5)]
+        mock_wiki_source.load_file.return_value = "# Doc"
+
+        first = tools.list_wiki_files(page_size=2)
+        last = tools.list_wiki_files(page=3, page_size=2)
+
+        assert "Wiki files 1-2 of 5:" in first
+        assert "doc00.md" in first and "doc02.md" not in first
+        assert "request page=2 for more" in first
+        assert "Wiki files 5-5 of 5:" in last
+        assert "for more" not in last
+
+    def test_list_reads_files_once_per_revision(self, tools, mock_wiki_source):
+        """Test that the catalog is built once per commit and shared with search."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "# Lambda\n\nLambda functions"
+
+        tools.list_wiki_files()
+        tools.search_wiki("lambda")
+        tools.list_wiki_files(contains="lambda")
+
+        mock_wiki_source.load_file.assert_called_once()
+
+    def test_list_ensures_fresh_snapshot(self, tools, mock_wiki_source):
+        """Test that list checks snapshot freshness instead of pulling."""
         mock_wiki_source.list_files.return_value = []
 
         tools.list_wiki_files()
 
-        mock_wiki_source.clone_or_update.assert_called_once()
+        mock_wiki_source.ensure_fresh.assert_called_once()
+        mock_wiki_source.clone_or_update.assert_not_called()
 
     def test_list_handles_error(self, tools, mock_wiki_source):
         """Test that list returns error message on failure."""
-        mock_wiki_source.clone_or_update.side_effect = Exception("Update failed")
+        mock_wiki_source.ensure_fresh.side_effect = Exception("Update failed")
 
         result = tools.list_wiki_files()
 
         assert "Error listing wiki files: Update failed" in result
+
+
+class TestAsyncTools:
+    """Tests for the async tool variants."""
+
+    def test_search_wiki_async_runs_off_event_loop(self, tools, mock_wiki_source):
+        """Test that the async search returns the same result from a worker thread."""
+        loop_thread = threading.get_ident()
+        worker_threads = []
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.side_effect = lambda path: (
+            worker_threads.append(threading.get_ident()) or "Lambda functions are great"
+        )
+
+        result = asyncio.run(tools.search_wiki_async("lambda"))
+
+        assert "Lambda functions" in result
+        assert worker_threads and loop_thread not in worker_threads
+
+    def test_list_wiki_files_async(self, tools, mock_wiki_source):
+        """Test that the async list returns available files."""
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "# Doc"
+
+        result = asyncio.run(tools.list_wiki_files_async())
+
+        assert "doc1.md" in result
+
+    def test_async_tools_use_sync_tool_names(self, tools):
+        """Test that async variants are exposed to the model under the same names."""
+        assert tools.search_wiki_async.tool_name == "search_wiki"
+        assert tools.list_wiki_files_async.tool_name == "list_wiki_files"
+
+
+class TestIndexSnapshot:
+    """Tests for saving and loading index snapshots."""
+
+    def test_loaded_snapshot_serves_without_reading_files(self, mock_wiki_source, tmp_path):
+        """Test that a snapshot for the current revision needs no file loads."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "# Lambda\n\nLambda functions are great"
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+        mock_wiki_source.load_file.reset_mock()
+
+        tools = SupportAgentTools(mock_wiki_source)
+        tools.load_snapshot(tmp_path / "index.snapshot")
+        result = tools.search_wiki("lambda")
+
+        mock_wiki_source.load_file.assert_not_called()
+        assert "Lambda functions are great" in result
+
+    def test_list_after_snapshot_builds_catalog(self, mock_wiki_source, tmp_path):
+        """Test that listing works while a snapshot serves queries."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md")]
+        mock_wiki_source.load_file.return_value = "# Lambda\n\nLambda functions are great"
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+
+        tools = SupportAgentTools(mock_wiki_source)
+        tools.load_snapshot(tmp_path / "index.snapshot")
+        result = tools.list_wiki_files()
+
+        assert "- doc1.md" in result and "Lambda" in result
+
+    def test_outline_from_snapshot_reads_no_files(self, mock_wiki_source, tmp_path):
+        """Test that the catalog stored in a snapshot serves the outline and listing."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md"), Path("logo.png")]
+        mock_wiki_source.load_file.return_value = "# Lambda\n\n## Triggers\n\nLambda functions are great"
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+        mock_wiki_source.load_file.reset_mock()
+        mock_wiki_source.list_files.reset_mock()
+
+        tools = SupportAgentTools(mock_wiki_source)
+        tools.load_snapshot(tmp_path / "index.snapshot")
+        _, outline = tools.knowledge_outline()
+        listing = tools.list_wiki_files()
+
+        mock_wiki_source.load_file.assert_not_called()
+        mock_wiki_source.list_files.assert_not_called()
+        assert "- doc1.md: Lambda - Triggers" in outline
+        assert "Other files (not searchable): 1 (1 .png)" in listing
+
+    def test_snapshot_is_updated_incrementally(self, mock_wiki_source, tmp_path):
+        """Test that a newer revision applies only the diff on top of the snapshot."""
+        mock_wiki_source.current_revision.return_value = "abc123"
+        mock_wiki_source.list_files.return_value = [Path("doc1.md"), Path("doc2.md")]
+        mock_wiki_source.load_file.side_effect = ["Lambda basics", "S3 basics"]
+        SupportAgentTools(mock_wiki_source).save_snapshot(tmp_path / "index.snapshot")
+
+        tools = SupportAgentTools(mock_wiki_source)
+        tools.load_snapshot(tmp_path / "index.snapshot")
+        mock_wiki_source.current_revision.return_value = "def456"
+        mock_wiki_source.changes_between.return_value = ChangeSet(
+            before="abc123", after="def456", modified=(Path("doc2.md"),)
+        )
+        mock_wiki_source.load_file.side_effect = ["S3 and Lambda triggers"]
+
+        result = tools.search_wiki("lambda")
+
+        mock_wiki_source.changes_between.assert_called_once_with("abc123", "def456")
+        assert "Lambda basics" in result
+        assert "S3 and Lambda triggers" in result
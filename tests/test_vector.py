@@ -0,0 +1,91 @@
+"""Tests for HashedTfidfIndex."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from agent.knowledge.vector import HashedTfidfIndex  # noqa: E402
+
+
+@pytest.fixture
+def index():
+    """Create an index with a few mixed-language documents."""
+    index = HashedTfidfIndex()
+    index.add("invoice", "How to download an invoice for your account")
+    index.add("mfa", "Enable multi-factor authentication (MFA) for the root user")
+    index.add("請求書", "請求書の再発行手順について説明します")
+    return index
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    """Test that the most similar document ranks first with a score in (0, 1]."""
+    hits = index.search("download invoice")
+
+    assert hits[0].doc_id == "invoice"
+    assert 0 < hits[0].score <= 1.0 + 1e-6
+
+
+def test_search_matches_inflections_through_subwords(index):
+    """Test that character n-grams match word forms the tokenizer keeps apart."""
+    assert index.search("invoices")[0].doc_id == "invoice"
+    assert index.search("authenticate")[0].doc_id == "mfa"
+
+
+def test_search_japanese_bigrams(index):
+    """Test that Japanese queries match through character bigrams."""
+    assert [hit.doc_id for hit in index.search("請求書を再発行したい")] == ["請求書"]
+
+
+def test_search_without_overlap_is_empty(index):
+    """Test that unrelated queries and empty queries return nothing."""
+    assert index.search("kubernetes") == []
+    assert index.search("") == []
+
+
+def test_top_k_uses_partial_selection():
+    """Test that top_k returns the k best hits in order among many candidates."""
+    index = HashedTfidfIndex(subword_size=None)
+    for number in range(200):
+        index.add(f"doc{number}", "lambda " * (1 + number % 7) + f"filler{number}")
+
+    hits = index.search("lambda", top_k=5)
+
+    assert len(hits) == 5
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    full = index.search("lambda", top_k=200)
+    assert [hit.doc_id for hit in hits] == [hit.doc_id for hit in full[:5]]
+
+
+def test_add_replace_and_remove(index):
+    """Test that updates are visible on the next search."""
+    index.add("invoice", "Root user password reset")
+    index.remove("mfa")
+
+    assert "mfa" not in index
+    assert len(index) == 2
+    assert index.search("download invoice") == []
+    assert index.search("root user")[0].doc_id == "invoice"
+
+
+def test_matrix_is_contiguous_and_normalized(index):
+    """Test the CSC layout: one entry per (feature, document), unit-length rows."""
+    index.search("warm up")
+
+    assert index._column_values.flags["C_CONTIGUOUS"]
+    rows = np.bincount(index._column_rows, weights=index._column_values ** 2)
+    assert np.allclose(rows, 1.0)
+    assert index._column_offsets[-1] == len(index._column_rows)
+
+
+def test_search_batch_matches_single_queries(index, monkeypatch):
+    """Test that blocked batch scoring equals per-query scoring."""
+    queries = [["download", "invoice"], [], ["請求", "求書"], ["unrelated"], ["root", "user"]]
+    expected = [index.search_tokens(tokens, top_k=2) for tokens in queries]
+    # Force several blocks of two queries each
+    monkeypatch.setattr("agent.knowledge.vector.BATCH_CELLS", 2 * len(index))
+
+    results = index.search_batch(queries, top_k=2)
+
+    assert [[hit.doc_id for hit in hits] for hits in results] == [[hit.doc_id for hit in hits] for hits in expected]
+    for hits, single in zip(results, expected):
+        assert [hit.score for hit in hits] == pytest.approx([hit.score for hit in single])
@@ -1,11 +1,15 @@
 """Tests for WikiKnowledgeSource."""
 
+import asyncio
 import tempfile
+import threading
 from pathlib import Path
+from unittest.mock import patch
 
+import git
 import pytest
 
-from agent.knowledge.wiki_source import WikiKnowledgeSource
+from agent.knowledge.wiki_source import ChangeSet, WikiKnowledgeSource
 
 
 @pytest.fixture
@@ -79,3 +83,329 @@ def test_update_repository(temp_dir):
     wiki_source.clone_or_update()
     assert local_path.exists()
     assert (local_path / ".git").exists()
+
+
+@pytest.fixture
+def local_source(temp_dir):
+    """Create a WikiKnowledgeSource over an existing local snapshot."""
+    (temp_dir / "repo" / "docs").mkdir(parents=True)
+    (temp_dir / "repo" / "docs" / "guide.md").write_text("# Guide", encoding="utf-8")
+    return WikiKnowledgeSource("https://example.com/repo", "docs", temp_dir / "repo", freshness_seconds=60)
+
+
+def test_ensure_fresh_syncs_synchronously_without_snapshot(temp_dir):
+    """Test that the first sync blocks when there is nothing to serve."""
+    wiki_source = WikiKnowledgeSource("https://example.com/repo", "docs", temp_dir / "missing")
+
+    with patch.object(wiki_source, "clone_or_update") as clone_or_update:
+        wiki_source.ensure_fresh()
+
+    clone_or_update.assert_called_once()
+    assert wiki_source.last_synced_at is not None
+
+
+def test_ensure_fresh_refreshes_stale_snapshot_in_background(local_source):
+    """Test that a stale snapshot is served while a refresh runs."""
+    release = threading.Event()
+
+    with patch.object(local_source, "clone_or_update", side_effect=lambda: release.wait(5)) as clone_or_update:
+        local_source.ensure_fresh()
+        # Returns immediately and keeps serving the existing snapshot
+        assert local_source.list_files() == [Path("guide.md")]
+        # A second stale check does not start another refresh
+        local_source.ensure_fresh()
+        release.set()
+        local_source.wait_for_refresh(5)
+
+    clone_or_update.assert_called_once()
+    assert local_source.last_synced_at is not None
+
+
+def test_ensure_fresh_skips_sync_within_window(local_source):
+    """Test that no refresh happens inside the freshness window."""
+    with patch.object(local_source, "clone_or_update") as clone_or_update:
+        local_source.sync()
+        local_source.ensure_fresh()
+        local_source.wait_for_refresh(5)
+
+    clone_or_update.assert_called_once()
+
+
+def test_background_refresh_failure_keeps_snapshot(local_source):
+    """Test that a failed refresh is recorded and the snapshot stays usable."""
+    with patch.object(local_source, "clone_or_update", side_effect=RuntimeError("network down")):
+        local_source.ensure_fresh()
+        local_source.wait_for_refresh(5)
+
+    assert isinstance(local_source.last_sync_error, RuntimeError)
+    assert local_source.last_synced_at is None
+    assert local_source.load_file(Path("guide.md")) == "# Guide"
+
+
+def _commit(repo, message):
+    """Stage everything in the working tree and commit it."""
+    repo.git.add(A=True)
+    repo.index.commit(message, author=git.Actor("test", "test@example.com"))
+
+
+@pytest.fixture
+def origin_repo(temp_dir):
+    """Create a local origin repository with a docs directory."""
+    origin_path = temp_dir / "origin"
+    (origin_path / "docs").mkdir(parents=True)
+    (origin_path / "docs" / "keep.md").write_text("# Keep", encoding="utf-8")
+    (origin_path / "docs" / "edit.md").write_text("# Edit", encoding="utf-8")
+    (origin_path / "docs" / "remove.md").write_text("# Remove", encoding="utf-8")
+    (origin_path / "docs" / "rename.md").write_text("# Rename\n" + "same body\n" * 20, encoding="utf-8")
+    (origin_path / "README.md").write_text("# Outside", encoding="utf-8")
+    (origin_path / "cdk").mkdir()
+    (origin_path / "cdk" / "app.ts").write_text("// infrastructure", encoding="utf-8")
+    repo = git.Repo.init(origin_path)
+    with repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    _commit(repo, "initial")
+    return repo
+
+
+def test_pull_records_changed_files(origin_repo, temp_dir):
+    """Test that clone_or_update exposes files changed by a pull."""
+    wiki_source = WikiKnowledgeSource(origin_repo.working_dir, "docs", temp_dir / "clone")
+    wiki_source.clone_or_update()
+    before = wiki_source.current_revision()
+    assert wiki_source.last_changes == ChangeSet(before=None, after=before)
+
+    origin = Path(origin_repo.working_dir)
+    (origin / "docs" / "edit.md").write_text("# Edited", encoding="utf-8")
+    (origin / "docs" / "remove.md").unlink()
+    (origin / "docs" / "rename.md").rename(origin / "docs" / "請求書.md")
+    (origin / "docs" / "new.md").write_text("# New", encoding="utf-8")
+    (origin / "README.md").write_text("# Changed outside", encoding="utf-8")
+    _commit(origin_repo, "update docs")
+
+    assert wiki_source.load_file(Path("edit.md")) == "# Edit"
+    wiki_source.clone_or_update()
+    changes = wiki_source.last_changes
+
+    assert wiki_source.load_file(Path("edit.md")) == "# Edited"
+    assert changes.before == before
+    assert changes.after == origin_repo.head.commit.hexsha
+    assert changes.added == (Path("new.md"),)
+    assert changes.modified == (Path("edit.md"),)
+    assert changes.deleted == (Path("remove.md"),)
+    assert changes.renamed == ((Path("rename.md"), Path("請求書.md")),)
+
+
+def test_pull_without_new_commits_is_empty(origin_repo, temp_dir):
+    """Test that a no-op pull produces an empty change set."""
+    wiki_source = WikiKnowledgeSource(origin_repo.working_dir, "docs", temp_dir / "clone")
+    wiki_source.clone_or_update()
+    wiki_source.clone_or_update()
+
+    assert wiki_source.last_changes.is_empty
+
+
+def test_changes_between_unknown_commit(origin_repo, temp_dir):
+    """Test that an unknown commit yields None so callers rebuild."""
+    wiki_source = WikiKnowledgeSource(origin_repo.working_dir, "docs", temp_dir / "clone")
+    wiki_source.clone_or_update()
+
+    assert wiki_source.changes_between("0" * 40, wiki_source.current_revision()) is None
+
+
+def test_current_revision_reads_the_snapshot_link(origin_repo, temp_dir):
+    """Test that the revision comes from the symlink without opening the repository."""
+    wiki_source = WikiKnowledgeSource(origin_repo.working_dir, "docs", temp_dir / "clone")
+    wiki_source.clone_or_update()
+
+    with patch("agent.knowledge.wiki_source.git.Repo", side_effect=AssertionError("repository opened")):
+        assert wiki_source.current_revision() == origin_repo.head.commit.hexsha
+
+
+def test_shallow_sparse_clone(origin_repo, temp_dir):
+    """Test that the default clone is shallow and checks out only knowledge_dir."""
+    origin = Path(origin_repo.working_dir)
+    (origin / "docs" / "keep.md").write_text("# Keep v2", encoding="utf-8")
+    _commit(origin_repo, "second")
+
+    local_path = temp_dir / "clone"
+    wiki_source = WikiKnowledgeSource(origin.as_uri(), "docs", local_path)
+    wiki_source.clone_or_update()
+
+    shallow = Path(git.Repo(local_path).common_dir) / "shallow"
+    assert shallow.exists()
+    assert len(list(git.Repo(local_path).iter_commits())) == 1
+    assert (local_path / "docs" / "keep.md").read_text(encoding="utf-8") == "# Keep v2"
+    assert not (local_path / "cdk").exists()
+
+    # Incremental pull on top of the shallow clone
+    (origin / "docs" / "new.md").write_text("# New", encoding="utf-8")
+    (origin / "cdk" / "app.ts").write_text("// changed", encoding="utf-8")
+    _commit(origin_repo, "third")
+    wiki_source.clone_or_update()
+
+    assert wiki_source.last_changes.added == (Path("new.md"),)
+    assert (local_path / "docs" / "new.md").exists()
+    assert not (local_path / "cdk").exists()
+
+    wiki_source.unshallow()
+    assert not shallow.exists()
+    assert len(list(git.Repo(local_path).iter_commits())) == 3
+
+
+def test_full_clone(origin_repo, temp_dir):
+    """Test that depth and sparse checkout can be disabled."""
+    local_path = temp_dir / "clone"
+    wiki_source = WikiKnowledgeSource(
+        Path(origin_repo.working_dir).as_uri(), "docs", local_path, clone_depth=None, sparse=False
+    )
+    wiki_source.clone_or_update()
+
+    assert not (Path(git.Repo(local_path).common_dir) / "shallow").exists()
+    assert (local_path / "cdk" / "app.ts").exists()
+
+
+def test_refresh_switches_snapshot_atomically(origin_repo, temp_dir):
+    """Test that a refresh publishes a new checkout and keeps the previous one."""
+    origin = Path(origin_repo.working_dir)
+    local_path = temp_dir / "clone"
+    wiki_source = WikiKnowledgeSource(origin.as_uri(), "docs", local_path)
+    wiki_source.clone_or_update()
+    first = local_path.resolve()
+
+    assert local_path.is_symlink()
+    assert first.parent == wiki_source.snapshots_path.resolve()
+
+    for version in range(2, 5):
+        (origin / "docs" / "edit.md").write_text(f"# Edit v{version}", encoding="utf-8")
+        _commit(origin_repo, f"v{version}")
+        wiki_source.clone_or_update()
+
+    assert local_path.resolve().name == origin_repo.head.commit.hexsha
+    assert (local_path / "docs" / "edit.md").read_text(encoding="utf-8") == "# Edit v4"
+    # Only the current snapshot and its predecessor are kept
+    assert len(list(wiki_source.snapshots_path.iterdir())) == 2
+    assert not first.exists()
+
+
+def test_legacy_checkout_is_pulled_in_place(origin_repo, temp_dir):
+    """Test that a plain clone from older versions keeps being updated."""
+    local_path = temp_dir / "clone"
+    git.Repo.clone_from(origin_repo.working_dir, local_path)
+    origin = Path(origin_repo.working_dir)
+    (origin / "docs" / "new.md").write_text("# New", encoding="utf-8")
+    _commit(origin_repo, "add")
+
+    wiki_source = WikiKnowledgeSource(origin_repo.working_dir, "docs", local_path)
+    wiki_source.clone_or_update()
+
+    assert not local_path.is_symlink()
+    assert wiki_source.last_changes.added == (Path("new.md"),)
+
+
+def test_concurrent_sync_is_single_flight(local_source):
+    """Test that concurrent sync() calls share one clone_or_update()."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_update():
+        started.set()
+        release.wait(5)
+
+    with patch.object(local_source, "clone_or_update", side_effect=slow_update) as clone_or_update:
+        leader = threading.Thread(target=local_source.sync)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=local_source.sync) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+    clone_or_update.assert_called_once()
+
+
+def test_concurrent_sync_shares_failure(local_source):
+    """Test that callers waiting on a failed sync see its error."""
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing_update():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("network down")
+
+    def sync():
+        try:
+            local_source.sync()
+        except RuntimeError as e:
+            errors.append(e)
+
+    with patch.object(local_source, "clone_or_update", side_effect=failing_update):
+        leader = threading.Thread(target=sync)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=sync)
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+    assert len(errors) == 2
+
+
+def test_refresh_waits_for_lock_holder(origin_repo, temp_dir):
+    """Test that a refresh blocked on another holder's lock reuses its result."""
+    local_path = temp_dir / "clone"
+    holder = WikiKnowledgeSource(origin_repo.working_dir, "docs", local_path)
+    waiter = WikiKnowledgeSource(origin_repo.working_dir, "docs", local_path)
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with holder._interprocess_lock():
+            holder._checkout_latest()
+            acquired.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    acquired.wait(5)
+    with patch.object(waiter, "_checkout_latest") as checkout_latest:
+        blocked = threading.Thread(target=waiter.clone_or_update)
+        blocked.start()
+        blocked.join(0.1)
+        assert blocked.is_alive()
+        release.set()
+        blocked.join(5)
+        thread.join(5)
+
+    checkout_latest.assert_not_called()
+    assert waiter.last_changes.after == origin_repo.head.commit.hexsha
+
+
+def test_async_file_operations(local_source):
+    """Test that async variants return the same data as sync ones."""
+    async def run():
+        files = await local_source.alist_files()
+        content = await local_source.aload_file(files[0])
+        return files, content
+
+    files, content = asyncio.run(run())
+
+    assert files == [Path("guide.md")]
+    assert content == "# Guide"
+
+
+def test_async_sync_does_not_block_event_loop(local_source):
+    """Test that a slow clone_or_update leaves the event loop responsive."""
+    release = threading.Event()
+
+    async def run():
+        with patch.object(local_source, "clone_or_update", side_effect=lambda: release.wait(5)):
+            task = asyncio.create_task(local_source.aclone_or_update())
+            await asyncio.sleep(0.01)
+            # The loop keeps running while the clone is blocked in a worker thread
+            assert not task.done()
+            release.set()
+            await task
+
+    asyncio.run(run())